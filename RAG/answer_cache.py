@@ -0,0 +1,95 @@
+import threading
+import time
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """In-memory cache of answers keyed by question embedding.
+
+    A new question is a hit when its cosine similarity with a cached question
+    reaches `threshold` and the cached entry is younger than `ttl` seconds.
+    Call `invalidate()` whenever the vectorstore changes: it clears the cache
+    and bumps `version`, so answers computed against the old documents are
+    never stored.
+    """
+
+    def __init__(self, threshold=0.95, ttl=3600, max_entries=1000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = []
+        self._matrix = None
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _evict_expired(self, now):
+        fresh = [entry for entry in self._entries if now - entry["created_at"] < self.ttl]
+        if len(fresh) != len(self._entries):
+            self._entries = fresh
+            self._matrix = None
+
+    def get(self, query_vector):
+        """Return the closest cached entry above the threshold, or None."""
+        with self._lock:
+            self._evict_expired(time.time())
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix = np.stack([entry["vector"] for entry in self._entries])
+
+            similarities = self._matrix @ self._normalize(query_vector)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return {**self._entries[best], "similarity": float(similarities[best])}
+
+    def put(self, question, query_vector, answer, source_documents, version):
+        """Store an answer computed while the cache was at `version`."""
+        with self._lock:
+            if version != self.version:
+                return
+
+            self._entries.append(
+                {
+                    "question": question,
+                    "vector": self._normalize(query_vector),
+                    "answer": answer,
+                    "source_documents": source_documents,
+                    "created_at": time.time(),
+                }
+            )
+            # Drop the oldest entries once the cache is full
+            del self._entries[: max(0, len(self._entries) - self.max_entries)]
+            self._matrix = None
+
+    def invalidate(self):
+        """Forget every cached answer, e.g. after the vectorstore changed."""
+        with self._lock:
+            self.version += 1
+            self._entries = []
+            self._matrix = None
+
+    def stats(self):
+        """Return hit/miss counters and the current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
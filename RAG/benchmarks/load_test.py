@@ -0,0 +1,330 @@
+"""Offline load test of the whole RAG application.
+
+`RAGApplication` runs end to end, with OpenAI swapped for the local stand-ins
+in `stand_ins.py`: a deterministic hashing embedder and a chat model with a
+configurable time to first token and per-token delay. A synthetic corpus is
+written as PDFs (ingested through the parser pool) or kept as plain text
+pages, then questions about it are streamed one by one and, optionally,
+answered concurrently with `ask_many`.
+
+Ingest chunks/sec, query latency percentiles and peak RSS are written as
+JSON, so runs can be compared across commits:
+
+    python benchmarks/load_test.py --documents 50 --output baseline.json
+    python benchmarks/load_test.py --documents 50 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from stand_ins import HashingEmbeddings, LatencyChatModel  # noqa: E402
+
+from main import SPLITTERS, VECTOR_BACKENDS, VECTOR_QUANTIZATIONS, RAGApplication  # noqa: E402
+
+WORDS = (
+    "the of and to in is was for on that with as by at from it an be this are "
+    "which or model vector search embedding token chunk retrieval index page "
+    "document query system latency throughput memory storage cache batch"
+).split()
+# Words that make pages (and questions about them) distinguishable
+TOPICS = [f"topic{i}" for i in range(500)]
+PDF_LINE_CHARS = 90
+# Suffixes of the results compared by --compare: latency and memory should
+# not grow, throughput should not shrink
+LOWER_IS_BETTER = ("_ms", "_mb", "_seconds")
+HIGHER_IS_BETTER = "_per_second"
+
+
+def synthetic_page(rng):
+    """A page of prose-like sentences, each mentioning a few topic words."""
+
+    def sentence():
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+        words += rng.sample(TOPICS, 2)
+        rng.shuffle(words)
+        return " ".join(words).capitalize() + "."
+
+    paragraphs = [
+        " ".join(sentence() for _ in range(rng.randint(2, 6)))
+        for _ in range(rng.randint(3, 6))
+    ]
+    return "\n\n".join(paragraphs)
+
+
+def synthetic_corpus(documents, pages_per_document, seed=0):
+    rng = random.Random(seed)
+    return [
+        [synthetic_page(rng) for _ in range(pages_per_document)]
+        for _ in range(documents)
+    ]
+
+
+def synthetic_questions(corpus, count, seed=1):
+    """Questions quoting a few words of randomly chosen pages."""
+    rng = random.Random(seed)
+    pages = [page for document in corpus for page in document]
+    questions = []
+    for i in range(count):
+        words = rng.choice(pages).split()
+        start = rng.randrange(max(1, len(words) - 8))
+        questions.append(f"Question {i}: what does it say about {' '.join(words[start:start + 8])}?")
+    return questions
+
+
+def write_pdf(path, pages):
+    """Write a minimal text-only PDF, one content stream per page."""
+
+    def escape(line):
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        ),
+    ]
+    font = 3 + 2 * len(pages)
+    for i, text in enumerate(pages):
+        lines = []
+        for paragraph in text.split("\n\n"):
+            words, line = paragraph.split(), ""
+            for word in words:
+                if len(line) + len(word) >= PDF_LINE_CHARS:
+                    lines.append(line)
+                    line = ""
+                line = f"{line} {word}" if line else word
+            lines += [line, ""]
+        content = "BT /F1 10 Tf 12 TL 40 760 Td " + "".join(
+            f"({escape(line)}) Tj T* " for line in lines
+        ) + "ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out, offsets = "%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    Path(path).write_text(out, encoding="latin-1")
+
+
+def percentiles(values, prefix):
+    values = sorted(values)
+    if not values:
+        return {}
+
+    def at(q):
+        return values[min(len(values) - 1, int(len(values) * q))]
+
+    return {
+        f"{prefix}_p50_ms": at(0.50),
+        f"{prefix}_p95_ms": at(0.95),
+        f"{prefix}_p99_ms": at(0.99),
+        f"{prefix}_max_ms": values[-1],
+    }
+
+
+def ingest(app, corpus, corpus_kind, directory, workers):
+    """Store the corpus, returning ingest throughput."""
+    from langchain_core.documents import Document
+
+    from ingestion import assign_chunk_ids
+
+    if corpus_kind == "pdf":
+        pdf_directory = Path(directory) / "pdfs"
+        pdf_directory.mkdir()
+        for i, pages in enumerate(corpus):
+            write_pdf(pdf_directory / f"document-{i:04d}.pdf", pages)
+        report = app.ingest_directory(str(pdf_directory), workers=workers)
+        chunks, seconds = report.chunks, report.seconds
+    else:
+        start = time.perf_counter()
+        pages = [
+            Document(page_content=text, metadata={"source": f"document-{i:04d}.txt", "page": page})
+            for i, document in enumerate(corpus)
+            for page, text in enumerate(document)
+        ]
+        documents = app._text_splitter().split_documents(pages)
+        assign_chunk_ids(documents, app.fingerprint)
+        app.add_documents_to_vectorstore(documents)
+        chunks, seconds = len(documents), time.perf_counter() - start
+
+    megabytes = sum(len(page.encode()) for document in corpus for page in document) / 2**20
+    return {
+        "ingest_chunks": chunks,
+        "ingest_seconds": seconds,
+        "ingest_chunks_per_second": chunks / seconds,
+        "ingest_mb_per_second": megabytes / seconds,
+    }
+
+
+def stream_queries(app, questions):
+    """Stream every question one after the other, as the CLI does."""
+    timings = []
+    start = time.perf_counter()
+    for question in questions:
+        for event, value in app.stream_answer(question):
+            if event == "done":
+                timings.append(value)
+    seconds = time.perf_counter() - start
+    return {
+        "queries": len(timings),
+        "queries_per_second": len(timings) / seconds,
+        "cached_answers": sum(timing.cached for timing in timings),
+        **percentiles([timing.total_ms for timing in timings], "query"),
+        **percentiles([timing.retrieval_ms for timing in timings], "retrieval"),
+        **percentiles([timing.first_token_ms for timing in timings], "first_token"),
+    }
+
+
+def batch_queries(app, questions, concurrency):
+    """Answer the questions concurrently with `ask_many`."""
+    start = time.perf_counter()
+    results = asyncio.run(app.ask_many(questions, concurrency=concurrency))
+    seconds = time.perf_counter() - start
+    return {
+        "batch_queries": len(results),
+        "batch_seconds": seconds,
+        "batch_queries_per_second": len(results) / seconds,
+        "batch_errors": sum(result.error is not None for result in results),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    corpus = synthetic_corpus(args.documents, args.pages_per_document)
+    questions = synthetic_questions(corpus, args.queries)
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = RAGApplication(
+            persist_directory=str(Path(directory) / "store"),
+            vector_backend=args.vector_backend,
+            quantization=args.quantization,
+            splitter=args.splitter,
+            embedder=HashingEmbeddings(latency=args.embedding_latency),
+            chat_model=LatencyChatModel(
+                first_token_latency=args.first_token_latency,
+                token_latency=args.token_latency,
+                answer_tokens=args.answer_tokens,
+            ),
+        )
+        # The app reports progress on stdout; keep it out of the JSON output
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = ingest(app, corpus, args.corpus, directory, args.workers)
+            results.update(stream_queries(app, questions))
+            if args.batch_queries:
+                # Fresh questions, so the answer cache does not serve them
+                batch = synthetic_questions(corpus, args.batch_queries, seed=2)
+                results.update(batch_queries(app, batch, args.concurrency))
+
+    # ru_maxrss is reported in kilobytes on Linux
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results["peak_worker_rss_mb"] = (
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    )
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            name: value
+            for name, value in vars(args).items()
+            if name not in ("output", "compare", "tolerance", "json")
+        },
+        "results": results,
+        "stages": app.metrics.snapshot(),
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Return the results that got worse than `baseline` by more than `tolerance`."""
+    regressions = {}
+    for name, before in baseline["results"].items():
+        after = current["results"].get(name)
+        # Counts such as ingest_chunks describe the workload, not its speed
+        if not before or after is None or not name.endswith((*LOWER_IS_BETTER, HIGHER_IS_BETTER)):
+            continue
+        change = (after - before) / before
+        if change > tolerance if name.endswith(LOWER_IS_BETTER) else change < -tolerance:
+            regressions[name] = {"baseline": before, "current": after, "change": change}
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", choices=["pdf", "text"], default="pdf")
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--pages-per-document", type=int, default=10)
+    parser.add_argument("--workers", type=int, help="PDF parser processes")
+    parser.add_argument("--vector-backend", choices=VECTOR_BACKENDS, default="chroma")
+    parser.add_argument("--quantization", choices=VECTOR_QUANTIZATIONS)
+    parser.add_argument("--splitter", choices=SPLITTERS, default="characters")
+    parser.add_argument("--queries", type=int, default=50, help="Questions streamed one by one")
+    parser.add_argument("--batch-queries", type=int, default=0, help="Questions sent to ask_many")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="Seconds per embedding call")
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--answer-tokens", type=int, default=50)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    regressions = {}
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text()), args.tolerance)
+        report["regressions"] = regressions
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"📊 {args.documents} x {args.pages_per_document} page {args.corpus} corpus, commit {report['commit']}")
+        for name, value in report["results"].items():
+            print(f"  {name:<30} {value:12.2f}")
+        for name, change in regressions.items():
+            print(
+                f"⚠️  {name} regressed: {change['baseline']:.2f} → {change['current']:.2f} "
+                f"({change['change']:+.0%})"
+            )
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
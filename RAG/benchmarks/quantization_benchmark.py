@@ -0,0 +1,178 @@
+"""Measure recall@k and memory of the quantized mmap indexes.
+
+A synthetic corpus shaped like `text-embedding-3-small` output (1536-dim
+unit vectors grouped around topics) is stored once; exact float32 search
+gives the ground truth, then each quantization is queried with several
+re-rank factors. Every mode runs in its own subprocess so peak RSS only
+counts the pages that mode actually touched:
+
+    python benchmarks/quantization_benchmark.py --chunks 100000 --queries 200
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from mmap_store import QUANTIZATIONS, MmapVectorStore  # noqa: E402
+
+WRITE_BATCH = 5000
+QUERIES_FILE = "queries.npy"
+GROUND_TRUTH_FILE = "ground_truth.npy"
+
+
+def synthetic_corpus(chunks, dim, topics, seed=0):
+    """Unit vectors clustered around `topics` random centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dim), dtype=np.float32)
+    vectors = centres[rng.integers(0, topics, chunks)]
+    vectors += 0.8 * rng.standard_normal((chunks, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthetic_queries(corpus, queries, seed=1):
+    """Queries that paraphrase (perturb) randomly chosen chunks."""
+    rng = np.random.default_rng(seed)
+    picked = corpus[rng.integers(0, len(corpus), queries)]
+    noise = rng.standard_normal(picked.shape, dtype=np.float32)
+    noise /= np.linalg.norm(noise, axis=1, keepdims=True)
+    return picked + 0.7 * noise
+
+
+def build(directory, chunks, dim, topics, queries):
+    corpus = synthetic_corpus(chunks, dim, topics)
+    np.save(Path(directory) / QUERIES_FILE, synthetic_queries(corpus, queries))
+    store = MmapVectorStore(directory, embedding_function=None)
+    for offset in range(0, chunks, WRITE_BATCH):
+        batch = corpus[offset : offset + WRITE_BATCH]
+        rows = range(offset, offset + len(batch))
+        store.upsert([f"chunk-{i}" for i in rows], batch, [f"chunk {i}" for i in rows])
+
+    result = {}
+    for quantization in QUANTIZATIONS:
+        start = time.perf_counter()
+        MmapVectorStore(directory, embedding_function=None, quantization=quantization)
+        result[f"{quantization}_encode_seconds"] = time.perf_counter() - start
+    return result
+
+
+def query(directory, quantization, rerank_factor, k):
+    query_vectors = np.load(Path(directory) / QUERIES_FILE)
+    store = MmapVectorStore(
+        directory,
+        embedding_function=None,
+        quantization=quantization,
+        rerank_factor=rerank_factor,
+    )
+
+    latencies, rows = [], []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        found, _ = store.search_vectors(vector, k=k)
+        latencies.append(time.perf_counter() - start)
+        rows.append(found[0])
+
+    ground_truth_path = Path(directory) / GROUND_TRUTH_FILE
+    if quantization is None:
+        np.save(ground_truth_path, np.array(rows))
+        recall = 1.0
+    else:
+        truth = np.load(ground_truth_path)
+        recall = float(
+            np.mean([len(set(a) & set(b)) / k for a, b in zip(rows, truth)])
+        )
+
+    index_path = store.codes_path if quantization else store.vectors_path
+    return {
+        f"recall@{k}": recall,
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "scanned_index_mb": index_path.stat().st_size / 2**20,
+        "bytes_per_chunk": index_path.stat().st_size / store.count(),
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_phase(args, phase, directory, quantization=None, rerank_factor=1):
+    command = [
+        sys.executable,
+        __file__,
+        "--phase", phase,
+        "--directory", str(directory),
+        "--chunks", str(args.chunks),
+        "--dim", str(args.dim),
+        "--topics", str(args.topics),
+        "--queries", str(args.queries),
+        "--k", str(args.k),
+        "--rerank-factor", str(rerank_factor),
+    ]
+    if quantization:
+        command += ["--quantization", quantization]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1536, help="text-embedding-3-small size")
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factors", type=int, nargs="+", default=[1, 4, 10, 20])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--phase", choices=["build", "query"], help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, help=argparse.SUPPRESS)
+    parser.add_argument("--rerank-factor", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase == "build":
+        print(
+            json.dumps(
+                build(args.directory, args.chunks, args.dim, args.topics, args.queries)
+            )
+        )
+        return
+    if args.phase == "query":
+        print(
+            json.dumps(
+                query(args.directory, args.quantization, args.rerank_factor, args.k)
+            )
+        )
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {"build": run_phase(args, "build", directory)}
+        # Exact float32 search runs first: it writes the ground truth
+        results["float32"] = run_phase(args, "query", directory)
+        for quantization in QUANTIZATIONS:
+            for factor in args.rerank_factors:
+                results[f"{quantization} x{factor}"] = run_phase(
+                    args, "query", directory, quantization, factor
+                )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 {args.chunks} chunks x {args.dim} dims, {args.queries} queries, k={args.k}")
+    for name, value in results.pop("build").items():
+        print(f"  {name:<24} {value:10.2f}")
+    columns = list(results["float32"])
+    print("\n" + f"{'mode':<14}" + "".join(f"{column:>18}" for column in columns))
+    for mode, result in results.items():
+        print(f"{mode:<14}" + "".join(f"{result[column]:18.3f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Load test the HTTP server with many concurrent clients, fully offline.
+
+A `RAGServer` backed by the stand-in embedder and chat model is started with
+uvicorn in this process, a synthetic text corpus is ingested through
+`POST /ingest`, and `--clients` concurrent clients send questions to
+`POST /query` (or `/query/stream`). The run is repeated without query
+micro-batching (batch size 1) to show what batching the embedding calls buys:
+
+    python benchmarks/server_load_test.py --requests 400 --clients 64 --embedding-latency 0.05
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from load_test import percentiles, synthetic_corpus, synthetic_questions, write_pdf  # noqa: E402
+from stand_ins import HashingEmbeddings, LatencyChatModel  # noqa: E402
+
+from main import RAGApplication  # noqa: E402
+from server import QUERY_BATCH_SIZE, RAGServer  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def running(asgi_app):
+    """Serve an ASGI app on a free local port in a background thread."""
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+async def wait_for_job(client, job):
+    while job["status"] in ("queued", "running"):
+        await asyncio.sleep(0.05)
+        job = (await client.get(f"/jobs/{job['id']}")).json()
+    if job["status"] != "done":
+        raise RuntimeError(f"Ingestion failed: {job['error']}")
+    return job
+
+
+async def load(base_url, corpus_directory, questions, clients, stream):
+    latencies, errors = [], 0
+    pending = iter(questions)
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        timeout=120,
+        limits=httpx.Limits(max_connections=clients),
+    ) as client:
+        job = (await client.post("/ingest", json={"path": corpus_directory})).json()
+        await wait_for_job(client, job)
+
+        async def worker():
+            nonlocal errors
+            for question in pending:
+                start = time.perf_counter()
+                try:
+                    if stream:
+                        async with client.stream(
+                            "POST", "/query/stream", json={"question": question}
+                        ) as response:
+                            response.raise_for_status()
+                            async for _ in response.aiter_bytes():
+                                pass
+                    else:
+                        response = await client.post("/query", json={"question": question})
+                        response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        seconds = time.perf_counter() - start
+        health = (await client.get("/health")).json()
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / seconds,
+        **percentiles(latencies, "request"),
+        "mean_query_batch_size": health["mean_query_batch_size"],
+    }
+
+
+def run(args, batch_size):
+    corpus = synthetic_corpus(args.documents, args.pages_per_document)
+    questions = synthetic_questions(corpus, args.requests)
+
+    with tempfile.TemporaryDirectory() as directory:
+        pdf_directory = Path(directory) / "pdfs"
+        pdf_directory.mkdir()
+        for i, pages in enumerate(corpus):
+            write_pdf(pdf_directory / f"document-{i:04d}.pdf", pages)
+
+        embedder = HashingEmbeddings(latency=args.embedding_latency)
+        app = RAGApplication(
+            persist_directory=str(Path(directory) / "store"),
+            embedder=embedder,
+            chat_model=LatencyChatModel(
+                first_token_latency=args.first_token_latency,
+                token_latency=args.token_latency,
+            ),
+        )
+        server = RAGServer(app, batch_size=batch_size, ingest_workers=1)
+        # The app reports progress on stdout; keep it out of the results
+        with contextlib.redirect_stdout(io.StringIO()), running(server) as base_url:
+            embedding_calls = embedder.calls
+            result = asyncio.run(
+                load(base_url, str(pdf_directory), questions, args.clients, args.stream)
+            )
+        result["embedding_calls"] = embedder.calls - embedding_calls
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--pages-per-document", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--stream", action="store_true", help="Use POST /query/stream")
+    parser.add_argument("--batch-size", type=int, default=QUERY_BATCH_SIZE)
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="Seconds per embedding call")
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = {
+        "unbatched": run(args, batch_size=1),
+        f"batched (up to {args.batch_size})": run(args, batch_size=args.batch_size),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 {args.requests} requests from {args.clients} concurrent clients")
+    columns = list(results["unbatched"])
+    print(f"{'mode':<22}" + "".join(f"{column:>24}" for column in columns))
+    for mode, result in results.items():
+        print(f"{mode:<22}" + "".join(f"{result[column]:24.2f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
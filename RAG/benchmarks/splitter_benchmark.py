@@ -0,0 +1,134 @@
+"""Compare the character splitter with the token splitter.
+
+Pages come from PDFs given on the command line, or from a synthetic corpus
+of prose-like paragraphs. Both splitters are timed on the same pages, with
+and without the per-chunk token counting the embedding pipeline needs, and
+the size distribution of their chunks is reported in tokens:
+
+    python benchmarks/splitter_benchmark.py --pages 2000
+    python benchmarks/splitter_benchmark.py --pdf docs/manual.pdf
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.documents import Document  # noqa: E402
+
+from ingestion import make_text_splitter  # noqa: E402
+from tokens import count_tokens  # noqa: E402
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+WORDS = (
+    "the of and to in is was for on that with as by at from it an be this are "
+    "which or model vector search embedding token chunk retrieval index page "
+    "document query system latency throughput memory storage cache batch"
+).split()
+
+
+def synthetic_pages(pages, seed=0):
+    """Pages of 3-6 paragraphs made of 2-8 sentences each."""
+    rng = random.Random(seed)
+
+    def sentence():
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 24))]
+        return " ".join(words).capitalize() + "."
+
+    def paragraph():
+        return " ".join(sentence() for _ in range(rng.randint(2, 8)))
+
+    return [
+        Document(
+            page_content="\n\n".join(paragraph() for _ in range(rng.randint(3, 6))),
+            metadata={"source": "synthetic.pdf", "page": page},
+        )
+        for page in range(pages)
+    ]
+
+
+def pdf_pages(paths):
+    from langchain_community.document_loaders import PyPDFLoader
+
+    return [page for path in paths for page in PyPDFLoader(path).load()]
+
+
+def measure(name, splitter, pages, token_limit):
+    start = time.perf_counter()
+    chunks = splitter.split_documents(pages)
+    split_seconds = time.perf_counter() - start
+
+    # What batching for the embedding API costs on top of splitting
+    start = time.perf_counter()
+    for chunk in chunks:
+        chunk.metadata.get("token_count") or count_tokens(chunk.page_content, EMBEDDING_MODEL)
+    count_seconds = time.perf_counter() - start
+
+    sizes = sorted(count_tokens(chunk.page_content, EMBEDDING_MODEL) for chunk in chunks)
+    megabytes = sum(len(page.page_content.encode()) for page in pages) / 2**20
+    return {
+        "splitter": name,
+        "chunks": len(chunks),
+        "split_mb_per_second": megabytes / split_seconds,
+        "split_and_count_mb_per_second": megabytes / (split_seconds + count_seconds),
+        "pages_per_second": len(pages) / split_seconds,
+        "tokens_min": sizes[0],
+        "tokens_p50": sizes[len(sizes) // 2],
+        "tokens_p95": sizes[int(len(sizes) * 0.95)],
+        "tokens_max": sizes[-1],
+        "tokens_stdev": statistics.pstdev(sizes),
+        "over_token_limit": sum(size > token_limit for size in sizes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", nargs="+", help="PDF files to split instead of synthetic pages")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--overlap-chars", type=int, default=200)
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    pages = pdf_pages(args.pdf) if args.pdf else synthetic_pages(args.pages)
+    # Warm up the tiktoken encoding so loading it is not timed
+    count_tokens("warm up", EMBEDDING_MODEL)
+
+    results = [
+        measure(
+            f"characters ({args.chunk_chars}/{args.overlap_chars})",
+            make_text_splitter("characters", args.chunk_chars, args.overlap_chars),
+            pages,
+            args.chunk_tokens,
+        ),
+        measure(
+            f"tokens ({args.chunk_tokens}/{args.overlap_tokens})",
+            make_text_splitter(
+                "tokens", args.chunk_tokens, args.overlap_tokens, EMBEDDING_MODEL
+            ),
+            pages,
+            args.chunk_tokens,
+        ),
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    megabytes = sum(len(page.page_content.encode()) for page in pages) / 2**20
+    print(f"📊 {len(pages)} pages, {megabytes:.1f} MB of text")
+    for result in results:
+        print(f"\n{result.pop('splitter')}")
+        for name, value in result.items():
+            print(f"  {name:<30} {value:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Local stand-ins for the OpenAI embedding and chat models.
+
+Both are deterministic and never touch the network, so benchmarks and tests
+can drive `RAGApplication` end to end:
+
+    app = RAGApplication(embedder=HashingEmbeddings(), chat_model=LatencyChatModel())
+"""
+
+import asyncio
+import re
+import time
+import zlib
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings using the hashing trick.
+
+    Every word adds +1 or -1 to one of `size` dimensions chosen by its CRC32,
+    so texts sharing words get similar unit vectors and results are identical
+    across processes. `latency` seconds are slept per call to mimic an API.
+    """
+
+    def __init__(self, size=1536, latency=0.0):
+        self.size = size
+        self.latency = latency
+        self.model = f"local-hashing-{size}"
+        self.calls = 0
+        self.texts = 0
+        self._buckets = {}
+
+    def _bucket(self, word):
+        bucket = self._buckets.get(word)
+        if bucket is None:
+            digest = zlib.crc32(word.encode("utf-8"))
+            bucket = self._buckets[word] = (digest % self.size, 1.0 if digest & 1 << 31 else -1.0)
+        return bucket
+
+    def _embed(self, text):
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in _WORD_PATTERN.findall(text.lower()):
+            index, sign = self._bucket(word)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class LatencyChatModel(BaseChatModel):
+    """Chat model that answers after a configurable, realistic delay.
+
+    The answer is the first `answer_tokens` words of the last message, so it
+    is deterministic; the first token arrives after `first_token_latency`
+    seconds and each further token after `token_latency` seconds, whether
+    the model is invoked, streamed, sync or async.
+    """
+
+    first_token_latency: float = 0.3
+    token_latency: float = 0.01
+    answer_tokens: int = 50
+
+    @property
+    def _llm_type(self):
+        return "latency-stand-in"
+
+    def _answer_words(self, messages):
+        words = str(messages[-1].content).split()[: self.answer_tokens]
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)] or ["..."]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        words = self._answer_words(messages)
+        time.sleep(self.first_token_latency + self.token_latency * (len(words) - 1))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(words)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        words = self._answer_words(messages)
+        await asyncio.sleep(self.first_token_latency + self.token_latency * (len(words) - 1))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(words)))])
+
+    def _stream(self, messages, stop=None, run_manager: Optional[Any] = None, **kwargs: Any):
+        for i, word in enumerate(self._answer_words(messages)):
+            time.sleep(self.first_token_latency if i == 0 else self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+    async def _astream(self, messages, stop=None, run_manager: Optional[Any] = None, **kwargs: Any):
+        for i, word in enumerate(self._answer_words(messages)):
+            await asyncio.sleep(self.first_token_latency if i == 0 else self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
@@ -0,0 +1,104 @@
+"""Measure how long the RAG app takes to start and report on its store.
+
+Each run happens in a fresh subprocess, so module imports are paid again
+every time, like a real CLI start:
+
+    python benchmarks/startup_benchmark.py --runs 5 --persist-directory ./chroma_db
+
+`--eager` also opens the vectorstore and creates the OpenAI clients during
+start-up, which is how the app behaved before construction became lazy.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAG_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure(persist_directory, vector_backend, eager):
+    start = time.perf_counter()
+    sys.path.append(str(RAG_DIR))
+    from main import RAGApplication
+
+    imported = time.perf_counter()
+    app = RAGApplication(persist_directory=persist_directory, vector_backend=vector_backend)
+    if eager:
+        app.vectorstore, app.llm, app.embeddings
+    constructed = time.perf_counter()
+    info = app.get_vectorstore_info()
+    done = time.perf_counter()
+
+    return {
+        "import_ms": (imported - start) * 1000,
+        "construct_ms": (constructed - imported) * 1000,
+        "info_ms": (done - constructed) * 1000,
+        "total_ms": (done - start) * 1000,
+        "info": info,
+    }
+
+
+def run_once(args, eager):
+    command = [
+        sys.executable,
+        __file__,
+        "--measure",
+        "--persist-directory", args.persist_directory,
+        "--vector-backend", args.vector_backend,
+    ]
+    if eager:
+        command.append("--eager")
+    # The OpenAI clients refuse to construct without a key; no request is sent
+    env = {"OPENAI_API_KEY": "startup-benchmark", **os.environ}
+    output = subprocess.run(
+        command, check=True, capture_output=True, text=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--persist-directory", help="Existing store to open (default: a new empty one)"
+    )
+    parser.add_argument("--vector-backend", choices=["chroma", "mmap"], default="chroma")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.persist_directory, args.vector_backend, args.eager)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        args.persist_directory = args.persist_directory or directory
+        results = {}
+        for mode, eager in (("lazy", False), ("eager", True)):
+            runs = [run_once(args, eager) for _ in range(args.runs)]
+            results[mode] = {
+                name: statistics.median(run[name] for run in runs)
+                for name in ("import_ms", "construct_ms", "info_ms", "total_ms")
+            }
+            results[mode]["info"] = runs[-1]["info"]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"🚀 Median of {args.runs} cold starts ({args.vector_backend} backend)")
+    for mode, result in results.items():
+        print(f"\n{mode}: {result['info']}")
+        for name in ("import_ms", "construct_ms", "info_ms", "total_ms"):
+            print(f"  {name:<14} {result[name]:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
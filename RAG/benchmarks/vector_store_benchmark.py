@@ -0,0 +1,153 @@
+"""Compare the Chroma and mmap vector backends on a synthetic corpus.
+
+Each backend is built and queried in its own subprocess so peak memory and
+cold-start time are measured independently:
+
+    python benchmarks/vector_store_benchmark.py --chunks 100000 --queries 200
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from mmap_store import MmapVectorStore  # noqa: E402
+
+# Chroma rejects upserts larger than its max batch size
+WRITE_BATCH = 5000
+
+
+def synthetic_vectors(count, dim, seed):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def open_store(backend, directory):
+    if backend == "mmap":
+        return MmapVectorStore(Path(directory) / "mmap_store", embedding_function=None)
+
+    from langchain_chroma import Chroma
+
+    return Chroma(persist_directory=str(directory), embedding_function=None)
+
+
+def collection(store):
+    return getattr(store, "_collection", store)
+
+
+def build(backend, directory, chunks, dim):
+    vectors = synthetic_vectors(chunks, dim, seed=0)
+    store = open_store(backend, directory)
+    start = time.perf_counter()
+    for offset in range(0, chunks, WRITE_BATCH):
+        batch = vectors[offset : offset + WRITE_BATCH]
+        rows = range(offset, offset + len(batch))
+        collection(store).upsert(
+            ids=[f"chunk-{i}" for i in rows],
+            embeddings=batch.tolist() if backend == "chroma" else batch,
+            documents=[f"synthetic chunk {i}" for i in rows],
+            metadatas=[{"source": "synthetic.pdf", "page": i // 4} for i in rows],
+        )
+    return {"build_seconds": time.perf_counter() - start}
+
+
+def query(backend, directory, queries, dim, k):
+    query_vectors = synthetic_vectors(queries, dim, seed=1)
+
+    start = time.perf_counter()
+    store = open_store(backend, directory)
+    store.similarity_search_by_vector(query_vectors[0].tolist(), k=k)
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        store.similarity_search_by_vector(vector.tolist(), k=k)
+        latencies.append(time.perf_counter() - start)
+
+    result = {
+        "cold_start_ms": cold_start * 1000,
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }
+
+    if backend == "mmap":
+        start = time.perf_counter()
+        store.search_vectors(query_vectors, k=k)
+        result["batched_query_ms"] = (time.perf_counter() - start) * 1000 / queries
+
+    # ru_maxrss is reported in kilobytes on Linux
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def run_phase(args, phase, backend, directory):
+    output = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--phase", phase,
+            "--backend", backend,
+            "--directory", str(directory),
+            "--chunks", str(args.chunks),
+            "--dim", str(args.dim),
+            "--queries", str(args.queries),
+            "--k", str(args.k),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "mmap"])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--phase", choices=["build", "query"], help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase == "build":
+        print(json.dumps(build(args.backend, args.directory, args.chunks, args.dim)))
+        return
+    if args.phase == "query":
+        print(json.dumps(query(args.backend, args.directory, args.queries, args.dim, args.k)))
+        return
+
+    results = {}
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as directory:
+            results[backend] = {
+                **run_phase(args, "build", backend, directory),
+                **run_phase(args, "query", backend, directory),
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 {args.chunks} chunks x {args.dim} dims, {args.queries} queries, k={args.k}")
+    for backend, result in results.items():
+        print(f"\n{backend}")
+        for name, value in result.items():
+            print(f"  {name:<18} {value:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import re
+import threading
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+from tokens import count_tokens, get_encoding
+
+# Shortest shared prefix/suffix treated as splitter overlap rather than chance
+MIN_OVERLAP_CHARS = 20
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _overlap(first, second):
+    """Length of the longest suffix of `first` that is a prefix of `second`."""
+    probe = second[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+
+    start = first.find(probe)
+    while start != -1:
+        tail = first[start:]
+        if second.startswith(tail):
+            return len(tail)
+        start = first.find(probe, start + 1)
+    return 0
+
+
+def _merge_texts(first, second):
+    """Merge two chunk texts if one contains or overlaps the other."""
+    if second in first:
+        return first
+    if first in second:
+        return second
+
+    overlap = _overlap(first, second)
+    if overlap:
+        return first + second[overlap:]
+    overlap = _overlap(second, first)
+    if overlap:
+        return second + first[overlap:]
+    return None
+
+
+def merge_overlapping(documents):
+    """Merge overlapping or nested chunks that come from the same source page.
+
+    A merged chunk takes the position and metadata of its best-ranked part.
+    """
+    merged = []
+    for doc in documents:
+        key = (doc.metadata.get("source"), doc.metadata.get("page"))
+        merged.append([key, doc.page_content, doc])
+
+        # Fold the newest entry into an earlier one; a grown chunk may in turn
+        # bridge other entries, so repeat until nothing changes
+        changed = True
+        while changed:
+            changed = False
+            for i in range(len(merged)):
+                for j in range(i + 1, len(merged)):
+                    if merged[i][0] != merged[j][0]:
+                        continue
+                    combined = _merge_texts(merged[i][1], merged[j][1])
+                    if combined is not None:
+                        merged[i][1] = combined
+                        del merged[j]
+                        changed = True
+                        break
+                if changed:
+                    break
+
+    return [
+        Document(id=doc.id, page_content=text, metadata=doc.metadata)
+        for _, text, doc in merged
+    ]
+
+
+def _shingles(text, size=3):
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def remove_near_duplicates(documents, threshold=0.9):
+    """Drop documents whose word shingles mostly repeat a better-ranked one."""
+    kept, kept_shingles = [], []
+    for doc in documents:
+        shingles = _shingles(doc.page_content)
+        if any(
+            len(shingles & other) / max(1, len(shingles | other)) >= threshold
+            for other in kept_shingles
+        ):
+            continue
+        kept.append(doc)
+        kept_shingles.append(shingles)
+    return kept
+
+
+@dataclass
+class PackedContext:
+    """Documents that fit the prompt budget, with before/after token counts."""
+
+    documents: list = field(default_factory=list)
+    tokens_before: int = 0
+    tokens_after: int = 0
+    chunks_before: int = 0
+
+
+class ContextPacker:
+    """Assemble retrieved chunks into a compact, token-budgeted context.
+
+    Overlapping chunks from the same page are merged, near-duplicates are
+    removed and the remaining chunks are added in rank order until
+    `token_budget` (counted with tiktoken for `model`) is used up; the last
+    chunk is truncated if at least `min_tokens` of it still fit.
+    """
+
+    def __init__(
+        self, token_budget=3000, model="gpt-4o", duplicate_threshold=0.9, min_tokens=50
+    ):
+        self.token_budget = token_budget
+        self.model = model
+        self.duplicate_threshold = duplicate_threshold
+        self.min_tokens = min_tokens
+        # Totals over all packed queries; each query's own counts are in the
+        # `PackedContext` that `pack` returns
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self._lock = threading.Lock()
+
+    def pack(self, documents):
+        """Return a `PackedContext` for the retrieved documents."""
+        packed = PackedContext(
+            tokens_before=sum(count_tokens(doc.page_content, self.model) for doc in documents),
+            chunks_before=len(documents),
+        )
+
+        candidates = remove_near_duplicates(
+            merge_overlapping(documents), self.duplicate_threshold
+        )
+        encoding = get_encoding(self.model)
+        remaining = self.token_budget
+        for doc in candidates:
+            tokens = encoding.encode_ordinary(doc.page_content)
+            if len(tokens) <= remaining:
+                packed.documents.append(doc)
+                remaining -= len(tokens)
+            elif remaining >= self.min_tokens:
+                truncated = encoding.decode(tokens[:remaining])
+                packed.documents.append(
+                    Document(id=doc.id, page_content=truncated, metadata=doc.metadata)
+                )
+                remaining = 0
+            if remaining < self.min_tokens:
+                break
+
+        packed.tokens_after = self.token_budget - remaining
+        with self._lock:
+            self.tokens_before += packed.tokens_before
+            self.tokens_after += packed.tokens_after
+        return packed
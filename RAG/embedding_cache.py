@@ -0,0 +1,170 @@
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ingestion import content_hash
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+# Cache hits whose new `last_used` is written in one transaction
+_TOUCH_BATCH = 1000
+
+
+class CachedEmbeddings(Embeddings):
+    """Persistent, size-bounded cache in front of another embedding model.
+
+    Vectors are stored as float32 blobs in a local SQLite file, keyed by the
+    model name plus a hash of the text. The least recently used entries are
+    evicted once `max_entries` is exceeded. Recency updates of cache hits are
+    written in batches, together with the next insert.
+    """
+
+    def __init__(self, embeddings, cache_path, model_name, max_entries=200_000):
+        self.embeddings = embeddings
+        self.cache_path = str(cache_path)
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # key -> time of its last hit, not yet written
+        self._touched = {}
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _key(self, text):
+        return f"{self.model_name}:{content_hash(text)}"
+
+    def _lookup(self, keys):
+        """Fetch cached vectors for the given keys and refresh their recency."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start : start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                found.update(
+                    (key, np.frombuffer(blob, dtype=np.float32).tolist())
+                    for key, blob in rows
+                )
+            self._touched.update((key, now) for key in found)
+            if len(self._touched) >= _TOUCH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+        return found
+
+    def _flush_touched(self):
+        """Write pending recency updates; call with the lock held, then commit."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched = {}
+
+    def _store(self, items):
+        """Insert new vectors and evict the least recently used overflow."""
+        now = time.time()
+        with self._lock:
+            # Up-to-date recency first, so eviction picks the right entries
+            self._flush_touched()
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in items
+                ],
+            )
+            self._size += self._conn.total_changes - before
+
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    """DELETE FROM embeddings WHERE key IN (
+                        SELECT key FROM embeddings ORDER BY last_used LIMIT ?
+                    )""",
+                    (overflow,),
+                )
+                self._size -= overflow
+            self._conn.commit()
+
+    def embed_documents(self, texts):
+        """Embed texts, only calling the wrapped model for cache misses."""
+        keys = [self._key(text) for text in texts]
+        cached = self._lookup(list(dict.fromkeys(keys)))
+
+        missing = {}
+        miss_count = 0
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+                miss_count += 1
+
+        with self._lock:
+            self.hits += len(texts) - miss_count
+            self.misses += miss_count
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self._store(fresh.items())
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text):
+        """Embed a query, returning the cached vector for repeated questions."""
+        key = self._key(text)
+        cached = self._lookup([key])
+        with self._lock:
+            if key in cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if key in cached:
+            return cached[key]
+
+        vector = self.embeddings.embed_query(text)
+        self._store([(key, vector)])
+        return vector
+
+    def stats(self):
+        """Return hit/miss counters and the current cache size."""
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, self._size
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": size,
+            "max_entries": self.max_entries,
+        }
+
+    def close(self):
+        """Write pending recency updates and close the SQLite connection."""
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
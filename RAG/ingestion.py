@@ -0,0 +1,312 @@
+import hashlib
+import json
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from metrics import EventLog, NullMetrics
+from tokens import count_tokens
+
+
+def ingestion_fingerprint(chunk_size, chunk_overlap, embedding_model, splitter="characters"):
+    """Hash the settings that decide how a chunk is split and embedded."""
+    settings = {
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "embedding_model": embedding_model,
+    }
+    # Left out for the default splitter so existing chunk IDs stay valid
+    if splitter != "characters":
+        settings["splitter"] = splitter
+    settings = json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16]
+
+
+def content_hash(text):
+    """Return a stable hash of a piece of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def assign_chunk_ids(chunks, fingerprint):
+    """Give every chunk a deterministic ID derived from its content.
+
+    The ID covers the ingestion fingerprint, the source, the page and the chunk
+    text, so an unchanged chunk keeps its ID across reloads while any edit (or a
+    change to the splitter settings / embedding model) produces a new one.
+    """
+    seen = {}
+    for chunk in chunks:
+        source = str(chunk.metadata.get("source", ""))
+        page = str(chunk.metadata.get("page", ""))
+        text_hash = content_hash(chunk.page_content)
+        digest = content_hash("\x1f".join([fingerprint, source, page, text_hash]))
+
+        # Identical chunks on the same page still need distinct IDs
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+
+        chunk.metadata["content_hash"] = text_hash
+        chunk.metadata["chunk_id"] = (
+            digest if occurrence == 0 else f"{digest}-{occurrence}"
+        )
+
+    return [chunk.metadata["chunk_id"] for chunk in chunks]
+
+
+def collection_of(vectorstore):
+    """Return the object exposing the Chroma collection API (upsert/get/count).
+
+    That is the underlying collection for Chroma and the store itself for
+    `MmapVectorStore`, which mirrors the same methods.
+    """
+    return getattr(vectorstore, "_collection", vectorstore)
+
+
+def group_by_source(chunks):
+    """Group chunks by their source, keeping the original order."""
+    groups = {}
+    for chunk in chunks:
+        groups.setdefault(chunk.metadata.get("source", "Unknown"), []).append(chunk)
+    return groups
+
+
+def plan_sync(chunks, existing_ids):
+    """Work out which chunks of one source to embed and which IDs to delete."""
+    existing_ids = set(existing_ids)
+    current_ids = {chunk.metadata["chunk_id"] for chunk in chunks}
+
+    to_add = [chunk for chunk in chunks if chunk.metadata["chunk_id"] not in existing_ids]
+    to_delete = sorted(existing_ids - current_ids)
+    unchanged = len(current_ids & existing_ids)
+
+    return to_add, to_delete, unchanged
+
+
+# Ways `make_text_splitter` can chunk text: by characters or by tiktoken tokens
+SPLITTERS = ("characters", "tokens")
+
+# OpenAI accepts up to 2048 inputs / 300k tokens per embedding request; stay
+# well below both so a single retry never resends a huge payload
+DEFAULT_BATCH_TOKENS = 50_000
+DEFAULT_BATCH_SIZE = 256
+
+
+def batch_by_tokens(documents, max_tokens=DEFAULT_BATCH_TOKENS, max_size=DEFAULT_BATCH_SIZE):
+    """Lazily pack documents into batches bounded by token count and size.
+
+    Yields `(batch, token_count)` pairs.
+    """
+    batch, batch_tokens = [], 0
+    for doc in documents:
+        # Chunks from the token splitter already know their size
+        tokens = doc.metadata.get("token_count") or count_tokens(doc.page_content)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_size):
+            yield batch, batch_tokens
+            batch, batch_tokens = [], 0
+        batch.append(doc)
+        batch_tokens += tokens
+    if batch:
+        yield batch, batch_tokens
+
+
+@dataclass
+class IngestionReport:
+    """Summary of one embedding pipeline run."""
+
+    chunks: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    failed_chunks: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def chunks_per_second(self):
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+
+class EmbeddingPipeline:
+    """Embed token-packed batches concurrently and upsert them into Chroma.
+
+    Batches are embedded by a bounded worker pool while finished batches are
+    written to the vectorstore, so embedding and storage overlap. A failing
+    batch is retried with exponential backoff and, if it keeps failing, is
+    reported instead of aborting the whole upload. `on_stored(ids, batch)` is
+    called after each batch is written, e.g. to keep a keyword index in sync.
+    The `embed`, `upsert` and `keyword_index` stages are timed in `metrics`.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        max_batch_tokens=DEFAULT_BATCH_TOKENS,
+        max_batch_size=DEFAULT_BATCH_SIZE,
+        workers=4,
+        max_retries=3,
+        backoff=1.0,
+        on_stored=None,
+        metrics=None,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.on_stored = on_stored
+        self.metrics = metrics or NullMetrics()
+
+    def _embed_with_retry(self, batch, tokens):
+        """Embed one batch, retrying with exponential backoff."""
+        texts = [doc.page_content for doc in batch]
+        with self.metrics.stage(
+            "embed",
+            chunks=len(batch),
+            tokens=tokens,
+            bytes=sum(len(text.encode()) for text in texts),
+        ) as counts:
+            for attempt in range(self.max_retries + 1):
+                counts["retries"] = attempt
+                try:
+                    return self.embeddings.embed_documents(texts), attempt
+                except Exception:
+                    if attempt == self.max_retries:
+                        raise
+                    time.sleep(self.backoff * 2**attempt)
+
+    def _upsert(self, vectorstore, batch, vectors):
+        """Write a batch with precomputed vectors straight to the collection."""
+        ids = [doc.metadata.get("chunk_id") or str(uuid.uuid4()) for doc in batch]
+        with self.metrics.stage("upsert", chunks=len(batch)):
+            collection_of(vectorstore).upsert(
+                ids=ids,
+                embeddings=vectors,
+                documents=[doc.page_content for doc in batch],
+                metadatas=[doc.metadata or None for doc in batch],
+            )
+        return ids
+
+    def run(self, vectorstore, documents):
+        """Embed and store documents, returning an `IngestionReport`."""
+        report = IngestionReport()
+        start = time.perf_counter()
+        # Keep a couple of batches queued per worker so memory stays bounded
+        max_in_flight = self.workers * 2
+
+        def collect(future, batch):
+            try:
+                vectors, retries = future.result()
+                ids = self._upsert(vectorstore, batch, vectors)
+                if self.on_stored is not None:
+                    with self.metrics.stage("keyword_index", chunks=len(batch)):
+                        self.on_stored(ids, batch)
+                report.chunks += len(batch)
+                report.retries += retries
+            except Exception as e:
+                report.failed_batches += 1
+                report.failed_chunks += len(batch)
+                report.errors.append(str(e))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = {}
+            for batch, tokens in batch_by_tokens(
+                documents, self.max_batch_tokens, self.max_batch_size
+            ):
+                report.batches += 1
+                in_flight[executor.submit(self._embed_with_retry, batch, tokens)] = batch
+
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future, in_flight.pop(future))
+
+            for future in as_completed(list(in_flight)):
+                collect(future, in_flight.pop(future))
+
+        report.seconds = time.perf_counter() - start
+        return report
+
+
+def make_text_splitter(splitter, chunk_size, chunk_overlap, model="text-embedding-3-small"):
+    """Create a splitter measuring chunks in characters or in `model` tokens."""
+    if splitter not in SPLITTERS:
+        raise ValueError(f"Unknown splitter {splitter!r}, choose one of {SPLITTERS}")
+    if splitter == "tokens":
+        from token_splitter import TiktokenSplitter
+
+        return TiktokenSplitter(chunk_size, chunk_overlap, model)
+
+    # Imported here so the app can start without loading the splitter stack
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+    )
+
+
+def split_pdf(
+    pdf_path, chunk_size, chunk_overlap, fingerprint, metrics=None, splitter="characters"
+):
+    """Parse and split one PDF into content-hashed chunks.
+
+    Kept at module level (and free of any client objects) so it can run in a
+    worker process. The `parse` and `split` stages are timed in `metrics`.
+    """
+    from langchain_community.document_loaders import PyPDFLoader
+
+    metrics = metrics or NullMetrics()
+    text_splitter = make_text_splitter(splitter, chunk_size, chunk_overlap)
+    with metrics.stage("parse", files=1) as counts:
+        pages = PyPDFLoader(pdf_path).load()
+        counts["pages"] = len(pages)
+        counts["bytes"] = sum(len(page.page_content.encode()) for page in pages)
+    with metrics.stage("split") as counts:
+        chunks = text_splitter.split_documents(pages)
+        assign_chunk_ids(chunks, fingerprint)
+        counts["chunks"] = len(chunks)
+    return chunks
+
+
+def split_pdf_recorded(pdf_path, chunk_size, chunk_overlap, fingerprint, splitter="characters"):
+    """Run `split_pdf` in a worker process, returning `(chunks, events)` so
+    the parent can replay the stage timings into its own metrics."""
+    log = EventLog()
+    chunks = split_pdf(pdf_path, chunk_size, chunk_overlap, fingerprint, log, splitter)
+    return chunks, log.events
+
+
+def find_pdfs(directory, recursive=True):
+    """Return the PDF files in a directory, sorted by path."""
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        str(path)
+        for path in Path(directory).glob(pattern)
+        if path.is_file() and path.suffix.lower() == ".pdf"
+    )
+
+
+@dataclass
+class DirectoryIngestionReport:
+    """Summary of a directory ingestion run."""
+
+    files: int = 0
+    # Unchanged files that were not parsed again
+    skipped: int = 0
+    succeeded: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    seconds: float = 0.0
+    failures: dict = field(default_factory=dict)
+
+    @property
+    def files_per_second(self):
+        return self.succeeded / self.seconds if self.seconds else 0.0
+
+    @property
+    def chunks_per_second(self):
+        return self.chunks / self.seconds if self.seconds else 0.0
@@ -0,0 +1,249 @@
+import json
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from metrics import NullMetrics
+
+# Keep codes such as "ERR-404", "v2.1" or "part_no_17" together as one term
+_TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+_LOOKUP_BATCH = 500
+
+
+def tokenize(text):
+    """Lowercase terms of a text, plus the parts of compound terms."""
+    terms = []
+    for match in _TOKEN_PATTERN.findall(text.lower()):
+        terms.append(match)
+        parts = re.split(r"[-./]", match)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part)
+    return terms
+
+
+class BM25Index:
+    """Incremental BM25 inverted index stored in a local SQLite file.
+
+    Postings are kept on disk and updated chunk by chunk, so the index grows
+    alongside ChromaDB without ever being rebuilt from scratch.
+    """
+
+    def __init__(self, index_path, k1=1.5, b=0.75):
+        self.index_path = str(index_path)
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                id TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                doc_length INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+            """
+        )
+        self._conn.commit()
+        self._doc_count, total_length = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs"
+        ).fetchone()
+        self._total_length = total_length
+
+    def __len__(self):
+        return self._doc_count
+
+    def _delete_locked(self, ids):
+        for start in range(0, len(ids), _LOOKUP_BATCH):
+            batch = ids[start : start + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs WHERE id IN ({placeholders})",
+                batch,
+            ).fetchone()
+            self._doc_count -= rows[0]
+            self._total_length -= rows[1]
+            self._conn.execute(f"DELETE FROM docs WHERE id IN ({placeholders})", batch)
+            self._conn.execute(
+                f"DELETE FROM postings WHERE doc_id IN ({placeholders})", batch
+            )
+
+    def add(self, ids, documents):
+        """Index (or re-index) documents under the given IDs."""
+        with self._lock:
+            self._delete_locked(list(ids))
+
+            for doc_id, doc in zip(ids, documents):
+                counts = Counter(tokenize(doc.page_content))
+                length = sum(counts.values())
+                self._conn.execute(
+                    "INSERT INTO docs (id, text, metadata, length) VALUES (?, ?, ?, ?)",
+                    (doc_id, doc.page_content, json.dumps(doc.metadata), length),
+                )
+                self._conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf, doc_length) VALUES (?, ?, ?, ?)",
+                    [(term, doc_id, tf, length) for term, tf in counts.items()],
+                )
+                self._doc_count += 1
+                self._total_length += length
+
+            self._conn.commit()
+
+    def delete(self, ids):
+        """Remove documents from the index."""
+        with self._lock:
+            self._delete_locked(list(ids))
+            self._conn.commit()
+
+    def sources(self):
+        """Return the distinct `source` of the indexed documents."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT json_extract(metadata, '$.source') FROM docs"
+            ).fetchall()
+        return {source for source, in rows if source is not None}
+
+    def search(self, query, k=10):
+        """Return the top-k documents for a query as (Document, score) pairs."""
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._doc_count:
+                return []
+
+            avg_length = self._total_length / self._doc_count
+            scores = Counter()
+            for term in terms:
+                postings = self._conn.execute(
+                    "SELECT doc_id, tf, doc_length FROM postings WHERE term = ?", (term,)
+                ).fetchall()
+                if not postings:
+                    continue
+
+                df = len(postings)
+                idf = math.log(1 + (self._doc_count - df + 0.5) / (df + 0.5))
+                for doc_id, tf, length in postings:
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = scores.most_common(k)
+            if not top:
+                return []
+
+            placeholders = ",".join("?" * len(top))
+            rows = self._conn.execute(
+                f"SELECT id, text, metadata FROM docs WHERE id IN ({placeholders})",
+                [doc_id for doc_id, _ in top],
+            ).fetchall()
+
+        by_id = {
+            doc_id: Document(id=doc_id, page_content=text, metadata=json.loads(metadata))
+            for doc_id, text, metadata in rows
+        }
+        return [(by_id[doc_id], score) for doc_id, score in top if doc_id in by_id]
+
+    def close(self):
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse several ranked document lists with reciprocal rank fusion."""
+    scores = Counter()
+    documents = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = doc.id or doc.metadata.get("chunk_id") or doc.page_content
+            scores[key] += 1 / (k + rank + 1)
+            documents.setdefault(key, doc)
+    return [documents[key] for key, _ in scores.most_common()]
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever fusing ChromaDB similarity search with BM25 keyword search.
+
+    Both searches fetch `fetch_k` candidates and the fused top `k` is returned,
+    so exact terms (part numbers, error codes) are found without a large `k`.
+    When a `packer` is set, the fused chunks are merged, de-duplicated and
+    trimmed to its token budget before they reach the LLM. Searches are
+    timed as the `retrieval` stage of `metrics`, if given.
+    """
+
+    vectorstore: Any
+    keyword_index: Any
+    packer: Any = None
+    metrics: Any = None
+    k: int = 3
+    fetch_k: int = 10
+    rrf_k: int = 60
+
+    def _fuse(self, query, vector_docs, counts):
+        """The fused documents for `query` and their `PackedContext` (None
+        without a packer)."""
+        keyword_docs = [doc for doc, _ in self.keyword_index.search(query, k=self.fetch_k)]
+        fused = reciprocal_rank_fusion([vector_docs, keyword_docs], k=self.rrf_k)
+        if self.packer is None:
+            documents, packed = fused[: self.k], None
+        else:
+            packed = self.packer.pack(fused[: self.k])
+            counts["tokens"] = counts.get("tokens", 0) + packed.tokens_after
+            documents = packed.documents
+        counts["chunks"] = counts.get("chunks", 0) + len(documents)
+        return documents, packed
+
+    def _timed(self, queries):
+        return (self.metrics or NullMetrics()).stage("retrieval", queries=queries)
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return self.retrieve(query)[0]
+
+    def retrieve(self, query):
+        """Like `invoke`, but returns `(documents, packed)`: the packing stats
+        of this query, whatever other queries run at the same time."""
+        with self._timed(1) as counts:
+            return self._fuse(
+                query, self.vectorstore.similarity_search(query, k=self.fetch_k), counts
+            )
+
+    def retrieve_many(self, queries, query_vectors):
+        """Retrieve for many queries whose embeddings are already computed.
+
+        Stores that can search a whole batch of vectors at once (such as
+        `MmapVectorStore`) do so in a single call.
+        """
+        with self._timed(len(queries)) as counts:
+            return self._retrieve_many(queries, query_vectors, counts)
+
+    def _retrieve_many(self, queries, query_vectors, counts):
+        if hasattr(self.vectorstore, "similarity_search_by_vector_batch"):
+            vector_results = [
+                [doc for doc, _ in results]
+                for results in self.vectorstore.similarity_search_by_vector_batch(
+                    query_vectors, k=self.fetch_k
+                )
+            ]
+        else:
+            vector_results = [
+                self.vectorstore.similarity_search_by_vector(vector, k=self.fetch_k)
+                for vector in query_vectors
+            ]
+        return [
+            self._fuse(query, vector_docs, counts)[0]
+            for query, vector_docs in zip(queries, vector_results)
+        ]
@@ -1,99 +1,711 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
 import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import closing
+from dataclasses import dataclass, field
+from functools import cached_property
+from itertools import islice
 from pathlib import Path
 from dotenv import load_dotenv
-from langchain.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain.chains import RetrievalQA
-from langchain_openai import OpenAIEmbeddings
-from langchain_openai import ChatOpenAI
+
+# LangChain, Chroma, OpenAI and NumPy backed modules are imported where they
+# are first used, so starting the app (or just checking the store) stays fast
+from ingestion import (
+    SPLITTERS,
+    DirectoryIngestionReport,
+    collection_of,
+    find_pdfs,
+    group_by_source,
+    ingestion_fingerprint,
+    make_text_splitter,
+    plan_sync,
+    split_pdf,
+    split_pdf_recorded,
+)
+from metrics import PipelineMetrics
+from rate_limit import AsyncRateLimiter
+from tokens import count_tokens
 
 load_dotenv()
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+LLM_MODEL = "gpt-4o"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+# Chunk size with the token splitter, in embedding-model tokens
+CHUNK_TOKENS = 256
+CHUNK_OVERLAP_TOKENS = 50
+EMBEDDING_CACHE_FILE = "embedding_cache.sqlite3"
+STREAMING_BATCH_SIZE = 32
+ANSWER_CACHE_THRESHOLD = 0.95
+ANSWER_CACHE_TTL = 60 * 60
+KEYWORD_INDEX_FILE = "bm25_index.sqlite3"
+# Modification time and size of each ingested PDF, to skip unchanged files
+FILE_STATE_FILE = "ingested_files.json"
+RETRIEVER_K = 3
+RETRIEVER_FETCH_K = 10
+CONTEXT_TOKEN_BUDGET = 3000
+VECTOR_BACKENDS = ("chroma", "mmap")
+# Compressed indexes of the mmap backend (see mmap_store.QUANTIZATIONS)
+VECTOR_QUANTIZATIONS = ("int8", "binary")
+RERANK_FACTOR = 20
+MMAP_STORE_DIR = "mmap_store"
+CHROMA_COLLECTION = "langchain"
+CHROMA_COUNT_QUERY = """
+    SELECT COUNT(*) FROM embeddings e
+    JOIN segments s ON e.segment_id = s.id
+    JOIN collections c ON s.collection = c.id
+    WHERE c.name = ? AND s.scope = 'METADATA'
+"""
+QUERY_TIMING_HISTORY = 1000
+
+
+@dataclass
+class QueryTiming:
+    """Latency breakdown of one streamed question, in milliseconds."""
+
+    question: str
+    retrieval_ms: float = 0.0
+    first_token_ms: float = 0.0
+    total_ms: float = 0.0
+    context_tokens_before: int = 0
+    context_tokens_after: int = 0
+    cached: bool = False
+
+
+@dataclass
+class BatchAnswer:
+    """Result of one question answered by `ask_many`."""
+
+    question: str
+    answer: str = None
+    source_documents: list = field(default_factory=list)
+    cached: bool = False
+    error: str = None
+
+
+class _shared_property(cached_property):
+    """`cached_property` built under the instance's `_open_lock`, so threads
+    sharing the application (server, watcher) never build two copies."""
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        with instance._open_lock:
+            return super().__get__(instance, owner)
+
 
 class RAGApplication:
-    def __init__(self, persist_directory="./chroma_db"):
-        """Initialize the RAG application with ChromaDB storage."""
+    def __init__(
+        self,
+        persist_directory="./chroma_db",
+        vector_backend="chroma",
+        quantization=None,
+        metrics=None,
+        splitter="characters",
+        embedder=None,
+        chat_model=None,
+        answer_cache_threshold=ANSWER_CACHE_THRESHOLD,
+        answer_cache_ttl=ANSWER_CACHE_TTL,
+    ):
+        """Initialize the RAG application with ChromaDB storage.
+
+        `vector_backend="mmap"` swaps ChromaDB for the exact-search
+        `MmapVectorStore` kept in the same persist directory, and
+        `quantization="int8"` or `"binary"` makes it search compressed codes
+        and re-rank the best candidates with the full-precision vectors.
+        Stage timings and counters go to `metrics` (a `PipelineMetrics`).
+        `splitter="tokens"` sizes chunks in embedding-model tokens instead of
+        characters. `embedder` and `chat_model` replace `OpenAIEmbeddings`
+        and `ChatOpenAI`, e.g. with local stand-ins for benchmarks. A question
+        is answered from the semantic cache when it is at least
+        `answer_cache_threshold` similar to one answered in the last
+        `answer_cache_ttl` seconds.
+        """
+        if vector_backend not in VECTOR_BACKENDS:
+            raise ValueError(
+                f"Unknown vector backend {vector_backend!r}, choose one of {VECTOR_BACKENDS}"
+            )
+        if quantization is not None:
+            if quantization not in VECTOR_QUANTIZATIONS:
+                raise ValueError(
+                    f"Unknown quantization {quantization!r}, choose one of {VECTOR_QUANTIZATIONS}"
+                )
+            if vector_backend != "mmap":
+                raise ValueError("Quantization is only supported by the mmap backend")
+        if splitter not in SPLITTERS:
+            raise ValueError(f"Unknown splitter {splitter!r}, choose one of {SPLITTERS}")
         self.persist_directory = persist_directory
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small", openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.llm = ChatOpenAI(
-            model="gpt-4o", openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.vectorstore = None
-        self.qa_chain = None
+        self.vector_backend = vector_backend
+        self.quantization = quantization
+        self.metrics = metrics or PipelineMetrics()
+        self.splitter = splitter
+        self.answer_cache_threshold = answer_cache_threshold
+        self.answer_cache_ttl = answer_cache_ttl
+        if splitter == "tokens":
+            self.chunk_size, self.chunk_overlap = CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS
+        else:
+            self.chunk_size, self.chunk_overlap = CHUNK_SIZE, CHUNK_OVERLAP
 
         # Create persist directory if it doesn't exist
         Path(persist_directory).mkdir(parents=True, exist_ok=True)
 
-        self._initialize_vectorstore()
+        # Clients, indexes and the vectorstore itself are created on first use
+        self._embedder = embedder
+        if chat_model is not None:
+            self.llm = chat_model
+        self._vectorstore = None
+        self._vectorstore_opened = False
+        # Reentrant: building one shared property may build another
+        self._open_lock = threading.RLock()
+        # Held by writers that may run concurrently, e.g. a `DirectoryWatcher`
+        self.write_lock = threading.RLock()
+        self.qa_chain = None
+        # Latency of recent streamed questions
+        self.query_timings = deque(maxlen=QUERY_TIMING_HISTORY)
+        self.fingerprint = ingestion_fingerprint(
+            self.chunk_size, self.chunk_overlap, EMBEDDING_MODEL, splitter
+        )
+        self._file_states_lock = threading.Lock()
+        self._file_states = self._load_file_states()
+
+    @_shared_property
+    def embeddings(self):
+        """Embedding model behind a persistent on-disk cache.
+
+        The cache means unchanged chunks and repeated questions never hit the
+        OpenAI API twice.
+        """
+        from embedding_cache import CachedEmbeddings
+
+        embedder = self._embedder
+        if embedder is None:
+            from langchain_openai import OpenAIEmbeddings
+
+            embedder = OpenAIEmbeddings(
+                model=EMBEDDING_MODEL, openai_api_key=os.getenv("OPENAI_API_KEY")
+            )
+        return CachedEmbeddings(
+            embedder,
+            cache_path=Path(self.persist_directory) / EMBEDDING_CACHE_FILE,
+            # Keeps vectors of an injected embedder apart from OpenAI ones
+            model_name=getattr(embedder, "model", None) or type(embedder).__name__,
+        )
+
+    @_shared_property
+    def llm(self):
+        """Chat model used to generate answers."""
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(model=LLM_MODEL, openai_api_key=os.getenv("OPENAI_API_KEY"))
+
+    @_shared_property
+    def answer_cache(self):
+        """Semantic cache of recent answers."""
+        from answer_cache import SemanticAnswerCache
+
+        return SemanticAnswerCache(
+            threshold=self.answer_cache_threshold, ttl=self.answer_cache_ttl
+        )
+
+    @_shared_property
+    def context_packer(self):
+        """Merges, de-duplicates and budgets retrieved chunks before generation."""
+        from context_packing import ContextPacker
+
+        return ContextPacker(token_budget=CONTEXT_TOKEN_BUDGET, model=LLM_MODEL)
+
+    @_shared_property
+    def keyword_index(self):
+        """BM25 index kept next to the vectorstore for hybrid retrieval."""
+        from keyword_index import BM25Index
+
+        return BM25Index(Path(self.persist_directory) / KEYWORD_INDEX_FILE)
+
+    @_shared_property
+    def pipeline(self):
+        """Batched embedding pipeline used for bulk writes."""
+        from ingestion import EmbeddingPipeline
+
+        return EmbeddingPipeline(
+            self.embeddings, on_stored=self.keyword_index.add, metrics=self.metrics
+        )
+
+    @_shared_property
+    def streaming_pipeline(self):
+        """Pipeline with small batches, keeping memory flat and making early
+        pages searchable sooner."""
+        from ingestion import EmbeddingPipeline
+
+        return EmbeddingPipeline(
+            self.embeddings,
+            max_batch_size=STREAMING_BATCH_SIZE,
+            on_stored=self.keyword_index.add,
+            metrics=self.metrics,
+        )
+
+    @property
+    def vectorstore(self):
+        """The vectorstore, opened on the first query or write."""
+        if not self._vectorstore_opened:
+            with self._open_lock:
+                if not self._vectorstore_opened:
+                    self._initialize_vectorstore()
+                    self._backfill_keyword_index()
+                    self._vectorstore_opened = True
+        return self._vectorstore
+
+    @vectorstore.setter
+    def vectorstore(self, vectorstore):
+        self._vectorstore_opened = True
+        self._vectorstore = vectorstore
+
+    def _open_vectorstore(self):
+        """Open the configured vector backend."""
+        if self.vector_backend == "mmap":
+            from mmap_store import MmapVectorStore
+
+            return MmapVectorStore(
+                Path(self.persist_directory) / MMAP_STORE_DIR,
+                self.embeddings,
+                quantization=self.quantization,
+                rerank_factor=RERANK_FACTOR,
+            )
+
+        from langchain_chroma import Chroma
+
+        return Chroma(
+            collection_name=CHROMA_COLLECTION,
+            persist_directory=self.persist_directory,
+            embedding_function=self.embeddings,
+        )
 
     def _initialize_vectorstore(self):
-        """Initialize or load existing ChromaDB vectorstore."""
+        """Initialize or load existing vectorstore."""
+        existed = self._store_file().exists()
         try:
             # Try to load existing vectorstore
-            self.vectorstore = Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=self.embeddings,
-            )
-            print(f"✅ Loaded existing ChromaDB from {self.persist_directory}")
+            self.vectorstore = self._open_vectorstore()
+            if existed:
+                print(f"✅ Loaded existing {self._backend_name()} from {self.persist_directory}")
+            else:
+                print(f"🆕 Created new {self._backend_name()} in {self.persist_directory}")
         except Exception as e:
             print(
-                f"⚠️  No existing ChromaDB found. Will create new one when documents are added."
+                f"⚠️  No existing {self._backend_name()} found. Will create new one when documents are added."
             )
             self.vectorstore = None
 
-    def load_pdf(self, pdf_path):
-        """Load and process a PDF file."""
+    def _backfill_keyword_index(self, page_size=1000):
+        """Index chunks stored in ChromaDB before the keyword index existed."""
+        if self.vectorstore is None or len(self.keyword_index):
+            return
+
+        from langchain_core.documents import Document
+
+        collection = collection_of(self.vectorstore)
+        total = collection.count()
+        for offset in range(0, total, page_size):
+            page = collection.get(
+                limit=page_size, offset=offset, include=["documents", "metadatas"]
+            )
+            self.keyword_index.add(
+                page["ids"],
+                [
+                    Document(page_content=text, metadata=metadata or {})
+                    for text, metadata in zip(page["documents"], page["metadatas"])
+                ],
+            )
+        if total:
+            print(f"🔤 Built keyword index for {total} existing chunks")
+
+    def _check_pdf(self, pdf_path):
+        """Make sure the path points to an existing PDF file."""
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
         if not pdf_path.lower().endswith(".pdf"):
             raise ValueError("File must be a PDF")
 
-        print(f"📄 Loading PDF: {pdf_path}")
+    def _text_splitter(self):
+        """Create the text splitter used for every PDF."""
+        return make_text_splitter(
+            self.splitter, self.chunk_size, self.chunk_overlap, EMBEDDING_MODEL
+        )
 
-        loader = PyPDFLoader(pdf_path)
-        documents = loader.load()
+    def load_pdf(self, pdf_path):
+        """Load and process a PDF file."""
+        self._check_pdf(pdf_path)
 
-        # Split documents into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        print(f"📄 Loading PDF: {pdf_path}")
 
-        texts = text_splitter.split_documents(documents)
+        texts = split_pdf(
+            pdf_path,
+            self.chunk_size,
+            self.chunk_overlap,
+            self.fingerprint,
+            self.metrics,
+            self.splitter,
+        )
         print(f"📝 Split PDF into {len(texts)} chunks")
 
         return texts
 
-    def add_documents_to_vectorstore(self, documents):
-        """Add documents to ChromaDB vectorstore."""
-        if self.vectorstore is None:
-            self.vectorstore = Chroma.from_documents(
-                documents=documents,
-                embedding=self.embeddings,
-                persist_directory=self.persist_directory,
+    def iter_pdf_chunks(self, pdf_path):
+        """Lazily yield the chunks of a PDF, reading and splitting one page at a time."""
+        from langchain_community.document_loaders import PyPDFLoader
+
+        from ingestion import assign_chunk_ids
+
+        self._check_pdf(pdf_path)
+        text_splitter = self._text_splitter()
+
+        pages = PyPDFLoader(pdf_path).lazy_load()
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            if page is None:
+                break
+            self.metrics.record(
+                "parse",
+                time.perf_counter() - start,
+                pages=1,
+                bytes=len(page.page_content.encode()),
+            )
+
+            with self.metrics.stage("split") as counts:
+                chunks = text_splitter.split_documents([page])
+                assign_chunk_ids(chunks, self.fingerprint)
+                counts["chunks"] = len(chunks)
+            yield from chunks
+
+    def ingest_pdf_streaming(self, pdf_path):
+        """Stream a PDF into ChromaDB with bounded memory.
+
+        Pages are parsed lazily and their chunks flow straight through the
+        embedding pipeline in small batches, so peak memory does not grow with
+        the size of the file and the first pages become searchable while the
+        rest is still being parsed. Unchanged chunks are skipped and chunks
+        that no longer exist in the PDF are removed afterwards, unless some
+        new chunks failed to embed.
+        """
+        self._check_pdf(pdf_path)
+        print(f"🌊 Streaming PDF: {pdf_path}")
+
+        self._ensure_vectorstore()
+        self._initialize_qa_chain()
+
+        existing_ids = set(self._existing_ids(pdf_path))
+        current_ids = set()
+
+        def new_chunks():
+            for chunk in self.iter_pdf_chunks(pdf_path):
+                current_ids.add(chunk.metadata["chunk_id"])
+                if chunk.metadata["chunk_id"] not in existing_ids:
+                    yield chunk
+
+        report = self.streaming_pipeline.run(self.vectorstore, new_chunks())
+
+        # Keep the old chunks if some new ones failed to embed, like `_sync_source`
+        stale_ids = [] if report.failed_batches else sorted(existing_ids - current_ids)
+        if stale_ids:
+            self._delete_chunks(stale_ids)
+        self._vectorstore_changed()
+
+        print(
+            f"🔁 Streamed {len(current_ids)} chunks: {report.chunks} embedded, "
+            f"{len(current_ids & existing_ids)} unchanged, {len(stale_ids)} removed "
+            f"({report.chunks_per_second:.1f} chunks/sec)"
+        )
+        if report.failed_batches:
+            print(
+                f"⚠️  {report.failed_batches} batches ({report.failed_chunks} chunks) "
+                f"failed after retries: {report.errors[-1]}"
             )
-            print("🆕 Created new ChromaDB vectorstore")
         else:
-            # Add to existing vectorstore
-            self.vectorstore.add_documents(documents)
-            print("➕ Added documents to existing ChromaDB vectorstore")
+            self._record_files([pdf_path])
+        return report
 
+    def add_documents_to_vectorstore(self, documents):
+        """Add documents to ChromaDB vectorstore.
+
+        Chunks produced by `load_pdf` carry content-hashed IDs, so only new or
+        changed chunks are embedded and chunks that disappeared from a source
+        are deleted. Documents without IDs are simply appended.
+        """
+        if not all(doc.metadata.get("chunk_id") for doc in documents):
+            self._write_documents(documents)
+            self._initialize_qa_chain()
+            return
+
+        self._ensure_vectorstore()
+
+        added = deleted = unchanged = failed = 0
+        for source, chunks in group_by_source(documents).items():
+            report, kept, removed = self._sync_source(source, chunks)
+            added += report.chunks
+            failed += report.failed_chunks
+            unchanged += kept
+            deleted += removed
+
+        print(
+            f"🔁 Synced {self._backend_name()}: {added} embedded, {unchanged} unchanged, {deleted} removed"
+        )
+        if failed:
+            print(f"⚠️  {failed} chunks failed to embed after retries")
         self._initialize_qa_chain()
 
+    def _sync_source(self, source, chunks):
+        """Bring the stored chunks of one source in line with `chunks`.
+
+        New chunks are stored before stale ones are deleted, and stale ones are
+        kept if any new chunk failed to embed, so a failure never leaves the
+        source without chunks. Returns the embedding report plus the number
+        of unchanged and deleted chunks.
+        """
+        to_add, to_delete, unchanged = plan_sync(chunks, self._existing_ids(source))
+
+        report = self.pipeline.run(self.vectorstore, to_add)
+        if report.failed_batches:
+            to_delete = []
+        if to_delete:
+            self._delete_chunks(to_delete)
+        if to_add or to_delete:
+            self._vectorstore_changed()
+
+        return report, unchanged, len(to_delete)
+
+    def ingest_directory(self, directory, workers=None, recursive=True, skip_unchanged=False):
+        """Ingest every PDF in a directory using a pool of parser processes.
+
+        PDF parsing and splitting run in `workers` processes, while this
+        process acts as the single writer that embeds and stores results as
+        they arrive. A file that fails is reported and skipped without
+        aborting the rest of the batch. Workers are spawned rather than
+        forked, since this may run on a thread (the watcher, the server)
+        while others hold SQLite connections and locks.
+
+        With `skip_unchanged`, stored PDFs whose modification time and size
+        haven't changed since they were ingested are not parsed again.
+        """
+        pdf_paths = find_pdfs(directory, recursive=recursive)
+        report = DirectoryIngestionReport(files=len(pdf_paths))
+        if skip_unchanged and pdf_paths:
+            stored = self.stored_sources()
+            pdf_paths = [
+                path for path in pdf_paths if not (path in stored and self._file_unchanged(path))
+            ]
+            report.skipped = report.files - len(pdf_paths)
+            report.files = len(pdf_paths)
+            if report.skipped:
+                print(f"⏭️  Skipping {report.skipped} unchanged PDFs in {directory}")
+        if not pdf_paths:
+            if not report.skipped:
+                print(f"⚠️  No PDF files found in {directory}")
+            return report
+
+        workers = workers or os.cpu_count() or 1
+        print(f"📂 Ingesting {len(pdf_paths)} PDFs from {directory} with {workers} workers")
+
+        self._ensure_vectorstore()
+        start = time.perf_counter()
+        pending = iter(pdf_paths)
+
+        ingested = []
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+
+            def submit(paths):
+                for pdf_path in paths:
+                    future = executor.submit(
+                        split_pdf_recorded,
+                        pdf_path,
+                        self.chunk_size,
+                        self.chunk_overlap,
+                        self.fingerprint,
+                        self.splitter,
+                    )
+                    in_flight[future] = pdf_path
+
+            # Only parse a little ahead of the writer so chunks don't pile up
+            in_flight = {}
+            submit(islice(pending, workers * 2))
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pdf_path = in_flight.pop(future)
+                    submit(islice(pending, 1))
+                    position = f"[{report.succeeded + len(report.failures) + 1}/{report.files}]"
+
+                    try:
+                        chunks, events = future.result()
+                        self.metrics.replay(events)
+                        embedded, unchanged, deleted = self._sync_source(pdf_path, chunks)
+                        if embedded.failed_batches:
+                            raise RuntimeError(
+                                f"{embedded.failed_chunks} chunks failed to embed: "
+                                f"{embedded.errors[-1]}"
+                            )
+                    except Exception as e:
+                        report.failures[pdf_path] = str(e)
+                        print(f"  {position} ❌ {pdf_path}: {e}")
+                        continue
+
+                    report.succeeded += 1
+                    ingested.append(pdf_path)
+                    report.chunks += len(chunks)
+                    report.embedded += embedded.chunks
+                    print(
+                        f"  {position} ✅ {pdf_path}: {len(chunks)} chunks "
+                        f"({embedded.chunks} embedded, {unchanged} unchanged, {deleted} removed)"
+                    )
+
+        self._record_files(ingested)
+        report.seconds = time.perf_counter() - start
+        print(
+            f"📦 Ingested {report.succeeded}/{report.files} PDFs, {report.chunks} chunks "
+            f"in {report.seconds:.1f}s ({report.files_per_second:.1f} files/sec, "
+            f"{report.chunks_per_second:.1f} chunks/sec)"
+        )
+        if report.failures:
+            print(f"⚠️  {len(report.failures)} files failed")
+
+        self._initialize_qa_chain()
+        return report
+
+    def _existing_ids(self, source):
+        """Return the chunk IDs currently stored for a source."""
+        if self.vectorstore is None:
+            return []
+        return self.vectorstore.get(where={"source": source}, include=[])["ids"]
+
+    def _ensure_vectorstore(self):
+        """Create an empty vectorstore if none exists yet."""
+        if self.vectorstore is None:
+            self.vectorstore = self._open_vectorstore()
+            print(f"🆕 Created new {self._backend_name()}")
+
+    def _delete_chunks(self, ids):
+        """Delete chunks from ChromaDB and the keyword index."""
+        with self.metrics.stage("delete", chunks=len(ids)):
+            self.vectorstore.delete(ids=ids)
+            self.keyword_index.delete(ids)
+
+    def remove_source(self, source):
+        """Delete every stored chunk of a source, e.g. a PDF that was deleted.
+
+        Returns the number of chunks removed.
+        """
+        ids = self._existing_ids(source)
+        if ids:
+            self._delete_chunks(ids)
+            self._vectorstore_changed()
+        self._forget_file(source)
+        return len(ids)
+
+    def _load_file_states(self):
+        path = Path(self.persist_directory) / FILE_STATE_FILE
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _file_state(self, path):
+        """What decides whether a PDF needs ingesting again."""
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size, self.fingerprint]
+
+    def _file_unchanged(self, path):
+        try:
+            state = self._file_state(path)
+        except OSError:
+            return False
+        with self._file_states_lock:
+            return self._file_states.get(path) == state
+
+    def _save_file_states(self):
+        """Atomically write the file states; call with the lock held."""
+        path = Path(self.persist_directory) / FILE_STATE_FILE
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._file_states, f)
+        os.replace(tmp_path, path)
+
+    def _record_files(self, paths):
+        """Remember the state of PDFs that were fully ingested."""
+        states = {}
+        for path in paths:
+            try:
+                states[path] = self._file_state(path)
+            except OSError:
+                continue
+        if states:
+            with self._file_states_lock:
+                self._file_states.update(states)
+                self._save_file_states()
+
+    def _forget_file(self, path):
+        with self._file_states_lock:
+            if self._file_states.pop(path, None) is not None:
+                self._save_file_states()
+
+    def stored_sources(self):
+        """Return the sources that have chunks in the store."""
+        if self.vectorstore is None:
+            return set()
+        return self.keyword_index.sources()
+
+    def _vectorstore_changed(self):
+        """Drop cached answers that may no longer match the stored documents."""
+        self.answer_cache.invalidate()
+
+    def _write_documents(self, documents):
+        """Embed and store documents, creating the vectorstore if needed."""
+        self._ensure_vectorstore()
+
+        report = self.pipeline.run(self.vectorstore, documents)
+        self._vectorstore_changed()
+        print(
+            f"➕ Embedded {report.chunks} chunks in {report.batches} batches "
+            f"({report.chunks_per_second:.1f} chunks/sec)"
+        )
+        if report.failed_batches:
+            print(
+                f"⚠️  {report.failed_batches} batches ({report.failed_chunks} chunks) "
+                f"failed after retries: {report.errors[-1]}"
+            )
+        return report
+
     def _initialize_qa_chain(self):
         """Initialize the QA chain with the vectorstore."""
         if self.vectorstore is None:
             raise ValueError("Vectorstore not initialized. Please add documents first.")
 
+        from langchain.chains import RetrievalQA
+
+        from keyword_index import HybridRetriever
+
         self.qa_chain = RetrievalQA.from_chain_type(
             llm=self.llm,
             chain_type="stuff",
-            retriever=self.vectorstore.as_retriever(search_kwargs={"k": 3}),
+            retriever=HybridRetriever(
+                vectorstore=self.vectorstore,
+                keyword_index=self.keyword_index,
+                packer=self.context_packer,
+                metrics=self.metrics,
+                k=RETRIEVER_K,
+                fetch_k=RETRIEVER_FETCH_K,
+            ),
             return_source_documents=True,
         )
         print("🔗 QA chain initialized")
@@ -106,37 +718,383 @@ class RAGApplication:
             self._initialize_qa_chain()
 
         print(f"❓ Question: {question}")
-        print("🤔 Thinking...")
 
-        result = self.qa_chain({"query": question})
+        # Near-identical questions are answered from the semantic cache
+        query_vector, cache_version, cached = self._lookup_answer_cache(question)
 
-        answer = result["result"]
-        source_docs = result["source_documents"]
+        if cached is not None:
+            print(f"⚡ Answered from cache (similarity {cached['similarity']:.3f})")
+            answer = cached["answer"]
+            source_docs = cached["source_documents"]
+        else:
+            print("🤔 Thinking...")
+            # The two steps of the RetrievalQA chain, so each can be timed
+            source_docs, packed = self.qa_chain.retriever.retrieve(question)
+            with self.metrics.stage("generation", questions=1) as counts:
+                answer = self.qa_chain.combine_documents_chain.invoke(
+                    {"input_documents": source_docs, "question": question}
+                )["output_text"]
+                counts["tokens"] = count_tokens(answer, LLM_MODEL)
+            self._print_packing(packed)
+            self.answer_cache.put(
+                question, query_vector, answer, source_docs, cache_version
+            )
 
         print(f"💡 Answer: {answer}")
+        self._print_sources(source_docs)
+
+        return answer, source_docs
+
+    def _lookup_answer_cache(self, question):
+        """Embed a question and look it up in the semantic answer cache.
+
+        Returns the query vector, the cache version to store a new answer
+        under, and the cached entry or None.
+        """
+        with self.metrics.stage("query_embedding", queries=1):
+            query_vector = self.embeddings.embed_query(question)
+        with self.metrics.stage("answer_cache") as counts:
+            cache_version = self.answer_cache.version
+            cached = self.answer_cache.get(query_vector)
+            counts["hits" if cached is not None else "misses"] = 1
+        return query_vector, cache_version, cached
+
+    def stream_answer(self, question):
+        """Answer a question, yielding events as soon as they are available.
+
+        Yields `("sources", documents)` once retrieval is done, then
+        `("token", text)` for every generated token and finally
+        `("done", QueryTiming)` with the latency breakdown, which is also
+        appended to `self.query_timings`.
+        """
+        if self.qa_chain is None:
+            if self.vectorstore is None:
+                raise ValueError("No documents loaded. Please add a PDF first.")
+            self._initialize_qa_chain()
+
+        start = time.perf_counter()
+        timing = QueryTiming(question=question)
+
+        query_vector, cache_version, cached = self._lookup_answer_cache(question)
+
+        if cached is not None:
+            timing.cached = True
+            timing.retrieval_ms = (time.perf_counter() - start) * 1000
+            yield "sources", cached["source_documents"]
+            timing.first_token_ms = (time.perf_counter() - start) * 1000
+            yield "token", cached["answer"]
+        else:
+            source_docs, packed = self.qa_chain.retriever.retrieve(question)
+            timing.retrieval_ms = (time.perf_counter() - start) * 1000
+            if packed is not None:
+                timing.context_tokens_before = packed.tokens_before
+                timing.context_tokens_after = packed.tokens_after
+            yield "sources", source_docs
+
+            messages = self._build_messages(question, source_docs)
+
+            tokens = []
+            with self.metrics.stage("generation", questions=1) as counts:
+                for chunk in self.llm.stream(messages):
+                    if not chunk.content:
+                        continue
+                    if not tokens:
+                        timing.first_token_ms = (time.perf_counter() - start) * 1000
+                    tokens.append(chunk.content)
+                    yield "token", chunk.content
+                counts["tokens"] = count_tokens("".join(tokens), LLM_MODEL)
+
+            self.answer_cache.put(
+                question, query_vector, "".join(tokens), source_docs, cache_version
+            )
+
+        timing.total_ms = (time.perf_counter() - start) * 1000
+        self.query_timings.append(timing)
+        yield "done", timing
+
+    def _build_messages(self, question, source_docs):
+        """Build the same prompt the "stuff" chain would send to the LLM."""
+        from langchain_core.prompts import format_document
+
+        stuff_chain = self.qa_chain.combine_documents_chain
+        context = stuff_chain.document_separator.join(
+            format_document(doc, stuff_chain.document_prompt) for doc in source_docs
+        )
+        return stuff_chain.llm_chain.prompt.format_messages(
+            **{stuff_chain.document_variable_name: context, "question": question}
+        )
+
+    async def ask_many(self, questions, concurrency=8, requests_per_minute=None):
+        """Answer many questions concurrently, returning results in order.
+
+        All questions are embedded in one batched call and retrieved together,
+        then answers are generated concurrently with at most `concurrency`
+        LLM calls in flight (and optionally at most `requests_per_minute`
+        started per minute). A failing question gets its `error` set instead
+        of failing the whole batch.
+        """
+        if self.qa_chain is None:
+            if self.vectorstore is None:
+                raise ValueError("No documents loaded. Please add a PDF first.")
+            self._initialize_qa_chain()
+
+        questions = list(questions)
+        results = [BatchAnswer(question=question) for question in questions]
+        if not questions:
+            return results
+
+        cache_version = self.answer_cache.version
+        try:
+            with self.metrics.stage("query_embedding", queries=len(questions)):
+                query_vectors = await asyncio.to_thread(
+                    self.embeddings.embed_documents, questions
+                )
+            retrieved = await asyncio.to_thread(
+                self.qa_chain.retriever.retrieve_many, questions, query_vectors
+            )
+        except Exception as e:
+            for result in results:
+                result.error = f"Retrieval failed: {e}"
+            return results
+
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = AsyncRateLimiter(requests_per_minute) if requests_per_minute else None
+
+        async def answer(result, query_vector, source_docs):
+            try:
+                with self.metrics.stage("answer_cache") as counts:
+                    cached = self.answer_cache.get(query_vector)
+                    counts["hits" if cached is not None else "misses"] = 1
+                if cached is not None:
+                    result.answer = cached["answer"]
+                    result.source_documents = cached["source_documents"]
+                    result.cached = True
+                    return
+
+                async with semaphore:
+                    if limiter is not None:
+                        await limiter.acquire()
+                    with self.metrics.stage("generation", questions=1) as counts:
+                        response = await self.llm.ainvoke(
+                            self._build_messages(result.question, source_docs)
+                        )
+                        counts["tokens"] = count_tokens(response.content, LLM_MODEL)
+
+                result.answer = response.content
+                result.source_documents = source_docs
+                self.answer_cache.put(
+                    result.question, query_vector, result.answer, source_docs, cache_version
+                )
+            except Exception as e:
+                result.error = str(e)
+
+        await asyncio.gather(
+            *(
+                answer(result, query_vector, source_docs)
+                for result, query_vector, source_docs in zip(results, query_vectors, retrieved)
+            )
+        )
+        return results
+
+    def ask_question_streaming(self, question):
+        """Ask a question and print the answer token by token."""
+        print(f"❓ Question: {question}")
+        print("🤔 Thinking...")
+
+        answer_parts = []
+        source_docs = []
+        for event, payload in self.stream_answer(question):
+            if event == "sources":
+                source_docs = payload
+                self._print_sources(source_docs)
+                print("\n💡 Answer: ", end="", flush=True)
+            elif event == "token":
+                answer_parts.append(payload)
+                print(payload, end="", flush=True)
+            else:
+                if not payload.cached:
+                    print(
+                        f"\n\n✂️  Context packed from {payload.context_tokens_before} "
+                        f"to {payload.context_tokens_after} tokens",
+                        end="",
+                    )
+                print(
+                    f"\n\n⏱️  Retrieval {payload.retrieval_ms:.0f} ms | "
+                    f"first token {payload.first_token_ms:.0f} ms | "
+                    f"total {payload.total_ms:.0f} ms"
+                    + (" (cached)" if payload.cached else "")
+                )
+
+        return "".join(answer_parts), source_docs
+
+    def _print_packing(self, packed):
+        """Print how much the context packer shrank the prompt context."""
+        if packed is not None:
+            print(
+                f"✂️  Context packed from {packed.chunks_before} chunks / "
+                f"{packed.tokens_before} tokens to {len(packed.documents)} chunks / "
+                f"{packed.tokens_after} tokens"
+            )
+
+    def _print_sources(self, source_docs):
+        """Print the source citations for an answer."""
         print(f"\n📚 Sources ({len(source_docs)} documents):")
         for i, doc in enumerate(source_docs, 1):
             source = doc.metadata.get("source", "Unknown")
             page = doc.metadata.get("page", "Unknown")
             print(f"  {i}. {source} (Page {page})")
 
-        return answer, source_docs
+    def _backend_name(self):
+        """Name of the configured vector backend for messages."""
+        name = "ChromaDB" if self.vector_backend == "chroma" else "Mmap vectorstore"
+        if self.quantization:
+            name += f" ({self.quantization} index)"
+        return name
+
+    def _store_file(self):
+        """The backend's SQLite file, which exists once a store was written."""
+        if self.vector_backend == "mmap":
+            from mmap_store import METADATA_FILE
+
+            return Path(self.persist_directory) / MMAP_STORE_DIR / METADATA_FILE
+        return Path(self.persist_directory) / "chroma.sqlite3"
+
+    def _stored_chunk_count(self):
+        """Count stored chunks straight from the backend's SQLite file.
+
+        The file is opened read-only, so checking the store never loads
+        ChromaDB, the vector matrix or any model client. Returns None when
+        no store has been written yet.
+        """
+        path = self._store_file()
+        if self.vector_backend == "mmap":
+            query, params = "SELECT COUNT(*) FROM chunks WHERE deleted = 0", ()
+        else:
+            query, params = CHROMA_COUNT_QUERY, (CHROMA_COLLECTION,)
+
+        if not path.exists():
+            return None
+        with closing(sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)) as conn:
+            return conn.execute(query, params).fetchone()[0]
 
     def get_vectorstore_info(self):
         """Get information about the current vectorstore."""
-        if self.vectorstore is None:
-            return "No vectorstore initialized"
-
         try:
-            collection = self.vectorstore._collection
-            count = collection.count()
-            return f"ChromaDB contains {count} document chunks"
+            if self._vectorstore_opened:
+                if self.vectorstore is None:
+                    return "No vectorstore initialized"
+                count = collection_of(self.vectorstore).count()
+            else:
+                count = self._stored_chunk_count()
+                if count is None:
+                    return "No vectorstore initialized"
+            return f"{self._backend_name()} contains {count} document chunks"
         except:
             return "Vectorstore exists but unable to get count"
 
+    def get_embedding_cache_info(self):
+        """Get hit/miss statistics for the embedding cache."""
+        if "embeddings" not in self.__dict__:
+            return "Embedding cache: not used yet in this session"
+        stats = self.embeddings.stats()
+        return (
+            f"Embedding cache: {stats['entries']} vectors, "
+            f"{stats['hits']} hits / {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate)"
+        )
+
+    def get_metrics_info(self):
+        """Summarize the time spent in each pipeline stage so far."""
+        snapshot = self.metrics.snapshot()
+        if not snapshot:
+            return "Pipeline metrics: nothing recorded yet"
+
+        lines = ["Pipeline metrics:"]
+        for stage, stats in snapshot.items():
+            line = (
+                f"  {stage:<16} {stats['runs']:>6} runs  {stats['seconds']:8.2f}s total  "
+                f"p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms"
+            )
+            for unit in ("chunks", "tokens", "queries"):
+                if f"{unit}_per_second" in stats:
+                    line += f"  {stats[f'{unit}_per_second']:.1f} {unit}/s"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Load PDF documents into ChromaDB and ask questions about them."
+    )
+    parser.add_argument(
+        "--vector-backend",
+        choices=VECTOR_BACKENDS,
+        default="chroma",
+        help="Vector store to use (default: chroma)",
+    )
+    parser.add_argument(
+        "--quantization",
+        choices=VECTOR_QUANTIZATIONS,
+        default=None,
+        help="Search compressed int8 or binary codes and re-rank with full vectors (mmap backend only)",
+    )
+    parser.add_argument(
+        "--splitter",
+        choices=SPLITTERS,
+        default="characters",
+        help="Size chunks in characters or in embedding-model tokens (default: characters)",
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        metavar="PATH",
+        help="Append every pipeline stage run (timing and counters) to this JSONL file",
+    )
+    parser.add_argument(
+        "--metrics-prometheus",
+        metavar="PATH",
+        help="Write pipeline metrics in Prometheus text format to this file after each action",
+    )
+    parser.add_argument(
+        "--watch",
+        metavar="DIRECTORY",
+        help="Keep the index in sync with the PDFs in this directory while the menu runs",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    ingest = subparsers.add_parser("ingest", help="Ingest every PDF in a directory")
+    ingest.add_argument("directory", help="Directory containing PDF files")
+    ingest.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of parser processes (defaults to the number of CPU cores)",
+    )
+    ingest.add_argument(
+        "--no-recursive",
+        action="store_true",
+        help="Only look for PDFs directly inside the directory",
+    )
+
+    serve = subparsers.add_parser(
+        "serve", help="Serve questions and ingestion jobs over HTTP (see server.py)"
+    )
+    serve.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parser processes for directory ingestion jobs (defaults to the number of CPU cores)",
+    )
+
+    return parser.parse_args()
+
 
 def main():
     """Main function to run the RAG application."""
+    args = parse_args()
+
     print("🚀 Welcome to the RAG Application!")
     print(
         "This application allows you to load PDF documents and ask questions about them."
@@ -151,12 +1109,51 @@ def main():
 
     # Initialize RAG application
     try:
-        rag_app = RAGApplication()
+        rag_app = RAGApplication(
+            vector_backend=args.vector_backend,
+            quantization=args.quantization,
+            splitter=args.splitter,
+            metrics=PipelineMetrics(jsonl_path=args.metrics_jsonl),
+        )
         print(f"📊 {rag_app.get_vectorstore_info()}")
     except Exception as e:
         print(f"❌ Error initializing RAG application: {e}")
         return
 
+    def export_metrics(final=False):
+        if args.metrics_prometheus:
+            rag_app.metrics.write_prometheus(args.metrics_prometheus)
+        if final:
+            rag_app.metrics.close()
+
+    if args.command == "ingest":
+        rag_app.ingest_directory(
+            args.directory, workers=args.workers, recursive=not args.no_recursive
+        )
+        export_metrics(final=True)
+        return
+
+    if args.command == "serve":
+        import uvicorn
+
+        from server import RAGServer
+
+        uvicorn.run(
+            RAGServer(rag_app, ingest_workers=args.workers), host=args.host, port=args.port
+        )
+        export_metrics(final=True)
+        return
+
+    watcher = None
+    if args.watch:
+        from watcher import DirectoryWatcher
+
+        try:
+            watcher = DirectoryWatcher(rag_app, args.watch).start()
+            print(f"👀 Watching {args.watch} for PDF changes")
+        except Exception as e:
+            print(f"❌ Error watching {args.watch}: {e}")
+
     while True:
         print("\n" + "=" * 60)
         print("Choose an option:")
@@ -170,9 +1167,9 @@ def main():
         if choice == "1":
             pdf_path = input("Enter the path to your PDF file: ").strip()
             try:
-                documents = rag_app.load_pdf(pdf_path)
-                rag_app.add_documents_to_vectorstore(documents)
-                print("✅ PDF successfully loaded and stored in ChromaDB!")
+                with rag_app.write_lock:
+                    rag_app.ingest_pdf_streaming(pdf_path)
+                print(f"✅ PDF successfully loaded and stored in {rag_app._backend_name()}!")
             except Exception as e:
                 print(f"❌ Error loading PDF: {e}")
 
@@ -184,7 +1181,7 @@ def main():
             question = input("Enter your question: ").strip()
             if question:
                 try:
-                    rag_app.ask_question(question)
+                    rag_app.ask_question_streaming(question)
                 except Exception as e:
                     print(f"❌ Error answering question: {e}")
             else:
@@ -192,14 +1189,23 @@ def main():
 
         elif choice == "3":
             print(f"📊 {rag_app.get_vectorstore_info()}")
+            print(f"🧠 {rag_app.get_embedding_cache_info()}")
+            print(f"⏱️  {rag_app.get_metrics_info()}")
+            if watcher is not None:
+                print(f"👀 {watcher.describe()}")
 
         elif choice == "4":
+            if watcher is not None:
+                watcher.stop()
+            export_metrics(final=True)
             print("👋 Goodbye!")
             break
 
         else:
             print("⚠️  Invalid choice. Please enter 1, 2, 3, or 4.")
 
+        export_metrics()
+
 
 if __name__ == "__main__":
     main()
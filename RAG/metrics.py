@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Upper bounds, in seconds, of the stage latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Recent durations kept per stage for the percentiles in `snapshot()`
+RECENT_SAMPLES = 1000
+
+
+class StageRecorder(ABC):
+    """Base class for objects that record how long pipeline stages take.
+
+    Subclasses implement `record()`; `stage()` times a block of code with it.
+    """
+
+    @abstractmethod
+    def record(self, stage, seconds, error=False, **counts):
+        """Record one run of `stage` that took `seconds`."""
+
+    @contextmanager
+    def stage(self, name, **counts):
+        """Time the enclosed block as one run of stage `name`.
+
+        Yields a dict of counters (chunks, tokens, bytes, ...) that the block
+        may fill in; a block that raises is recorded as an error.
+        """
+        counts = dict(counts)
+        error = False
+        start = time.perf_counter()
+        try:
+            yield counts
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, error=error, **counts)
+
+
+class NullMetrics(StageRecorder):
+    """Recorder that drops everything, used when no metrics are wanted."""
+
+    def record(self, stage, seconds, error=False, **counts):
+        pass
+
+
+class EventLog(StageRecorder):
+    """Picklable list of recorded stages.
+
+    Used inside worker processes; the parent feeds `events` to
+    `PipelineMetrics.replay()`.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def record(self, stage, seconds, error=False, **counts):
+        self.events.append((stage, seconds, error, counts))
+
+
+class _StageStats:
+    def __init__(self, buckets):
+        self.runs = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.bucket_counts = [0] * len(buckets)
+        self.counts = defaultdict(int)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+
+class PipelineMetrics(StageRecorder):
+    """Thread-safe timers and counters for each stage of the RAG pipeline.
+
+    Every stage run adds its duration to a latency histogram and its counters
+    (chunks, tokens, bytes, ...) to running totals. Read them with
+    `snapshot()`, export them with `to_prometheus()` / `write_prometheus()`,
+    or pass `jsonl_path` to also append every run as one JSON line, e.g. to
+    build latency histograms offline. The file is opened on the first run
+    and kept open; `close()` flushes and closes it.
+    """
+
+    def __init__(self, jsonl_path=None, buckets=DEFAULT_BUCKETS):
+        self.jsonl_path = jsonl_path
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._jsonl = None
+
+    def record(self, stage, seconds, error=False, **counts):
+        """Record one run of `stage` that took `seconds`."""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats(self.buckets)
+            stats.runs += 1
+            stats.errors += bool(error)
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.recent.append(seconds)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    stats.bucket_counts[i] += 1
+            for name, value in counts.items():
+                stats.counts[name] += value
+
+            if self.jsonl_path is not None:
+                event = {"time": time.time(), "stage": stage, "seconds": seconds}
+                if error:
+                    event["error"] = True
+                event.update(counts)
+                if self._jsonl is None:
+                    self._jsonl = open(self.jsonl_path, "a")
+                self._jsonl.write(json.dumps(event) + "\n")
+
+    def close(self):
+        """Flush and close the JSON lines file, if one is open."""
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+
+    def replay(self, events):
+        """Record the events of an `EventLog`, e.g. one sent back by a worker."""
+        for stage, seconds, error, counts in events:
+            self.record(stage, seconds, error=error, **counts)
+
+    def snapshot(self):
+        """Return per-stage totals, throughput and latency percentiles."""
+        with self._lock:
+            result = {}
+            for stage, stats in self._stages.items():
+                recent = sorted(stats.recent)
+                summary = {
+                    "runs": stats.runs,
+                    "errors": stats.errors,
+                    "seconds": stats.seconds,
+                    "mean_ms": stats.seconds / stats.runs * 1000,
+                    "p50_ms": recent[len(recent) // 2] * 1000,
+                    "p95_ms": recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000,
+                    "max_ms": stats.max_seconds * 1000,
+                }
+                for name, value in stats.counts.items():
+                    summary[name] = value
+                    if stats.seconds:
+                        summary[f"{name}_per_second"] = value / stats.seconds
+                result[stage] = summary
+            return result
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._stages = {}
+
+    def to_prometheus(self, prefix="rag"):
+        """Render the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            stages = sorted(self._stages.items())
+            lines = [
+                f"# HELP {prefix}_stage_duration_seconds Time spent in each RAG pipeline stage.",
+                f"# TYPE {prefix}_stage_duration_seconds histogram",
+            ]
+            for stage, stats in stages:
+                for bound, count in zip(self.buckets, stats.bucket_counts):
+                    lines.append(
+                        f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}'
+                    )
+                lines.append(
+                    f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats.runs}'
+                )
+                lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{stage}"}} {stats.seconds}')
+                lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{stage}"}} {stats.runs}')
+
+            lines += [
+                f"# HELP {prefix}_stage_errors_total Stage runs that raised an error.",
+                f"# TYPE {prefix}_stage_errors_total counter",
+            ]
+            for stage, stats in stages:
+                lines.append(f'{prefix}_stage_errors_total{{stage="{stage}"}} {stats.errors}')
+
+            lines += [
+                f"# HELP {prefix}_stage_items_total Items (chunks, tokens, bytes, ...) processed by each stage.",
+                f"# TYPE {prefix}_stage_items_total counter",
+            ]
+            for stage, stats in stages:
+                for name, value in sorted(stats.counts.items()):
+                    lines.append(
+                        f'{prefix}_stage_items_total{{stage="{stage}",unit="{name}"}} {value}'
+                    )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, prefix="rag"):
+        """Atomically write `to_prometheus()` to a file, e.g. for the
+        node_exporter textfile collector."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(tmp_path, path)
@@ -0,0 +1,483 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILE = "vectors.f32"
+METADATA_FILE = "metadata.sqlite3"
+# Compressed codes searched before re-ranking with the full-precision vectors
+QUANTIZATIONS = ("int8", "binary")
+# Rows scored per block, so a search never allocates a full N x Q score matrix
+_SEARCH_BLOCK = 65_536
+# int8 codes are widened to float32 for scoring; small blocks keep that copy in cache
+_CODE_BLOCK = 4096
+
+
+class MmapVectorStore(VectorStore):
+    """Exact-search vector store backed by a memory-mapped float32 matrix.
+
+    Unit-normalized embeddings are appended to `vectors.f32`, and ids, texts
+    and metadata live in a small SQLite sidecar. Searches are brute-force
+    dot products over the memory map with an `argpartition` top-k, which for
+    up to a few million chunks is fast, exact and nearly free to open.
+
+    Besides the LangChain `VectorStore` API it mirrors the subset of the
+    Chroma collection API used by the RAG app (`upsert`, `get`, `count`).
+    Updated or deleted rows are masked out; call `compact()` to reclaim them.
+
+    With `quantization="int8"` (one byte per dimension plus a per-row scale)
+    or `"binary"` (one bit per dimension) a compact code for every row is
+    kept in `codes.<quantization>`. Searches then scan only the codes, keep
+    `rerank_factor * k` candidates and re-rank those against the float32
+    vectors, which are read from disk for the candidate rows alone.
+    """
+
+    def __init__(
+        self, directory, embedding_function, quantization=None, rerank_factor=20
+    ):
+        if quantization is not None and quantization not in QUANTIZATIONS:
+            raise ValueError(
+                f"Unknown quantization {quantization!r}, choose one of {QUANTIZATIONS}"
+            )
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.embedding_function = embedding_function
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self.vectors_path = self.directory / VECTORS_FILE
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            self.directory / METADATA_FILE, check_same_thread=False
+        )
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL,
+                source TEXT,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_id ON chunks (id);
+            CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks (source);
+            """
+        )
+        self._conn.commit()
+
+        dim = self._conn.execute("SELECT value FROM settings WHERE key = 'dim'").fetchone()
+        self.dim = int(dim[0]) if dim else None
+
+        # Only ids and the live-row mask are loaded; vectors stay on disk
+        self._rows = {}
+        self._ids = {}
+        for row, chunk_id in self._conn.execute(
+            "SELECT row, id FROM chunks WHERE deleted = 0"
+        ):
+            self._rows[chunk_id] = row
+            self._ids[row] = chunk_id
+
+        self._row_count = self._stored_rows()
+        self._alive = np.zeros(self._row_count, dtype=bool)
+        self._alive[[row for row in self._ids if row < self._row_count]] = True
+        self._matrix = None
+        self._codes = None
+        if self.quantization:
+            self._sync_codes()
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    def _stored_rows(self):
+        if self.dim is None or not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // (4 * self.dim)
+
+    def _mapped_matrix(self):
+        """Return the memory map, remapping it after appends."""
+        if self._matrix is None or len(self._matrix) != self._row_count:
+            self._matrix = (
+                np.memmap(
+                    self.vectors_path,
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(self._row_count, self.dim),
+                )
+                if self._row_count
+                else np.zeros((0, self.dim or 0), dtype=np.float32)
+            )
+        return self._matrix
+
+    @property
+    def codes_path(self):
+        return self.directory / f"codes.{self.quantization}"
+
+    def _code_dtype(self):
+        if self.quantization == "int8":
+            return np.dtype([("codes", np.int8, (self.dim,)), ("scale", np.float32)])
+        return np.dtype([("codes", np.uint8, ((self.dim + 7) // 8,))])
+
+    def _quantize(self, vectors):
+        """Encode unit-normalized vectors as int8 or binary codes."""
+        codes = np.empty(len(vectors), dtype=self._code_dtype())
+        if self.quantization == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127
+            scales[scales == 0] = 1
+            codes["codes"] = np.rint(vectors / scales[:, None])
+            codes["scale"] = scales
+        else:
+            codes["codes"] = np.packbits(vectors > 0, axis=1)
+        return codes
+
+    def _sync_codes(self):
+        """Quantize rows that have no code yet, e.g. when enabling quantization
+        on an existing store or after a compaction."""
+        if self.dim is None:
+            return
+        row_size = self._code_dtype().itemsize
+        code_rows = self.codes_path.stat().st_size // row_size if self.codes_path.exists() else 0
+        if code_rows > self._row_count:
+            code_rows = 0
+        # Drop anything past the last complete, still valid row
+        with open(self.codes_path, "ab") as f:
+            f.truncate(code_rows * row_size)
+
+        matrix = self._mapped_matrix()
+        with open(self.codes_path, "ab") as f:
+            for start in range(code_rows, self._row_count, _SEARCH_BLOCK):
+                f.write(self._quantize(matrix[start : start + _SEARCH_BLOCK]).tobytes())
+
+    def _mapped_codes(self):
+        """Return the memory-mapped codes, remapping them after appends."""
+        if self._codes is None or len(self._codes) != self._row_count:
+            self._codes = (
+                np.memmap(
+                    self.codes_path,
+                    dtype=self._code_dtype(),
+                    mode="r",
+                    shape=(self._row_count,),
+                )
+                if self._row_count
+                else np.zeros(0, dtype=self._code_dtype())
+            )
+        return self._codes
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    def _mark_deleted(self, ids):
+        rows = [self._rows.pop(chunk_id) for chunk_id in ids if chunk_id in self._rows]
+        for row in rows:
+            del self._ids[row]
+        if rows:
+            self._alive[rows] = False
+            self._conn.executemany(
+                "UPDATE chunks SET deleted = 1 WHERE row = ?", [(row,) for row in rows]
+            )
+
+    def upsert(self, ids, embeddings, documents, metadatas=None):
+        """Append vectors and their documents, replacing existing IDs."""
+        vectors = self._normalize(embeddings)
+        metadatas = metadatas or [None] * len(ids)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._conn.execute(
+                    "INSERT INTO settings (key, value) VALUES ('dim', ?)", (str(self.dim),)
+                )
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match store dimension {self.dim}"
+                )
+
+            self._mark_deleted(ids)
+
+            start = self._row_count
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            if self.quantization:
+                with open(self.codes_path, "ab") as f:
+                    f.write(self._quantize(vectors).tobytes())
+
+            rows = range(start, start + len(ids))
+            self._conn.executemany(
+                "INSERT INTO chunks (row, id, source, text, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        row,
+                        chunk_id,
+                        (metadata or {}).get("source"),
+                        text,
+                        json.dumps(metadata or {}),
+                    )
+                    for row, chunk_id, text, metadata in zip(rows, ids, documents, metadatas)
+                ],
+            )
+            self._conn.commit()
+
+            self._row_count += len(ids)
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            for row, chunk_id in zip(rows, ids):
+                self._rows[chunk_id] = row
+                self._ids[row] = chunk_id
+
+    def count(self):
+        """Return the number of live chunks."""
+        return len(self._rows)
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        """Fetch stored chunks, Chroma style, by ID and/or `{"source": ...}`."""
+        include = ["documents", "metadatas"] if include is None else include
+        clauses, params = ["deleted = 0"], []
+        if ids is not None:
+            ids = [ids] if isinstance(ids, str) else list(ids)
+            clauses.append(f"id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        if where:
+            if set(where) != {"source"}:
+                raise ValueError("MmapVectorStore.get only supports filtering by source")
+            clauses.append("source = ?")
+            params.append(where["source"])
+
+        query = f"SELECT id, text, metadata FROM chunks WHERE {' AND '.join(clauses)} ORDER BY row"
+        if limit is not None or offset is not None:
+            query += " LIMIT ? OFFSET ?"
+            params.extend([-1 if limit is None else limit, offset or 0])
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        return {
+            "ids": [chunk_id for chunk_id, _, _ in rows],
+            "documents": [text for _, text, _ in rows] if "documents" in include else None,
+            "metadatas": (
+                [json.loads(metadata) for _, _, metadata in rows]
+                if "metadatas" in include
+                else None
+            ),
+        }
+
+    def delete(self, ids=None, **kwargs):
+        """Delete chunks by ID."""
+        if not ids:
+            return False
+        with self._lock:
+            self._mark_deleted(ids)
+            self._conn.commit()
+        return True
+
+    def add_texts(self, texts, metadatas=None, *, ids=None, **kwargs):
+        """Embed and store texts."""
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self.upsert(ids, self.embedding_function.embed_documents(texts), texts, metadatas)
+        return ids
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, *, ids=None, directory=None, **kwargs):
+        """Create a store in `directory` and add texts to it."""
+        store = cls(directory, embedding)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    def _documents_for_rows(self, rows):
+        placeholders = ",".join("?" * len(rows))
+        with self._lock:
+            found = self._conn.execute(
+                f"SELECT row, id, text, metadata FROM chunks WHERE row IN ({placeholders})",
+                rows,
+            ).fetchall()
+        by_row = {
+            row: Document(id=chunk_id, page_content=text, metadata=json.loads(metadata))
+            for row, chunk_id, text, metadata in found
+        }
+        return [by_row[row] for row in rows]
+
+    @staticmethod
+    def _blocked_top_k(row_count, alive, score_block, block_size, k):
+        """Top-k rows per query, scoring `block_size` rows at a time.
+
+        `score_block(start, stop)` returns the (queries, rows) score matrix
+        for one block; higher is better.
+        """
+        best_rows = best_scores = None
+        for start in range(0, row_count, block_size):
+            stop = min(start + block_size, row_count)
+            scores = score_block(start, stop)
+            scores[:, ~alive[start:stop]] = -np.inf
+
+            # Merge this block's top-k with the best rows seen so far
+            block_k = min(k, scores.shape[1])
+            top = np.argpartition(-scores, block_k - 1, axis=1)[:, :block_k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            if best_rows is None:
+                best_rows, best_scores = top + start, top_scores
+            else:
+                best_rows = np.concatenate([best_rows, top + start], axis=1)
+                best_scores = np.concatenate([best_scores, top_scores], axis=1)
+            if best_rows.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        return (
+            np.take_along_axis(best_rows, order, axis=1),
+            np.take_along_axis(best_scores, order, axis=1),
+        )
+
+    def _code_scorer(self, queries, codes):
+        """Approximate scores of queries against a block of codes."""
+        if self.quantization == "int8":
+            return lambda start, stop: (
+                queries @ codes["codes"][start:stop].astype(np.float32).T
+            ) * codes["scale"][start:stop]
+
+        query_bits = np.packbits(queries > 0, axis=1)
+
+        def hamming(start, stop):
+            block = codes["codes"][start:stop]
+            distances = np.stack(
+                [np.bitwise_count(block ^ bits).sum(axis=1) for bits in query_bits]
+            )
+            return -distances.astype(np.float32)
+
+        return hamming
+
+    def _read_rows(self, rows):
+        """Read float32 rows with positioned reads instead of the memory map,
+        so re-ranking does not map (and keep resident) whole file regions."""
+        row_size = 4 * self.dim
+        with open(self.vectors_path, "rb") as f:
+            data = b"".join(os.pread(f.fileno(), row_size, int(row) * row_size) for row in rows)
+        return np.frombuffer(data, dtype=np.float32).reshape(len(rows), self.dim)
+
+    def _rerank(self, queries, candidates, k):
+        """Re-score candidate rows with the full-precision vectors."""
+        rows = np.empty((len(queries), k), dtype=np.int64)
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        for i, (query, query_rows) in enumerate(zip(queries, candidates)):
+            # Sorted rows turn the reads into a forward scan of the file
+            query_rows = np.sort(query_rows)
+            exact = self._read_rows(query_rows) @ query
+            top = np.argsort(-exact)[:k]
+            rows[i], scores[i] = query_rows[top], exact[top]
+        return rows, scores
+
+    def search_vectors(self, queries, k=4):
+        """Exact top-k over all live rows for a batch of query vectors.
+
+        With quantization the top-k is exact among the re-ranked candidates.
+        Returns `(rows, scores)` arrays of shape (len(queries), k), best first.
+        """
+        queries = self._normalize(queries)
+        with self._lock:
+            if self.quantization:
+                codes, matrix = self._mapped_codes(), None
+            else:
+                codes, matrix = None, self._mapped_matrix()
+            alive = self._alive
+        live = int(alive.sum())
+        k = min(k, live)
+        if k == 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty
+
+        if codes is None:
+            return self._blocked_top_k(
+                len(matrix),
+                alive,
+                lambda start, stop: queries @ matrix[start:stop].T,
+                _SEARCH_BLOCK,
+                k,
+            )
+
+        candidates, _ = self._blocked_top_k(
+            len(codes),
+            alive,
+            self._code_scorer(queries, codes),
+            _CODE_BLOCK,
+            min(live, k * self.rerank_factor),
+        )
+        return self._rerank(queries, candidates, k)
+
+    def similarity_search_by_vector_batch(self, embeddings, k=4):
+        """Run several exact searches at once; returns one (Document, score) list per query."""
+        rows, scores = self.search_vectors(embeddings, k)
+        results = []
+        for query_rows, query_scores in zip(rows, scores):
+            live = [
+                (int(row), float(score))
+                for row, score in zip(query_rows, query_scores)
+                if np.isfinite(score)
+            ]
+            documents = self._documents_for_rows([row for row, _ in live]) if live else []
+            results.append(list(zip(documents, [score for _, score in live])))
+        return results
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4):
+        return self.similarity_search_by_vector_batch([embedding], k)[0]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector_with_score(
+            self.embedding_function.embed_query(query), k
+        )
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1) / 2
+
+    def compact(self):
+        """Rewrite the vector file and sidecar without deleted rows."""
+        with self._lock:
+            live_rows = sorted(self._ids)
+            matrix = self._mapped_matrix()
+            tmp_path = self.vectors_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(live_rows), _SEARCH_BLOCK):
+                    block = matrix[live_rows[start : start + _SEARCH_BLOCK]]
+                    f.write(np.ascontiguousarray(block).tobytes())
+
+            self._matrix = None
+            self._conn.execute("DELETE FROM chunks WHERE deleted = 1")
+            # Renumber rows in order; shift up first to avoid primary key clashes
+            offset = self._row_count
+            self._conn.execute("UPDATE chunks SET row = row + ?", (offset,))
+            self._conn.executemany(
+                "UPDATE chunks SET row = ? WHERE row = ?",
+                [(new, old + offset) for new, old in enumerate(live_rows)],
+            )
+            tmp_path.replace(self.vectors_path)
+            self._conn.commit()
+
+            self._ids = {new: self._ids[old] for new, old in enumerate(live_rows)}
+            self._rows = {chunk_id: row for row, chunk_id in self._ids.items()}
+            self._row_count = len(live_rows)
+            self._alive = np.ones(self._row_count, dtype=bool)
+
+            # Row numbers changed, so every quantized code is stale
+            self._codes = None
+            for quantization in QUANTIZATIONS:
+                (self.directory / f"codes.{quantization}").unlink(missing_ok=True)
+            if self.quantization:
+                self._sync_codes()
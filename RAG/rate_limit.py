@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """Token bucket limiting how many calls start per minute.
+
+    Up to `burst` calls may start at once; after that calls are spread out
+    evenly at `per_minute` calls per minute.
+    """
+
+    def __init__(self, per_minute, burst=1):
+        self.interval = 60.0 / per_minute
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a call may start."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) / self.interval
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.interval)
@@ -0,0 +1,412 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from main import LLM_MODEL, QueryTiming
+from tokens import count_tokens
+
+# Longest a question waits for others to share its embedding call, in seconds
+QUERY_BATCH_WAIT = 0.005
+QUERY_BATCH_SIZE = 64
+# LLM calls in flight at once across all requests
+GENERATION_CONCURRENCY = 16
+# Finished ingestion jobs kept for GET /jobs
+JOB_HISTORY = 100
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class QueryBatcher:
+    """Embed and retrieve concurrent questions together.
+
+    Questions that arrive within `max_wait` seconds of each other (up to
+    `max_batch_size`) share one `embed_documents` call and one
+    `retrieve_many` call, which run in a worker thread so the event loop
+    keeps accepting requests. `retrieve_batch(questions)` must return one
+    `(query_vector, documents)` pair per question.
+    """
+
+    def __init__(self, retrieve_batch, max_batch_size=QUERY_BATCH_SIZE, max_wait=QUERY_BATCH_WAIT):
+        self.retrieve_batch = retrieve_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.questions = 0
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def retrieve(self, question):
+        """Return `(query_vector, documents)` for one question."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((question, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Keep a reference, the loop only holds weak ones to tasks
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.questions += len(batch)
+        try:
+            results = await asyncio.to_thread(
+                self.retrieve_batch, [question for question, _ in batch]
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @property
+    def mean_batch_size(self):
+        return self.questions / self.batches if self.batches else 0.0
+
+
+@dataclass
+class IngestJob:
+    """A background ingestion of one PDF or one directory."""
+
+    id: str
+    path: str
+    status: str = "queued"
+    submitted: float = field(default_factory=time.time)
+    started: float = None
+    finished: float = None
+    result: dict = None
+    error: str = None
+
+
+class RAGServer:
+    """ASGI application serving one shared `RAGApplication`.
+
+    Routes:
+
+    * `POST /query` `{"question": ...}` answers with JSON
+    * `POST /query/stream` answers as server-sent events: `sources`, then
+      one `token` per generated token, then `done` with the latency breakdown
+    * `POST /ingest` `{"path": ...}` queues a PDF or directory for ingestion
+      and returns `202` with the job; follow it with `GET /jobs/<id>`
+    * `GET /jobs`, `GET /health` and `GET /metrics` (Prometheus text)
+
+    Query embeddings and retrieval are micro-batched across concurrent
+    requests by a `QueryBatcher`, at most `generation_concurrency` LLM calls
+    run at once, and ingestion jobs run one after the other in a background
+    thread holding `app.write_lock`, so queries keep being served meanwhile.
+
+        uvicorn.run(RAGServer(RAGApplication()), port=8000)
+    """
+
+    def __init__(
+        self,
+        app,
+        batch_size=QUERY_BATCH_SIZE,
+        batch_wait=QUERY_BATCH_WAIT,
+        generation_concurrency=GENERATION_CONCURRENCY,
+        ingest_workers=None,
+    ):
+        self.app = app
+        self.batcher = QueryBatcher(self._retrieve_batch, batch_size, batch_wait)
+        self.generation_concurrency = generation_concurrency
+        self.ingest_workers = ingest_workers
+        self.jobs = OrderedDict()
+        self._generation = None
+        self._chain_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+        self._routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+            ("GET", "/jobs"): self.list_jobs,
+            ("POST", "/query"): self.query,
+            ("POST", "/query/stream"): self.query_stream,
+            ("POST", "/ingest"): self.ingest,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        try:
+            if method == "GET" and path.startswith("/jobs/"):
+                await self.get_job(send, path.removeprefix("/jobs/"))
+                return
+            handler = self._routes.get((method, path))
+            if handler is None:
+                raise HTTPError(404, f"No route for {method} {path}")
+            body = await self._read_body(receive) if method == "POST" else None
+            await handler(send, body)
+        except HTTPError as e:
+            await self._send_json(send, {"error": str(e)}, e.status)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        try:
+            body = json.loads(b"".join(chunks) or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return body
+
+    async def _send_json(self, send, payload, status=200):
+        body = json.dumps(payload).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    # Queries
+
+    def _retrieve_batch(self, questions):
+        """Embed a batch of questions in one call and retrieve for all of them."""
+        app = self.app
+        if app.qa_chain is None:
+            with self._chain_lock:
+                if app.qa_chain is None:
+                    if app.vectorstore is None:
+                        raise HTTPError(409, "No documents loaded. Ingest a PDF first.")
+                    app._initialize_qa_chain()
+
+        with app.metrics.stage("query_embedding", queries=len(questions)):
+            query_vectors = app.embeddings.embed_documents(questions)
+        documents = app.qa_chain.retriever.retrieve_many(questions, query_vectors)
+        return list(zip(query_vectors, documents))
+
+    def _question(self, body):
+        question = str(body.get("question", "")).strip()
+        if not question:
+            raise HTTPError(400, 'Expected {"question": "..."}')
+        return question
+
+    async def _answer_events(self, question):
+        """Yield `(event, data)` pairs for one question, like
+        `RAGApplication.stream_answer` but without blocking the event loop."""
+        app = self.app
+        if self._generation is None:
+            self._generation = asyncio.Semaphore(self.generation_concurrency)
+
+        start = time.perf_counter()
+        timing = QueryTiming(question=question)
+        cache_version = app.answer_cache.version
+
+        query_vector, source_docs = await self.batcher.retrieve(question)
+        with app.metrics.stage("answer_cache") as counts:
+            cached = app.answer_cache.get(query_vector)
+            counts["hits" if cached is not None else "misses"] = 1
+        timing.retrieval_ms = (time.perf_counter() - start) * 1000
+
+        if cached is not None:
+            timing.cached = True
+            yield "sources", cached["source_documents"]
+            timing.first_token_ms = (time.perf_counter() - start) * 1000
+            yield "token", cached["answer"]
+        else:
+            yield "sources", source_docs
+            messages = app._build_messages(question, source_docs)
+            tokens = []
+            async with self._generation:
+                with app.metrics.stage("generation", questions=1) as counts:
+                    async for chunk in app.llm.astream(messages):
+                        if not chunk.content:
+                            continue
+                        if not tokens:
+                            timing.first_token_ms = (time.perf_counter() - start) * 1000
+                        tokens.append(chunk.content)
+                        yield "token", chunk.content
+                    counts["tokens"] = count_tokens("".join(tokens), LLM_MODEL)
+            app.answer_cache.put(
+                question, query_vector, "".join(tokens), source_docs, cache_version
+            )
+
+        timing.total_ms = (time.perf_counter() - start) * 1000
+        app.query_timings.append(timing)
+        yield "done", timing
+
+    @staticmethod
+    def _sources(documents):
+        return [
+            {
+                "source": doc.metadata.get("source"),
+                "page": doc.metadata.get("page"),
+                "chunk_id": doc.metadata.get("chunk_id"),
+            }
+            for doc in documents
+        ]
+
+    async def query(self, send, body):
+        question = self._question(body)
+        tokens = []
+        async for event, data in self._answer_events(question):
+            if event == "sources":
+                sources = self._sources(data)
+            elif event == "token":
+                tokens.append(data)
+            else:
+                timing = asdict(data)
+        await self._send_json(
+            send,
+            {"question": question, "answer": "".join(tokens), "sources": sources, "timing": timing},
+        )
+
+    async def query_stream(self, send, body):
+        question = self._question(body)
+        events = self._answer_events(question)
+        # Retrieval errors (e.g. an empty store) still get a proper status code
+        first = await anext(events)
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                ],
+            }
+        )
+
+        async def send_event(event, data):
+            message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            await send({"type": "http.response.body", "body": message.encode(), "more_body": True})
+
+        try:
+            await send_event("sources", self._sources(first[1]))
+            async for event, data in events:
+                await send_event(event, asdict(data) if event == "done" else data)
+        except Exception as e:
+            await send_event("error", str(e))
+        await send({"type": "http.response.body", "body": b""})
+
+    # Ingestion
+
+    async def ingest(self, send, body):
+        path = str(body.get("path", "")).strip()
+        if not path:
+            raise HTTPError(400, 'Expected {"path": "..."}')
+        if not Path(path).exists():
+            raise HTTPError(400, f"{path} does not exist")
+
+        job = IngestJob(id=uuid.uuid4().hex[:12], path=path)
+        self.jobs[job.id] = job
+        while len(self.jobs) > JOB_HISTORY:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.finished is None:
+                break
+            self.jobs.popitem(last=False)
+
+        self._executor.submit(self._run_job, job)
+        await self._send_json(send, asdict(job), 202)
+
+    def _run_job(self, job):
+        app = self.app
+        job.status, job.started = "running", time.time()
+        try:
+            with app.write_lock:
+                if Path(job.path).is_dir():
+                    report = app.ingest_directory(job.path, workers=self.ingest_workers)
+                    job.result = {
+                        "files": report.files,
+                        "succeeded": report.succeeded,
+                        "chunks": report.chunks,
+                        "embedded": report.embedded,
+                        "failures": report.failures,
+                    }
+                else:
+                    report = app.ingest_pdf_streaming(job.path)
+                    job.result = {
+                        "embedded": report.chunks,
+                        "failed_chunks": report.failed_chunks,
+                    }
+            job.status = "done"
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.finished = time.time()
+
+    async def get_job(self, send, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPError(404, f"Unknown job {job_id}")
+        await self._send_json(send, asdict(job))
+
+    async def list_jobs(self, send, body):
+        await self._send_json(send, [asdict(job) for job in self.jobs.values()])
+
+    # Status
+
+    async def health(self, send, body):
+        await self._send_json(
+            send,
+            {
+                "status": "ok",
+                "vectorstore": self.app.get_vectorstore_info(),
+                "query_batches": self.batcher.batches,
+                "mean_query_batch_size": self.batcher.mean_batch_size,
+                "jobs_running": sum(job.status == "running" for job in self.jobs.values()),
+            },
+        )
+
+    async def metrics(self, send, body):
+        text = self.app.metrics.to_prometheus().encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain; version=0.0.4")],
+            }
+        )
+        await send({"type": "http.response.body", "body": text})
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+import pytest
+import tiktoken
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import token_splitter  # noqa: E402
+from token_splitter import TiktokenSplitter  # noqa: E402
+
+# One token per byte, so the tests don't need to download a vocabulary
+BYTE_ENCODING = tiktoken.Encoding(
+    "bytes", pat_str=r"[\s\S]", mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={}
+)
+
+
+@pytest.fixture(autouse=True)
+def byte_tokens(monkeypatch):
+    monkeypatch.setattr(token_splitter, "get_encoding", lambda model: BYTE_ENCODING)
+    monkeypatch.setattr(token_splitter, "token_byte_lengths", lambda model: [1] * 256)
+
+
+def overlap(previous, chunk):
+    """Length of the longest end of `previous` that `chunk` starts with."""
+    return max((n for n in range(1, len(chunk) + 1) if previous.endswith(chunk[:n])), default=0)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("https://example.com/" + "path/segment-" * 10, 10),
+        # 3 bytes per character: the overlap is cut back to a whole character
+        ("東京都の天気は晴れです" * 5, 3),
+    ],
+    ids=["url", "cjk"],
+)
+def test_keeps_overlap_without_spaces(text, expected):
+    chunks = TiktokenSplitter(chunk_size=30, chunk_overlap=10).split_text(text)
+
+    assert len(chunks) > 2
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert overlap(previous, chunk) >= expected
+    assert chunks[-1].endswith(text[-5:])
+
+
+def test_overlap_starts_at_a_word():
+    text = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu"
+    chunks = TiktokenSplitter(chunk_size=30, chunk_overlap=12).split_text(text)
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.split()[0] in previous.split()
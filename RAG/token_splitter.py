@@ -0,0 +1,132 @@
+from bisect import bisect_left
+from itertools import accumulate
+
+from langchain_core.documents import Document
+
+from tokens import get_encoding, token_byte_lengths
+
+# Byte patterns a chunk prefers to end after, best first, each with the
+# offset of the cut within the match: paragraph, line, sentence, word
+_BOUNDARIES = (
+    ((b"\n\n",), 2),
+    ((b"\n",), 1),
+    ((b". ", b"! ", b"? "), 1),
+    ((b" ",), 0),
+)
+
+
+def _is_continuation(byte):
+    """True for the 2nd..4th byte of a UTF-8 encoded character."""
+    return byte & 0xC0 == 0x80
+
+
+class TiktokenSplitter:
+    """Split text into chunks measured in embedding-model tokens.
+
+    Each text is encoded once with tiktoken; chunk boundaries are then picked
+    on the token byte offsets in a single left-to-right pass, without
+    decoding. A chunk holds at most `chunk_size` tokens (as counted in its
+    page) and, like `RecursiveCharacterTextSplitter`, prefers to end at a
+    paragraph break, then a line break, a sentence end and finally a word
+    boundary, looking back at most `boundary_window` tokens. Consecutive
+    chunks share about `chunk_overlap` tokens.
+
+    `split_documents` keeps each document's metadata and adds the chunk's
+    `token_count`, which later stages use instead of re-encoding the text.
+    """
+
+    def __init__(
+        self,
+        chunk_size=256,
+        chunk_overlap=50,
+        model="text-embedding-3-small",
+        boundary_window=None,
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.model = model
+        self.boundary_window = boundary_window or max(1, chunk_size // 5)
+
+    def _chunk_end(self, data, offsets, start, limit):
+        """Best token index to end a chunk that starts at `start`.
+
+        Boundaries are searched in the bytes of the last `boundary_window`
+        tokens (newlines are often part of punctuation tokens, so token starts
+        alone would miss them) and the cut is moved to the next token start.
+        """
+        if limit == len(offsets) - 1:
+            return limit
+
+        lowest = max(start + 1, limit - self.boundary_window)
+        low, high = offsets[lowest], offsets[limit]
+        for patterns, cut in _BOUNDARIES:
+            found = max(
+                data.rfind(pattern, low, high + len(pattern) - cut) for pattern in patterns
+            )
+            if found != -1:
+                return bisect_left(offsets, found + cut, lowest, limit)
+        return limit
+
+    def _next_start(self, data, offsets, start, end):
+        """Where the next chunk starts: `chunk_overlap` tokens back, moved
+        forward to the start of a word if there is one (text without spaces,
+        like CJK or a URL, keeps the overlap as is)."""
+        position = max(start + 1, end - self.chunk_overlap)
+        found = data.find(b" ", offsets[position], offsets[end])
+        if found == -1:
+            return position
+        return bisect_left(offsets, found, position, end)
+
+    def _spans(self, text, tokens):
+        """Yield `(chunk_text, token_count)` for one encoded text."""
+        if not tokens:
+            return
+
+        data = text.encode("utf-8")
+        # Byte offset of every token, from a per-vocabulary length table
+        lengths = token_byte_lengths(self.model)
+        offsets = [0, *accumulate(map(lengths.__getitem__, tokens))]
+
+        start = 0
+        while start < len(tokens):
+            end = self._chunk_end(
+                data, offsets, start, min(start + self.chunk_size, len(tokens))
+            )
+
+            # Tokens may split a multi-byte character; cut before that character
+            low, high = offsets[start], offsets[end]
+            while low > 0 and _is_continuation(data[low]):
+                low -= 1
+            while high < len(data) and _is_continuation(data[high]):
+                high -= 1
+            chunk = data[low:high].decode("utf-8").strip()
+            if chunk:
+                yield chunk, end - start
+
+            if end == len(tokens):
+                break
+            start = self._next_start(data, offsets, start, end)
+
+    def split_text(self, text):
+        """Split a text into chunk strings."""
+        tokens = get_encoding(self.model).encode_ordinary(text)
+        return [chunk for chunk, _ in self._spans(text, tokens)]
+
+    def split_documents(self, documents):
+        """Split documents, copying each one's metadata onto its chunks."""
+        documents = list(documents)
+        encoding = get_encoding(self.model)
+        texts = [doc.page_content for doc in documents]
+        # tiktoken encodes a batch on its own threads, outside the GIL
+        encoded = (
+            encoding.encode_ordinary_batch(texts)
+            if len(texts) > 1
+            else map(encoding.encode_ordinary, texts)
+        )
+        return [
+            Document(page_content=chunk, metadata={**doc.metadata, "token_count": count})
+            for doc, tokens in zip(documents, encoded)
+            for chunk, count in self._spans(doc.page_content, tokens)
+        ]
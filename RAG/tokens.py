@@ -0,0 +1,31 @@
+from functools import lru_cache
+
+import tiktoken
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model="text-embedding-3-small"):
+    """Return the (cached) tiktoken encoding used by an OpenAI model."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=None)
+def token_byte_lengths(model="text-embedding-3-small"):
+    """UTF-8 length of every token of a model's encoding, indexed by token id."""
+    encoding = get_encoding(model)
+    lengths = []
+    for token in range(encoding.n_vocab):
+        try:
+            lengths.append(len(encoding.decode_single_token_bytes(token)))
+        except KeyError:
+            # Unused ids between the regular and the special tokens
+            lengths.append(0)
+    return lengths
+
+
+def count_tokens(text, model="text-embedding-3-small"):
+    """Count the tokens in a piece of text for the given model."""
+    return len(get_encoding(model).encode_ordinary(text))
@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ingestion import find_pdfs
+
+# Quiet period, in milliseconds, that ends a burst of file system events
+WATCH_DEBOUNCE_MS = 1600
+
+
+@dataclass
+class WatchStatus:
+    """What a `DirectoryWatcher` has done so far."""
+
+    running: bool = False
+    syncs: int = 0
+    indexed: int = 0
+    removed: int = 0
+    last_sync: float = None
+    last_sync_seconds: float = 0.0
+    failures: dict = field(default_factory=dict)
+
+
+class DirectoryWatcher:
+    """Keep the vectorstore in sync with the PDFs in a directory.
+
+    A background thread watches `directory` with watchfiles. Events are
+    debounced, so a burst (a copy in progress, a batch of saves) becomes one
+    sync once the directory has been quiet for `debounce_ms`. Each sync only
+    touches the PDFs that were added, changed or deleted: new and changed
+    files are streamed through `ingest_pdf_streaming`, which skips unchanged
+    chunks, and deleted files have their chunks removed. Writes hold
+    `app.write_lock`, while questions keep being answered from the current
+    store.
+
+    With `initial_sync`, PDFs that changed while nobody was watching are
+    picked up first: PDFs whose modification time or size changed are
+    ingested (unchanged chunks are skipped) and sources under it that no
+    longer exist are removed.
+    """
+
+    def __init__(
+        self,
+        app,
+        directory,
+        recursive=True,
+        debounce_ms=WATCH_DEBOUNCE_MS,
+        initial_sync=True,
+        workers=None,
+    ):
+        if not Path(directory).is_dir():
+            raise ValueError(f"{directory} is not a directory")
+        self.app = app
+        self.directory = directory
+        self.recursive = recursive
+        self.debounce_ms = debounce_ms
+        self.initial_sync = initial_sync
+        self.workers = workers
+        self.status = WatchStatus()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start watching in a daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError("Watcher already started")
+        self._thread = threading.Thread(
+            target=self._run, name=f"watch:{self.directory}", daemon=True
+        )
+        self.status.running = True
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """Stop watching, waiting for a sync in progress to finish."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.status.running = False
+
+    def _source(self, path):
+        """Map a path reported by watchfiles (always absolute) to the form
+        `find_pdfs` gives it, which is what chunks are stored under."""
+        directory = Path(self.directory)
+        for root in (directory.absolute(), directory.resolve()):
+            if Path(path).is_relative_to(root):
+                return str(directory / Path(path).relative_to(root))
+        return path
+
+    def _is_pdf(self, change, path):
+        return path.lower().endswith(".pdf")
+
+    def _run(self):
+        from watchfiles import watch
+
+        try:
+            if self.initial_sync:
+                self.sync_directory()
+            for changes in watch(
+                self.directory,
+                watch_filter=self._is_pdf,
+                debounce=self.debounce_ms,
+                recursive=self.recursive,
+                stop_event=self._stop_event,
+            ):
+                self.sync_paths({self._source(path) for _, path in changes})
+        except Exception as e:
+            print(f"❌ Stopped watching {self.directory}: {e}")
+        finally:
+            self.status.running = False
+
+    def sync_directory(self):
+        """Ingest the whole directory and drop sources that disappeared."""
+        start = time.perf_counter()
+        with self.app.write_lock:
+            report = self.app.ingest_directory(
+                self.directory,
+                workers=self.workers,
+                recursive=self.recursive,
+                skip_unchanged=True,
+            )
+            # Compare absolute paths: for "." the stored sources look like "a.pdf"
+            root = os.path.abspath(self.directory)
+            present = {
+                os.path.abspath(path)
+                for path in find_pdfs(self.directory, recursive=self.recursive)
+            }
+            removed = 0
+            for source in self.app.stored_sources():
+                path = os.path.abspath(source)
+                if os.path.commonpath([root, path]) == root and path not in present:
+                    removed += self.app.remove_source(source)
+
+        self.status.failures.update(report.failures)
+        self._finish_sync(report.succeeded, removed, start)
+
+    def sync_paths(self, paths):
+        """Re-index the given PDFs, or remove them if they no longer exist.
+
+        Events are not replayed one by one: whatever happened to a path
+        during the burst, its current state on disk is what gets indexed.
+        """
+        start = time.perf_counter()
+        indexed = removed = 0
+        with self.app.write_lock:
+            for path in sorted(paths):
+                try:
+                    if Path(path).is_file():
+                        self.app.ingest_pdf_streaming(path)
+                        indexed += 1
+                    else:
+                        removed += self.app.remove_source(path)
+                    self.status.failures.pop(path, None)
+                except Exception as e:
+                    # A file still being written fails to parse; its next
+                    # change event retries it
+                    self.status.failures[path] = str(e)
+                    print(f"❌ Could not index {path}: {e}")
+
+        self._finish_sync(indexed, removed, start)
+
+    def _finish_sync(self, indexed, removed, start):
+        status = self.status
+        status.syncs += 1
+        status.indexed += indexed
+        status.removed += removed
+        status.last_sync = time.time()
+        status.last_sync_seconds = time.perf_counter() - start
+        print(
+            f"👀 Synced {self.directory}: {indexed} PDFs indexed, {removed} chunks removed "
+            f"in {status.last_sync_seconds:.1f}s"
+        )
+
+    def describe(self):
+        """One-line summary for the CLI."""
+        status = self.status
+        state = "watching" if status.running else "stopped"
+        line = (
+            f"{state} {self.directory}: {status.syncs} syncs, {status.indexed} PDFs indexed, "
+            f"{status.removed} chunks removed"
+        )
+        if status.last_sync is not None:
+            line += f", last sync {time.time() - status.last_sync:.0f}s ago"
+        if status.failures:
+            line += f", {len(status.failures)} failing"
+        return line
@@ -1,12 +1,13 @@
+import argparse
 import os
+import sys
 from datetime import datetime
-import requests
-import pytz
+from pathlib import Path
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from langgraph.prebuilt import create_react_agent
@@ -14,6 +15,12 @@ from langgraph.checkpoint.memory import MemorySaver
 
 from pydantic import BaseModel, Field
 
+# The weather client and timezone resolver are shared with the other agents, from the repo root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from shared.timezones import timezone_resolver, unknown_timezone_message
+from shared.tracing import CLI_EXPORTERS, configure_tracing, traced_config, tracing_enabled
+from shared.weather import format_weather_stats, weather_client
+
 load_dotenv()
 
 class WeatherInput(BaseModel):
@@ -22,42 +29,46 @@ class WeatherInput(BaseModel):
 
 class TimeInput(BaseModel):
     """Input schema for time tool"""
-    timezone: str = Field(default="local", description="The timezone (optional, defaults to local time). Examples: 'UTC', 'US/Eastern', 'Europe/London', 'Asia/Tokyo', or 'local' for system timezone")
+    timezone: str = Field(default="local", description="The timezone (optional, defaults to local time). Examples: 'UTC', 'US/Eastern', 'Europe/London', 'Asia/Tokyo', a city like 'Tokyo', an abbreviation like 'PST', an offset like 'UTC+5:30', or 'local' for system timezone")
+
+WEATHER_KEY_MISSING = "Weather API key not configured. Please set WEATHER_API_KEY environment variable."
 
-@tool("get_weather", args_schema=WeatherInput)
-def get_weather(location: str) -> str:
+def format_weather(location: str, data: dict) -> str:
+    """Format an OpenWeatherMap response for the model."""
+    temp = data['main']['temp']
+    description = data['weather'][0]['description']
+    humidity = data['main']['humidity']
+    return f"Weather in {location}: {temp}°C, {description}, humidity: {humidity}%"
+
+def _get_weather(location: str) -> str:
     """Get current weather information for a city."""    
     try:
-        api_key = os.getenv("WEATHER_API_KEY")
-        if not api_key:
-            return "Weather API key not configured. Please set WEATHER_API_KEY environment variable."
-        
-        base_url = "http://api.openweathermap.org/data/2.5/weather"
-        params = {
-            "q": location,
-            "appid": api_key,
-            "units": "imperial"
-        }
+        if not weather_client.api_key:
+            return WEATHER_KEY_MISSING
         
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if response.status_code == 200:
-            temp = data['main']['temp']
-            description = data['weather'][0]['description']
-            humidity = data['main']['humidity']
-            return f"Weather in {location}: {temp}°C, {description}, humidity: {humidity}%"
-        else:
-            return f"Could not get weather for {location}. Error: {data.get('message', 'Unknown error')}"
+        # Pooled, cached and de-duplicated OpenWeatherMap lookup
+        return format_weather(location, weather_client.current(location))
     except Exception as e:
         return f"Error fetching weather: {str(e)}"
 
+async def _aget_weather(location: str) -> str:
+    """Async `_get_weather`, on the shared aiohttp session."""
+    try:
+        if not weather_client.api_key:
+            return WEATHER_KEY_MISSING
+        
+        return format_weather(location, await weather_client.acurrent(location))
+    except Exception as e:
+        return f"Error fetching weather: {str(e) or type(e).__name__}"
+
+# ainvoke/astream await the coroutine instead of running `func` in a thread
+get_weather = StructuredTool.from_function(
+    func=_get_weather, coroutine=_aget_weather, name="get_weather", args_schema=WeatherInput
+)
 
 
-@tool("get_current_time", args_schema=TimeInput)
-def get_current_time(timezone: str = "local") -> str:
+
+def _get_current_time(timezone: str = "local") -> str:
     """Get the current time and date in the specified timezone"""
     try:
         if timezone.lower() == "local":
@@ -65,29 +76,12 @@ def get_current_time(timezone: str = "local") -> str:
             current_time = datetime.now()
             tz_name = "Local System Time"
         else:
-            # Convert to specified timezone
-            try:
-                tz = pytz.timezone(timezone)
-                current_time = datetime.now(tz)
-                tz_name = timezone
-            except pytz.UnknownTimeZoneError:
-                timezone_map = {
-                    'EST': 'US/Eastern',
-                    'PST': 'US/Pacific',
-                    'CST': 'US/Central',
-                    'MST': 'US/Mountain',
-                    'GMT': 'GMT',
-                    'BST': 'Europe/London',
-                    'CET': 'Europe/Paris',
-                    'JST': 'Asia/Tokyo'
-                }
-                
-                if timezone.upper() in timezone_map:
-                    tz = pytz.timezone(timezone_map[timezone.upper()])
-                    current_time = datetime.now(tz)
-                    tz_name = timezone_map[timezone.upper()]
-                else:
-                    return f"Unknown timezone: {timezone}. Please use standard timezone names like 'UTC', 'US/Eastern', 'Europe/London', etc."
+            # IANA names, cities, abbreviations and offsets, resolved once and cached
+            resolved = timezone_resolver.timezone(timezone)
+            if resolved is None:
+                return unknown_timezone_message(timezone)
+            tz_name, tz = resolved
+            current_time = datetime.now(tz)
         
         time_info = f"""Current Time Information:
 Date: {current_time.strftime('%Y-%m-%d')}
@@ -100,38 +94,36 @@ UTC Offset: {current_time.strftime('%z') if hasattr(current_time, 'tzinfo') and
     except Exception as e:
         return f"Error getting current time: {str(e)}"
 
+async def _aget_current_time(timezone: str = "local") -> str:
+    """Async `_get_current_time`; it does no I/O, so it just runs inline."""
+    return _get_current_time(timezone)
 
+get_current_time = StructuredTool.from_function(
+    func=_get_current_time, coroutine=_aget_current_time, name="get_current_time", args_schema=TimeInput
+)
 
-def run_simple_react_agent():
-    """
-    Run the simple ReAct agent in an interactive loop.
-    """
-    print("🤖 LangGraph Simple ReAct Agent (using create_react_agent)")
-    print("=" * 60)
-    print("This agent demonstrates the streamlined create_react_agent method.")
-    print("It can help you with:")
-    print("• Weather information (e.g., 'What's the weather in London?')")
-    print("• Current time (e.g., 'What time is it?')")
-    print("• Type 'quit' to exit")
-    print("=" * 60)
-    
-    # Create the agent
+
+def create_simple_react_agent(llm=None, tools=None, debug=True):
     """
     Create a ReAct agent using LangGraph's create_react_agent method.
     
     This is much simpler than manually building the StateGraph but offers
-    less customization compared to the manual approach.
+    less customization compared to the manual approach. `llm` and `tools`
+    replace `ChatOpenAI` and the real tools, e.g. with stand-ins for
+    benchmarks; `debug=False` stops every step from being printed.
     """
     
     # Initialize the LLM
-    llm = ChatOpenAI(
+    llm = llm or ChatOpenAI(
         model="gpt-4o-mini",
         temperature=0,
-        api_key=os.getenv("OPENAI_API_KEY")
+        api_key=os.getenv("OPENAI_API_KEY"),
+        # Token counts for traces, also when streaming
+        stream_usage=True,
     )
     
     # Define our tools
-    tools = [get_weather, get_current_time]
+    tools = tools or [get_weather, get_current_time]
     
     # Create a custom prompt for the ReAct agent
     prompt = ChatPromptTemplate.from_messages([
@@ -157,16 +149,60 @@ If you need to use a tool, call it and then provide a response based on the resu
     # - Tool routing
     # - Message handling
     # - Graph constructionclear
-    agent = create_react_agent(
+    return create_react_agent(
         model=llm,
         tools=tools,
         prompt=prompt,
         checkpointer=MemorySaver(),
-        debug=True,
+        debug=debug,
     )
+
+
+async def aask(agent, user_input, thread_id):
+    """Ask the agent one question asynchronously, in conversation `thread_id`.
     
-    # Configuration for the agent (enables memory)
-    config = {"configurable": {"thread_id": "simple-react-agent-session"}}
+    The model and tools are awaited, so hundreds of conversations can run
+    concurrently on one event loop.
+    """
+    response = await agent.ainvoke(
+        {"messages": [HumanMessage(content=user_input)]},
+        config=traced_config({"configurable": {"thread_id": thread_id}}),
+    )
+    return response["messages"][-1].content
+
+
+async def astream(agent, user_input, thread_id):
+    """Yield the messages of one turn (tool calls, tool results and the
+    answer) as the agent produces them."""
+    async for update in agent.astream(
+        {"messages": [HumanMessage(content=user_input)]},
+        config=traced_config({"configurable": {"thread_id": thread_id}}),
+        stream_mode="updates",
+    ):
+        for node_update in update.values():
+            for message in node_update.get("messages", []):
+                yield message
+
+
+def run_simple_react_agent():
+    """
+    Run the simple ReAct agent in an interactive loop.
+    """
+    print("🤖 LangGraph Simple ReAct Agent (using create_react_agent)")
+    print("=" * 60)
+    print("This agent demonstrates the streamlined create_react_agent method.")
+    print("It can help you with:")
+    print("• Weather information (e.g., 'What's the weather in London?')")
+    print("• Current time (e.g., 'What time is it?')")
+    print("• Type 'stats' to see weather cache hit rates")
+    print("• Type 'quit' to exit")
+    print("=" * 60)
+    
+    # Create the agent; when traced, spans replace the debug printout
+    agent = create_simple_react_agent(debug=not tracing_enabled())
+    
+    # Configuration for the agent (enables memory, and tracing if it's on)
+    config = traced_config({"configurable": {"thread_id": "simple-react-agent-session"}})
     
     while True:
         try:
@@ -176,6 +212,10 @@ If you need to use a tool, call it and then provide a response based on the resu
                 print("👋 Goodbye!")
                 break
             
+            if user_input.lower() == 'stats':
+                print(f"📊 Weather cache: {format_weather_stats()}")
+                continue
+            
             if not user_input:
                 continue
             
@@ -204,9 +244,22 @@ If you need to use a tool, call it and then provide a response based on the resu
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LangGraph Simple ReAct Agent")
+    parser.add_argument(
+        "--trace",
+        choices=CLI_EXPORTERS,
+        default=os.getenv("AGENT_TRACING"),
+        help="Trace agent runs with OpenTelemetry: print spans or send them over OTLP",
+    )
+    args = parser.parse_args()
+    
     if not os.getenv("OPENAI_API_KEY"):
         print("❌ Error: OPENAI_API_KEY not found in environment variables.")
         print("Please create a .env file with your OpenAI API key.")
         exit(1)
     
+    if args.trace:
+        configure_tracing(args.trace)
+        print(f"🔭 Tracing agent runs ({args.trace})")
+    
     run_simple_react_agent()
@@ -0,0 +1,129 @@
+"""Replay a batch of queries against a rate-limited model, with and without
+the scheduler.
+
+A `RateLimitedChatModel` stands in for gpt-4o: it answers 429 once more than
+`--rpm` requests or `--tpm` tokens arrive within `--period` seconds (a
+shortened "minute"). The same queries run three ways:
+
+* all at once with `asyncio.gather(aprocess_query)`
+* 16 at a time with a semaphore
+* through `process_queries`, with the token buckets and adaptive concurrency
+
+    python benchmarks/batch_benchmark.py --queries 300 --rpm 120 --tpm 20000 --period 5
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from shared.stand_ins import RateLimitedChatModel, stub_tools  # noqa: E402
+
+from main import ToolCallingAgent  # noqa: E402
+from rate_limiter import RateLimitedScheduler  # noqa: E402
+
+ERROR = "Sorry, I encountered an error"
+
+
+def build(args):
+    model = RateLimitedChatModel(
+        tool_calls=[("get_weather", {"location": "{input}"})],
+        latency=args.model_latency,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        period=args.period,
+    )
+    return model, ToolCallingAgent("stub", llm=model, tools=stub_tools(args.tool_latency), verbose=False)
+
+
+def summarize(queries, answers, model, seconds):
+    in_order = all(
+        answer.startswith(ERROR) or f"Weather in {query}:" in answer for query, answer in zip(queries, answers)
+    )
+    answered = sum(not answer.startswith(ERROR) for answer in answers)
+    return {
+        "answered": answered,
+        "failed": len(answers) - answered,
+        "seconds": seconds,
+        "answered_per_second": answered / seconds,
+        "model_calls": model.counts["calls"],
+        "model_429s": model.counts["rate_limited"],
+        "in_order": in_order,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--rpm", type=int, default=120, help="Model requests per period")
+    parser.add_argument("--tpm", type=int, default=20_000, help="Model tokens per period")
+    parser.add_argument("--period", type=float, default=5.0, help="Rate-limit window in seconds")
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    parser.add_argument("--tool-latency", type=float, default=0.05)
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    queries = [f"City {i}" for i in range(args.queries)]
+    results = {}
+
+    model, agent = build(args)
+    start = time.perf_counter()
+    answers = asyncio.run(_gather(agent, queries))
+    results["gather"] = summarize(queries, answers, model, time.perf_counter() - start)
+
+    model, agent = build(args)
+    start = time.perf_counter()
+    answers = asyncio.run(_gather(agent, queries, limit=args.max_concurrency))
+    results["semaphore"] = summarize(queries, answers, model, time.perf_counter() - start)
+
+    model, agent = build(args)
+    scheduler = RateLimitedScheduler(
+        rpm=args.rpm, tpm=args.tpm, period=args.period, max_concurrency=args.max_concurrency
+    )
+    start = time.perf_counter()
+    answers = agent.process_queries(queries, scheduler)
+    results["process_queries"] = summarize(queries, answers, model, time.perf_counter() - start)
+    results["process_queries"].update(
+        {key: value for key, value in scheduler.stats().items() if key in ("retries", "peak_concurrency")}
+    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    # Two model calls per query, so the limits allow at most this many per second
+    ceiling = min(args.rpm / 2, args.tpm / (2 * _tokens_per_call(agent, queries[0]))) / args.period
+    print(
+        f"📊 {args.queries} queries, model limited to {args.rpm} requests / {args.tpm} tokens "
+        f"per {args.period:g}s (≈{ceiling:.1f} queries/s at best)"
+    )
+    for name, result in results.items():
+        print(f"\n{name}")
+        for metric, value in result.items():
+            print(f"  {metric:<22} {value:10.2f}" if isinstance(value, float) else f"  {metric:<22} {value!s:>10}")
+
+
+async def _gather(agent, queries, limit=None):
+    semaphore = asyncio.Semaphore(limit or len(queries))
+
+    async def one(query):
+        async with semaphore:
+            return await agent.aprocess_query(query)
+
+    return await asyncio.gather(*(one(query) for query in queries))
+
+
+def _tokens_per_call(agent, query):
+    """Rough prompt size of one model call, as the stand-in counts it."""
+    messages = agent.prompt.format_messages(input=query, agent_scratchpad=[])
+    return sum(len(str(message.content)) for message in messages) // 4
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""How much the fast-path intent router saves on a realistic query mix.
+
+The same queries, a mix of plain lookups ("what time is it in Tokyo") and
+questions that need the model, go through the agent with and without the
+router. A scripted model stands in for gpt-4o, taking `--model-latency`
+seconds per call, and stub tools take `--tool-latency`:
+
+    python benchmarks/intent_router_benchmark.py --model-latency 0.8 --tool-latency 0.1
+
+`--show-routes` prints which queries took the fast path.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from shared.stand_ins import ScriptedToolCallingModel, stub_tools  # noqa: E402
+
+from intent_router import format_router_stats  # noqa: E402
+from main import ToolCallingAgent  # noqa: E402
+
+QUERIES = [
+    "What time is it in Tokyo?",
+    "weather in Paris",
+    "What's the weather in London, UK?",
+    "what time is it",
+    "Tokyo time",
+    "How's the weather in New York right now?",
+    "What's the weather in London and what time is it there?",
+    "Should I take an umbrella in Seattle today?",
+    "What's the time difference between Paris and Tokyo?",
+    "Is it a good time to call my friend in Sydney?",
+    "current time in PST",
+    "Berlin weather",
+    "Will it be warmer in Madrid tomorrow?",
+    "What time is it in Narnia?",
+    "Tell me the temperature in Cairo",
+    "Temperature in Cairo",
+]
+
+
+def run(queries, args, fast_path):
+    agent = ToolCallingAgent(
+        "stub",
+        llm=ScriptedToolCallingModel(
+            tool_calls=[("get_weather", {"location": "{input}"})], latency=args.model_latency
+        ),
+        tools=stub_tools(args.tool_latency),
+        verbose=False,
+        fast_path=fast_path,
+    )
+    latencies = []
+    # process_query prints its progress; keep that out of the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in queries:
+            start = time.perf_counter()
+            agent.process_query(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return agent, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-latency", type=float, default=0.8)
+    parser.add_argument("--tool-latency", type=float, default=0.1)
+    parser.add_argument("--show-routes", action="store_true", help="Print the route of each query")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    _, agent_only = run(QUERIES, args, fast_path=False)
+    routed_agent, routed = run(QUERIES, args, fast_path=True)
+    router = routed_agent.router
+
+    results = {
+        "queries": len(QUERIES),
+        "agent_total_seconds": sum(agent_only) / 1000,
+        "routed_total_seconds": sum(routed) / 1000,
+        "agent_median_ms": statistics.median(agent_only),
+        "routed_median_ms": statistics.median(routed),
+        **router.stats(),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    if args.show_routes:
+        for query in QUERIES:
+            intent = router.match(query)
+            route = f"⚡ {intent.tool}({intent.args})" if intent else "🤖 agent"
+            print(f"{query:<60} {route}")
+        print()
+
+    print(
+        f"📊 {len(QUERIES)} queries, model {args.model_latency * 1000:.0f} ms per call, "
+        f"tools {args.tool_latency * 1000:.0f} ms"
+    )
+    print(
+        f"  agent only:  {results['agent_total_seconds']:.1f}s total, "
+        f"median {results['agent_median_ms']:.0f} ms"
+    )
+    print(
+        f"  with router: {results['routed_total_seconds']:.1f}s total, "
+        f"median {results['routed_median_ms']:.0f} ms"
+    )
+    print(f"  {format_router_stats(router)}")
+
+
+if __name__ == "__main__":
+    main()
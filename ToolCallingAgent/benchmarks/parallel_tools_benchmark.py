@@ -0,0 +1,116 @@
+"""End-to-end latency of multi-tool queries, sequential vs parallel tools.
+
+The agent runs with a scripted model that asks for 1..N tool calls in one
+turn and stub tools that sleep for `--tool-latency` seconds. Each query is
+answered by the stock `AgentExecutor` (tools one after another) and by
+`ParallelAgentExecutor` (tools concurrently), sync and async. A last run
+adds one tool that hangs, to show the per-tool timeout:
+
+    python benchmarks/parallel_tools_benchmark.py --tool-latency 0.5 --model-latency 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from langchain.agents import AgentExecutor  # noqa: E402
+
+from shared.stand_ins import ScriptedToolCallingModel, stub_tools  # noqa: E402
+
+from main import ToolCallingAgent  # noqa: E402
+
+CALLS = [
+    ("get_weather", {"location": "London, UK"}),
+    ("get_current_time", {"timezone": "Europe/London"}),
+    ("get_weather", {"location": "Paris, France"}),
+    ("get_current_time", {"timezone": "Europe/Paris"}),
+]
+
+
+def build(tool_calls, args, latencies=None, tool_timeouts=None):
+    """The agent's parallel executor and a stock executor around the same agent."""
+    agent = ToolCallingAgent(
+        "stub",
+        llm=ScriptedToolCallingModel(tool_calls=tool_calls, latency=args.model_latency),
+        tools=stub_tools(args.tool_latency, latencies),
+        tool_timeouts=tool_timeouts,
+    )
+    # A timed-out tool finishes later; keep it from printing after the run
+    agent.agent_executor.verbose = False
+    sequential = AgentExecutor(agent=agent.agent, tools=agent.tools, max_iterations=3)
+    return sequential, agent.agent_executor
+
+
+def timed(executor, runs, use_async=False):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        if use_async:
+            output = asyncio.run(executor.ainvoke({"input": "question"}))
+        else:
+            output = executor.invoke({"input": "question"})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), output["output"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tool-latency", type=float, default=0.5)
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    # The executors print every step; keep that out of the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        for count in range(1, len(CALLS) + 1):
+            sequential, parallel = build(CALLS[:count], args)
+            results.append(
+                {
+                    "tool_calls": count,
+                    "sequential_ms": timed(sequential, args.runs)[0],
+                    "parallel_ms": timed(parallel, args.runs)[0],
+                    "parallel_async_ms": timed(parallel, args.runs, use_async=True)[0],
+                }
+            )
+
+        # One tool hangs far past its timeout; the turn still finishes
+        hang = args.tool_latency * 10
+        _, parallel = build(
+            CALLS[:2],
+            args,
+            latencies={"get_weather": hang},
+            tool_timeouts={"get_weather": args.tool_latency * 2},
+        )
+        timeout_ms, timeout_output = timed(parallel, 1)
+
+    if args.json:
+        print(json.dumps({"queries": results, "timeout_ms": timeout_ms}, indent=2))
+        return
+
+    print(
+        f"📊 tools take {args.tool_latency * 1000:.0f} ms, "
+        f"each model call {args.model_latency * 1000:.0f} ms (median of {args.runs})"
+    )
+    columns = list(results[0])
+    print("".join(f"{column:>20}" for column in columns))
+    for result in results:
+        print("".join(f"{result[column]:20.0f}" for column in columns))
+    print(
+        f"\n⏱️  get_weather hanging for {hang:.1f}s with a {args.tool_latency * 2:.1f}s timeout: "
+        f"answered in {timeout_ms:.0f} ms\n   {timeout_output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
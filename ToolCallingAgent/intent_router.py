@@ -0,0 +1,182 @@
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from shared.timezones import timezone_resolver  # noqa: E402
+
+# Words that make a query more than one plain lookup: several tools, a
+# forecast, a comparison or advice. Those go to the model.
+UNSURE_WORDS = re.compile(
+    r"\b(and|or|also|then|plus|vs|versus|compare|difference|between|tomorrow|yesterday|"
+    r"tonight|later|week|weekend|forecast|should|will|would|could|if|why|convert|ago|until)\b"
+)
+PLACE = r"(?P<place>[a-z][a-z .,'-]{0,40}?)"
+NOW = r"(?: right now| now| today| currently)?"
+# "in <place>" that isn't a place: the model can ask where the user is
+NOT_PLACES = re.compile(r"^(?:here|there|my|our|your|this|general|what|where|which|how)\b")
+
+# Places are only taken from "... in <place>": a bare "<place> weather" or
+# "<place> time" would also match "nice weather" or "christmas time"
+TIME_PATTERNS = [
+    re.compile(rf"what time is it{NOW}"),
+    re.compile(rf"(?:what(?:'s| is) the )?(?:current |local )?time(?: is it)?{NOW} in {PLACE}{NOW}"),
+    re.compile(rf"what time is it{NOW} in {PLACE}{NOW}"),
+    re.compile(rf"(?:current |local )?time in {PLACE}"),
+]
+WEATHER_PATTERNS = [
+    re.compile(
+        rf"(?:what(?:'s| is) the |how(?:'s| is) the )?(?:current )?(?:weather|temperature)"
+        rf"(?: like)?{NOW} in {PLACE}{NOW}"
+    ),
+]
+
+# Tool outputs that mean the lookup didn't work; the model can explain or retry
+FAILED_PREFIXES = ("Error", "Unknown timezone", "Weather API key not configured")
+
+TEMPLATES = {
+    "get_weather": "{result}",
+    "get_current_time": "Here is the current time in {place}:\n{result}",
+}
+
+
+@dataclass
+class Intent:
+    """A single tool call the router is confident answers the query."""
+
+    tool: str
+    args: Dict[str, str]
+    place: str = "your local timezone"
+
+
+@dataclass
+class RouterStats:
+    fast_path: int = 0
+    fallbacks: int = 0
+    fast_path_seconds: float = 0.0
+    agent_seconds: float = 0.0
+    by_tool: Dict[str, int] = field(default_factory=dict)
+
+
+class IntentRouter:
+    """Answers plain single-tool questions without the model.
+
+    "What time is it in Tokyo?" or "weather in Paris" need one tool call and
+    no reasoning, but through the agent they cost two model round trips (one
+    to pick the tool, one to phrase its result). The router matches such
+    queries against a few patterns, calls the tool itself and fills in a
+    template. It only answers when it is sure: anything with several parts,
+    a forecast or a comparison, a place it can't resolve to a timezone, or a
+    tool that reports an error returns None, and the agent takes over.
+
+    `stats()` reports how often the fast path was taken and the time it
+    saved, estimated from the agent's average latency on the other queries.
+    """
+
+    def __init__(self, tools, templates=None):
+        self.tools = {tool.name: tool for tool in tools}
+        self.templates = dict(TEMPLATES, **(templates or {}))
+        self._lock = threading.Lock()
+        self._stats = RouterStats()
+
+    def match(self, query) -> Optional[Intent]:
+        """The tool call for `query`, or None if the model should decide."""
+        text = " ".join(query.lower().split()).strip(" ?!.")
+        text = re.sub(r"^(?:hey|hi|please|ok|okay)[, ]+", "", text)
+        text = re.sub(r"[, ]+please$", "", text)
+        if not text or UNSURE_WORDS.search(text):
+            return None
+
+        if "get_current_time" in self.tools:
+            for pattern in TIME_PATTERNS:
+                found = pattern.fullmatch(text)
+                if not found:
+                    continue
+                place = found.groupdict().get("place")
+                if place is None:
+                    return Intent("get_current_time", {"timezone": "local"})
+                if NOT_PLACES.match(place):
+                    return None
+                # Exact names only: a fuzzy guess is the model's call
+                timezone = timezone_resolver.resolve(place.strip(" ,"), fuzzy=False)
+                if timezone is None:
+                    return None
+                return Intent("get_current_time", {"timezone": timezone}, place=timezone)
+
+        if "get_weather" in self.tools:
+            for pattern in WEATHER_PATTERNS:
+                found = pattern.fullmatch(text)
+                if found:
+                    place = found["place"].strip(" ,")
+                    if NOT_PLACES.match(place):
+                        return None
+                    # Keep the place as the user typed it, e.g. "London, UK"
+                    typed = re.search(re.escape(place), query, re.IGNORECASE)
+                    place = typed.group(0) if typed else place
+                    return Intent("get_weather", {"location": place}, place=place)
+        return None
+
+    def _answer(self, intent, result, start):
+        if result.startswith(FAILED_PREFIXES):
+            return None
+        with self._lock:
+            self._stats.fast_path += 1
+            self._stats.fast_path_seconds += time.perf_counter() - start
+            self._stats.by_tool[intent.tool] = self._stats.by_tool.get(intent.tool, 0) + 1
+        return self.templates[intent.tool].format(result=result, place=intent.place)
+
+    def answer(self, query) -> Optional[str]:
+        """Answer `query` directly, or return None to use the agent."""
+        start = time.perf_counter()
+        intent = self.match(query)
+        if intent is None:
+            return None
+        return self._answer(intent, str(self.tools[intent.tool].invoke(intent.args)), start)
+
+    async def aanswer(self, query) -> Optional[str]:
+        """Async `answer()`, awaiting the tool."""
+        start = time.perf_counter()
+        intent = self.match(query)
+        if intent is None:
+            return None
+        return self._answer(intent, str(await self.tools[intent.tool].ainvoke(intent.args)), start)
+
+    def record_agent(self, seconds):
+        """Count a query the agent answered, and how long it took."""
+        with self._lock:
+            self._stats.fallbacks += 1
+            self._stats.agent_seconds += seconds
+
+    def stats(self):
+        """Fast-path rate and latency; `saved_seconds` is None until the
+        agent has answered a query to compare with."""
+        with self._lock:
+            s = self._stats
+            queries = s.fast_path + s.fallbacks
+            fast_ms = s.fast_path_seconds / s.fast_path * 1000 if s.fast_path else 0.0
+            agent_ms = s.agent_seconds / s.fallbacks * 1000 if s.fallbacks else None
+            return {
+                "queries": queries,
+                "fast_path": s.fast_path,
+                "fallbacks": s.fallbacks,
+                "fast_path_rate": s.fast_path / queries if queries else 0.0,
+                "fast_path_ms": fast_ms,
+                "agent_ms": agent_ms,
+                "saved_seconds": None if agent_ms is None else s.fast_path * (agent_ms - fast_ms) / 1000,
+                "by_tool": dict(s.by_tool),
+            }
+
+
+def format_router_stats(router):
+    """One-line summary of `router.stats()` for the CLI."""
+    stats = router.stats()
+    saved = "n/a" if stats["saved_seconds"] is None else f"~{stats['saved_seconds']:.1f}s"
+    agent = "n/a" if stats["agent_ms"] is None else f"{stats['agent_ms']:.0f} ms"
+    return (
+        f"{stats['fast_path']}/{stats['queries']} queries on the fast path ({stats['fast_path_rate']:.0%}), "
+        f"{stats['fast_path_ms']:.0f} ms vs {agent} through the agent, {saved} saved"
+    )
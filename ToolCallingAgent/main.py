@@ -1,16 +1,36 @@
+import argparse
+import asyncio
+import json
 import os
-import requests
+import sys
+import time
 from datetime import datetime
-import pytz
+from pathlib import Path
 from dotenv import load_dotenv
 
-from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.agents import create_tool_calling_agent
 from langchain.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import MessagesPlaceholder
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
 
+# The weather client and timezone resolver are shared with the other agents, from the repo root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from shared.timezones import timezone_resolver, unknown_timezone_message
+from shared.tracing import CLI_EXPORTERS, configure_tracing, traced_config
+from shared.weather import format_weather_stats, weather_client
+
+from intent_router import IntentRouter, format_router_stats
+from parallel_executor import ParallelAgentExecutor
+from rate_limiter import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_RPM,
+    DEFAULT_TPM,
+    RateLimitedScheduler,
+    format_scheduler_stats,
+)
+
 load_dotenv()
 
 class WeatherInput(BaseModel):
@@ -19,52 +39,58 @@ class WeatherInput(BaseModel):
 
 class TimeInput(BaseModel):
     """Input schema for time tool"""
-    timezone: str = Field(default="local", description="The timezone (optional, defaults to local time). Examples: 'UTC', 'US/Eastern', 'Europe/London', 'Asia/Tokyo', or 'local' for system timezone")
+    timezone: str = Field(default="local", description="The timezone (optional, defaults to local time). Examples: 'UTC', 'US/Eastern', 'Europe/London', 'Asia/Tokyo', a city like 'Tokyo', an abbreviation like 'PST', an offset like 'UTC+5:30', or 'local' for system timezone")
+
+WEATHER_KEY_MISSING = "Weather API key not configured. Please set WEATHER_API_KEY environment variable."
 
-@tool("get_weather", args_schema=WeatherInput)
-def get_weather(location: str) -> str:
+def _get_weather(location: str) -> str:
     """Get current weather information for a specific location"""
     try:
-        api_key = os.getenv("WEATHER_API_KEY")
-        if not api_key:
-            return "Weather API key not configured. Please set WEATHER_API_KEY environment variable."
-        
-        base_url = "http://api.openweathermap.org/data/2.5/weather"
-        params = {
-            "q": location,
-            "appid": api_key,
-            "units": "imperial"
-        }
-        
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Extract relevant weather information
-        weather_info = {
-            "location": data["name"],
-            "country": data["sys"]["country"],
-            "temperature": data["main"]["temp"],
-            "feels_like": data["main"]["feels_like"],
-            "description": data["weather"][0]["description"],
-            "humidity": data["main"]["humidity"],
-            "wind_speed": data["wind"]["speed"]
-        }
-        
-        result = f"""Weather in {weather_info['location']}, {weather_info['country']}:
-Temperature: {weather_info['temperature']:.1f}°F (feels like {weather_info['feels_like']:.1f}°F)
-Conditions: {weather_info['description'].title()}
-Humidity: {weather_info['humidity']}%
-Wind Speed: {weather_info['wind_speed']} mph \n"""
+        if not weather_client.api_key:
+            return WEATHER_KEY_MISSING
         
-        return result
+        # Pooled, cached and de-duplicated OpenWeatherMap lookup
+        return format_weather(weather_client.current(location))
         
     except Exception as e:
         return f"Error getting weather: {str(e)}"
 
-@tool("get_current_time", args_schema=TimeInput)
-def get_current_time(timezone: str = "local") -> str:
+async def _aget_weather(location: str) -> str:
+    """Async `_get_weather`, on the shared aiohttp session"""
+    try:
+        if not weather_client.api_key:
+            return WEATHER_KEY_MISSING
+        
+        return format_weather(await weather_client.acurrent(location))
+        
+    except Exception as e:
+        return f"Error getting weather: {str(e) or type(e).__name__}"
+
+# ainvoke/astream await the coroutine instead of running `func` in a thread
+get_weather = StructuredTool.from_function(
+    func=_get_weather, coroutine=_aget_weather, name="get_weather", args_schema=WeatherInput
+)
+
+def format_weather(data: dict) -> str:
+    """Format an OpenWeatherMap response for the model"""
+    # Extract relevant weather information
+    weather_info = {
+        "location": data["name"],
+        "country": data["sys"]["country"],
+        "temperature": data["main"]["temp"],
+        "feels_like": data["main"]["feels_like"],
+        "description": data["weather"][0]["description"],
+        "humidity": data["main"]["humidity"],
+        "wind_speed": data["wind"]["speed"]
+    }
+    
+    return f"""Weather in {weather_info['location']}, {weather_info['country']}:
+Temperature: {weather_info['temperature']:.1f}°F (feels like {weather_info['feels_like']:.1f}°F)
+Conditions: {weather_info['description'].title()}
+Humidity: {weather_info['humidity']}%
+Wind Speed: {weather_info['wind_speed']} mph \n"""
+
+def _get_current_time(timezone: str = "local") -> str:
     """Get the current time and date in the specified timezone"""
     try:
         if timezone.lower() == "local":
@@ -72,29 +98,12 @@ def get_current_time(timezone: str = "local") -> str:
             current_time = datetime.now()
             tz_name = "Local System Time"
         else:
-            # Convert to specified timezone
-            try:
-                tz = pytz.timezone(timezone)
-                current_time = datetime.now(tz)
-                tz_name = timezone
-            except pytz.UnknownTimeZoneError:
-                timezone_map = {
-                    'EST': 'US/Eastern',
-                    'PST': 'US/Pacific',
-                    'CST': 'US/Central',
-                    'MST': 'US/Mountain',
-                    'GMT': 'GMT',
-                    'BST': 'Europe/London',
-                    'CET': 'Europe/Paris',
-                    'JST': 'Asia/Tokyo'
-                }
-                
-                if timezone.upper() in timezone_map:
-                    tz = pytz.timezone(timezone_map[timezone.upper()])
-                    current_time = datetime.now(tz)
-                    tz_name = timezone_map[timezone.upper()]
-                else:
-                    return f"Unknown timezone: {timezone}. Please use standard timezone names like 'UTC', 'US/Eastern', 'Europe/London', etc."
+            # IANA names, cities, abbreviations and offsets, resolved once and cached
+            resolved = timezone_resolver.timezone(timezone)
+            if resolved is None:
+                return unknown_timezone_message(timezone)
+            tz_name, tz = resolved
+            current_time = datetime.now(tz)
         
         time_info = f"""Current Time Information:
 Date: {current_time.strftime('%Y-%m-%d')}
@@ -107,19 +116,40 @@ UTC Offset: {current_time.strftime('%z') if hasattr(current_time, 'tzinfo') and
     except Exception as e:
         return f"Error getting current time: {str(e)}"
 
+async def _aget_current_time(timezone: str = "local") -> str:
+    """Async `_get_current_time`; it does no I/O, so it just runs inline"""
+    return _get_current_time(timezone)
+
+get_current_time = StructuredTool.from_function(
+    func=_get_current_time, coroutine=_aget_current_time, name="get_current_time", args_schema=TimeInput
+)
+
+# Seconds each tool may take before the model is told it timed out
+TOOL_TIMEOUTS = {
+    "get_weather": 15.0,
+    "get_current_time": 5.0,
+}
+
 class ToolCallingAgent:    
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, llm=None, tools=None, tool_timeouts=None, verbose=True, fast_path=False):
+        """`llm` and `tools` replace `ChatOpenAI` and the real tools, e.g.
+        with stand-ins for benchmarks. Pass `verbose=False` when serving many
+        conversations at once, so steps aren't printed. With `fast_path=True`
+        plain single-tool questions are answered by an `IntentRouter`
+        without calling the model."""
         self.openai_api_key = openai_api_key
         
         # Initialize OpenAI LLM
-        self.llm = ChatOpenAI(
+        self.llm = llm or ChatOpenAI(
             model="gpt-4o",
             openai_api_key=openai_api_key,
             temperature=0.0,
+            # Token counts for traces and rate limits, also when streaming
+            stream_usage=True,
         )
         
         # Initialize tools
-        self.tools = [get_weather, get_current_time]
+        self.tools = tools or [get_weather, get_current_time]
         
 
         # Create the prompt template
@@ -148,14 +178,21 @@ You must call the appropriate tools to get real-time data before responding.""")
             prompt=self.prompt
         )
         
-        # Create agent executor
-        self.agent_executor = AgentExecutor(
+        # Create agent executor; tool calls of one model turn run concurrently
+        self.agent_executor = ParallelAgentExecutor(
             agent=self.agent,
             tools=self.tools,
-            verbose=True,
+            verbose=verbose,
             handle_parsing_errors=True,
-            max_iterations=3
+            max_iterations=3,
+            tool_timeouts=tool_timeouts or TOOL_TIMEOUTS,
         )
+        
+        # Optional local router for "weather in Paris"-style questions
+        self.router = IntentRouter(self.tools) if fast_path else None
+        
+        # Rate limits for process_queries; replace it to match your account's tier
+        self.scheduler = RateLimitedScheduler()
     
     def process_query(self, user_query: str) -> str:
         """Process a user query through the complete tool calling workflow"""
@@ -163,12 +200,21 @@ You must call the appropriate tools to get real-time data before responding.""")
         print("=" * 60)
         
         try:
+            if self.router:
+                answer = self.router.answer(user_query)
+                if answer is not None:
+                    print("⚡ Answered on the fast path, without the LLM")
+                    return answer
+            
             print("📝 Step 1: LLM analyzing query and determining tool needs...")
             print(f"🔧 Available tools: {[tool.name for tool in self.tools]}")
             
+            start = time.perf_counter()
             response = self.agent_executor.invoke({
                 "input": user_query
-            })
+            }, config=traced_config())
+            if self.router:
+                self.router.record_agent(time.perf_counter() - start)
             
             final_answer = response.get("output", "I apologize, but I couldn't process your request.")
             
@@ -180,8 +226,106 @@ You must call the appropriate tools to get real-time data before responding.""")
             print(f"❌ Error: {error_msg}")
             return error_msg
     
+    async def _arun(self, user_query: str, config=None) -> str:
+        """Answer one query asynchronously; errors are raised, not reported"""
+        if self.router:
+            answer = await self.router.aanswer(user_query)
+            if answer is not None:
+                return answer
+        
+        start = time.perf_counter()
+        response = await self.agent_executor.ainvoke({"input": user_query}, config=traced_config(config))
+        if self.router:
+            self.router.record_agent(time.perf_counter() - start)
+        return response.get("output", "I apologize, but I couldn't process your request.")
+    
+    async def aprocess_query(self, user_query: str) -> str:
+        """Async `process_query`: the model and tools are awaited, so many
+        conversations can share one event loop"""
+        try:
+            return await self._arun(user_query)
+        except Exception as e:
+            return f"Sorry, I encountered an error: {str(e)}"
+    
+    async def aprocess_queries(self, user_queries, scheduler=None):
+        """Answer many queries concurrently within the provider's rate limits.
+        
+        `scheduler` (a `RateLimitedScheduler`, default `self.scheduler`)
+        holds every model call to its requests/tokens-per-minute buckets,
+        adapts how many queries run at once, and retries queries that still
+        hit a 429. Returns one answer per query, in order; a query that
+        failed gets an error message instead.
+        """
+        scheduler = scheduler or self.scheduler
+        config = {"callbacks": [scheduler.callback()]}
+        results = await scheduler.run(list(user_queries), lambda query: self._arun(query, config))
+        return [
+            f"Sorry, I encountered an error: {str(result)}" if isinstance(result, Exception) else result
+            for result in results
+        ]
+    
+    def process_queries(self, user_queries, scheduler=None):
+        """Blocking `aprocess_queries`, e.g. to replay a query log; call
+        `aprocess_queries` instead from code already running an event loop"""
+        return asyncio.run(self.aprocess_queries(user_queries, scheduler))
+    
+    def close(self):
+        """Shut down the thread pool the agent runs sync tools in"""
+        self.agent_executor.close()
+    
+    async def astream_query(self, user_query: str):
+        """Yield `("tool_call", action)`, `("tool_result", step)` and finally
+        `("answer", text)` as the agent works through a query"""
+        async for chunk in self.agent_executor.astream({"input": user_query}, config=traced_config()):
+            for action in chunk.get("actions", []):
+                yield "tool_call", action
+            for step in chunk.get("steps", []):
+                yield "tool_result", step
+            if "output" in chunk:
+                yield "answer", chunk["output"]
+    
+def run_batch(agent, args):
+    """Answer every query in `args.batch` within the rate limits"""
+    with open(args.batch) as f:
+        queries = [line.strip() for line in f if line.strip()]
+    print(f"📦 Answering {len(queries)} queries from {args.batch}...")
+    
+    scheduler = RateLimitedScheduler(rpm=args.rpm, tpm=args.tpm, max_concurrency=args.max_concurrency)
+    answers = agent.process_queries(queries, scheduler)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            for query, answer in zip(queries, answers):
+                f.write(json.dumps({"query": query, "answer": answer}) + "\n")
+        print(f"💾 Answers written to {args.output}")
+    else:
+        for query, answer in zip(queries, answers):
+            print(f"\n🗣️  {query}\n🤖 {answer}")
+    print(f"📊 {format_scheduler_stats(scheduler)}")
+
 def main():
     """Main interactive loop"""
+    parser = argparse.ArgumentParser(description="LangChain Tool Calling Agent")
+    parser.add_argument(
+        "--fast-path",
+        action="store_true",
+        help="Answer plain single-tool questions (e.g. 'weather in Paris') without the LLM",
+    )
+    parser.add_argument(
+        "--trace",
+        choices=CLI_EXPORTERS,
+        default=os.getenv("AGENT_TRACING"),
+        help="Trace agent runs with OpenTelemetry: print spans or send them over OTLP",
+    )
+    parser.add_argument("--batch", metavar="FILE", help="Answer the queries in FILE (one per line) and exit")
+    parser.add_argument("--output", metavar="FILE", help="With --batch, write answers to FILE as JSON lines")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="With --batch, model requests per minute")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM, help="With --batch, model tokens per minute")
+    parser.add_argument(
+        "--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="With --batch, most queries at once"
+    )
+    args = parser.parse_args()
+    
     print("🚀 LangChain Tool Calling Agent - AI Assistant with Real-time Tools")
     print("🔗 Powered by LangChain + OPENAI API")
     print("=" * 70)
@@ -199,17 +343,28 @@ def main():
         print("⚠️  Warning: WEATHER_API_KEY not found. Weather functionality will be limited.")
         print("Get a free API key from: https://openweathermap.org/api")
     
+    if args.trace:
+        configure_tracing(args.trace)
+        print(f"🔭 Tracing agent runs ({args.trace})")
+    
     try:
-        agent = ToolCallingAgent(openai_key)
+        # Traces replace the step-by-step printout
+        agent = ToolCallingAgent(openai_key, fast_path=args.fast_path, verbose=not (args.batch or args.trace))
         print("✅ Agent initialized successfully!")
     except Exception as e:
         print(f"❌ Failed to initialize agent: {str(e)}")
         return
     
+    if args.batch:
+        run_batch(agent, args)
+        agent.close()
+        return
+    
     print("\n🎯 Example queries to try:")
     print("- 'What is the weather in New York?'")
     print("- 'What time is it?'")
     print("- 'Tell me about the weather in London and what time it is'")
+    print("- 'stats' to see how often weather lookups were served from cache")
     
     while True:
         try:
@@ -219,6 +374,12 @@ def main():
                 print("👋 Goodbye!")
                 break
             
+            if user_input.lower() == 'stats':
+                print(f"📊 Weather cache: {format_weather_stats()}")
+                if agent.router:
+                    print(f"⚡ Fast path: {format_router_stats(agent.router)}")
+                continue
+            
             if not user_input:
                 continue
                 
@@ -231,6 +392,8 @@ def main():
             break
         except Exception as e:
             print(f"❌ Error: {str(e)}")
+    
+    agent.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
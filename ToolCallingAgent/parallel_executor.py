@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, Optional, Tuple
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from pydantic import PrivateAttr
+
+# Seconds a tool may take before the agent gets a timeout observation instead
+DEFAULT_TOOL_TIMEOUT = 30.0
+MAX_PARALLEL_TOOLS = 8
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """`AgentExecutor` that runs the tool calls of one model turn concurrently.
+
+    When the model asks for several tools at once (e.g. the weather in London
+    *and* the time there), `AgentExecutor` runs them one after the other, so
+    their latencies add up. Here they run in a thread pool (or concurrently
+    on the event loop with `ainvoke`), and the results are fed back to the
+    model in the order the calls were made.
+
+    Each tool gets at most `tool_timeouts[name]` seconds (default
+    `default_tool_timeout`); a tool that takes longer is reported to the
+    model as timed out rather than holding up the whole turn. A sync tool
+    that timed out keeps its pool thread until it returns.
+
+    The pool is started on the first sync tool call; `close()` (or leaving a
+    `with` block) shuts it down. This overrides private `AgentExecutor`
+    methods, so it is tied to the langchain version pinned in
+    requirements.txt; `tests/test_parallel_executor.py` checks their
+    signatures.
+    """
+
+    tool_timeouts: Dict[str, float] = {}
+    default_tool_timeout: Optional[float] = DEFAULT_TOOL_TIMEOUT
+    max_parallel_tools: int = MAX_PARALLEL_TOOLS
+
+    _pool: Optional[ContextThreadPoolExecutor] = PrivateAttr(default=None)
+    _pool_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    # Running tool future -> (its action, monotonic deadline or None)
+    _pending: Dict[Future, Tuple[AgentAction, Optional[float]]] = PrivateAttr(default_factory=dict)
+
+    def _timeout(self, tool_name):
+        return self.tool_timeouts.get(tool_name, self.default_tool_timeout)
+
+    @staticmethod
+    def _timed_out(agent_action, timeout):
+        return AgentStep(
+            action=agent_action,
+            observation=f"Tool {agent_action.tool} timed out after {timeout:g}s",
+        )
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        # Called once per action by `_iter_next_step`, which yields whatever
+        # this returns: start the tool and hand back a future right away
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ContextThreadPoolExecutor(
+                    max_workers=self.max_parallel_tools, thread_name_prefix="agent-tool"
+                )
+            future = self._pool.submit(
+                super()._perform_agent_action,
+                name_to_tool_map,
+                color_mapping,
+                agent_action,
+                run_manager,
+            )
+        timeout = self._timeout(agent_action.tool)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._pending[future] = (agent_action, deadline)
+        return future
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        futures = []
+        try:
+            for output in super()._iter_next_step(
+                name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+            ):
+                if isinstance(output, Future):
+                    futures.append(output)
+                else:
+                    yield output
+
+            # All tools of the turn are running by now; collect them in order
+            for future in futures:
+                agent_action, deadline = self._pending[future]
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    yield future.result(timeout=remaining)
+                except FutureTimeoutError:
+                    yield self._timed_out(agent_action, self._timeout(agent_action.tool))
+        finally:
+            for future in futures:
+                self._pending.pop(future, None)
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        # `_aiter_next_step` already gathers the actions of a turn
+        timeout = self._timeout(agent_action.tool)
+        try:
+            return await asyncio.wait_for(
+                super()._aperform_agent_action(
+                    name_to_tool_map, color_mapping, agent_action, run_manager
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            return self._timed_out(agent_action, timeout)
+
+    def close(self):
+        """Shut down the tool thread pool; tools that timed out and are still
+        running finish in the background."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,279 @@
+import asyncio
+import itertools
+import random
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+# gpt-4o limits of a new OpenAI account; raise them to match your tier
+DEFAULT_RPM = 500
+DEFAULT_TPM = 30_000
+DEFAULT_MAX_CONCURRENCY = 16
+MAX_RETRIES = 5
+# Seconds before the first retry of a rate-limited query when the provider
+# doesn't send Retry-After; doubled on each further retry
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+# A full bucket holds this share of the per-period quota (10 s of a minute),
+# so a batch can't start with a minute's worth of requests at once
+BURST_FRACTION = 1 / 6
+# Rough prompt size until the provider reports the real usage
+CHARS_PER_TOKEN = 4
+# Tokens reserved for each call's completion, corrected once it returns
+COMPLETION_TOKENS = 256
+
+
+def is_rate_limit(error):
+    """Whether `error` is a provider 429, e.g. `openai.RateLimitError`."""
+    return getattr(error, "status_code", None) == 429
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait, if it said."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Allows `rate` units per `period` seconds, in bursts of at most `capacity`."""
+
+    def __init__(self, rate, period=60.0, capacity=None):
+        self.rate = rate
+        self.period = period
+        self.capacity = capacity or max(1.0, rate * BURST_FRACTION)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate / self.period)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until `amount` units are available and take them."""
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            wait = (amount - self.tokens) * self.period / self.rate
+            self.waited += wait
+            await asyncio.sleep(wait)
+
+    def adjust(self, amount):
+        """Take `amount` more units (or give some back if negative) without
+        waiting, e.g. once a call's real token usage is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self):
+        """Empty the bucket, after the provider said we're over the limit."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class AdaptiveConcurrency:
+    """Limit on queries in flight that adapts to rate limiting (AIMD).
+
+    The limit grows by one after `limit` queries in a row succeed, and
+    halves when one is rate-limited. Queries that were already running when
+    the limit last dropped don't halve it again, so a burst of 429s counts
+    as one.
+    """
+
+    def __init__(self, initial, maximum, minimum=1):
+        self.limit = initial
+        self.maximum = maximum
+        self.minimum = minimum
+        self.active = 0
+        self.peak = 0
+        self.decreases = 0
+        self._successes = 0
+        self._epoch = 0
+        self._changed = None
+
+    async def acquire(self):
+        """Wait for a slot; returns a ticket to pass to `release()`."""
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            return self._epoch
+
+    async def release(self, ticket, rate_limited=False):
+        async with self._changed:
+            self.active -= 1
+            if rate_limited:
+                if ticket == self._epoch:
+                    self.limit = max(self.minimum, self.limit // 2)
+                    self.decreases += 1
+                    self._epoch += 1
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self._successes = 0
+            self._changed.notify_all()
+
+
+class _RateLimitCallback(AsyncCallbackHandler):
+    """Holds each chat model call until the request and token buckets allow it.
+
+    Async handlers are awaited before the model is called, so waiting here
+    delays the call itself. The token estimate is replaced by the real usage
+    when the call returns.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self._reserved = {}
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs: Any):
+        chars = sum(len(str(message.content)) for batch in messages for message in batch)
+        estimate = chars // CHARS_PER_TOKEN + self.scheduler.completion_tokens
+        self._reserved[run_id] = estimate
+        await self.scheduler.requests.acquire(1)
+        await self.scheduler.tokens.acquire(estimate)
+
+    async def on_llm_end(self, response, *, run_id, **kwargs: Any):
+        estimate = self._reserved.pop(run_id, None)
+        used = _total_tokens(response)
+        if estimate is not None and used:
+            self.scheduler.tokens.adjust(used - estimate)
+
+    async def on_llm_error(self, error, *, run_id, **kwargs: Any):
+        self._reserved.pop(run_id, None)
+
+
+def _total_tokens(response):
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("total_tokens")
+    return None
+
+
+class RateLimitedScheduler:
+    """Runs a batch of queries within a provider's rate limits.
+
+    * Every model call waits for a request from the `rpm` bucket and its
+      estimated tokens from the `tpm` bucket (pass `callback()` to the
+      runnable); both refill continuously over `period` seconds
+    * At most `concurrency.limit` queries run at once, adapted to 429s
+    * A query that hits a 429 anyway is retried after the provider's
+      Retry-After (else exponential backoff), up to `max_retries` times;
+      other errors are not retried
+
+    `run()` returns one result per item, in input order. `period` is 60 for
+    real limits; shorten it to test offline against a fake model.
+    """
+
+    def __init__(
+        self,
+        rpm=DEFAULT_RPM,
+        tpm=DEFAULT_TPM,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        initial_concurrency=None,
+        max_retries=MAX_RETRIES,
+        period=60.0,
+        completion_tokens=COMPLETION_TOKENS,
+        base_backoff=BASE_BACKOFF,
+    ):
+        self.requests = TokenBucket(rpm, period)
+        self.tokens = TokenBucket(tpm, period)
+        self.concurrency = AdaptiveConcurrency(
+            initial_concurrency or max(1, max_concurrency // 2), max_concurrency
+        )
+        self.max_retries = max_retries
+        self.completion_tokens = completion_tokens
+        self.base_backoff = base_backoff
+        self._callback = _RateLimitCallback(self)
+        self._counts = {"succeeded": 0, "failed": 0, "rate_limited": 0, "retries": 0}
+        self._seconds = 0.0
+
+    def callback(self):
+        """Callback handler that holds model calls to the rate limits."""
+        return self._callback
+
+    def _backoff(self, error, attempt):
+        seconds = retry_after(error)
+        if seconds is None:
+            seconds = min(MAX_BACKOFF, self.base_backoff * 2**attempt)
+        # Spread the retries so they don't all come back at once
+        return seconds * random.uniform(1.0, 1.5)
+
+    async def _run_one(self, item, worker):
+        for attempt in itertools.count():
+            ticket = await self.concurrency.acquire()
+            try:
+                result = await worker(item)
+            except Exception as e:
+                if not is_rate_limit(e):
+                    await self.concurrency.release(ticket)
+                    self._counts["failed"] += 1
+                    return e
+                await self.concurrency.release(ticket, rate_limited=True)
+                self._counts["rate_limited"] += 1
+                if attempt >= self.max_retries:
+                    self._counts["failed"] += 1
+                    return e
+                self.requests.drain()
+                self._counts["retries"] += 1
+                await asyncio.sleep(self._backoff(e, attempt))
+            else:
+                await self.concurrency.release(ticket)
+                self._counts["succeeded"] += 1
+                return result
+
+    async def run(self, items: Sequence, worker: Callable[[Any], Awaitable[Any]]) -> List[Any]:
+        """Await `worker(item)` for every item; a failed item's result is
+        the exception it raised."""
+        results: List[Optional[Any]] = [None] * len(items)
+        pending = iter(enumerate(items))
+
+        async def drain_queue():
+            # Items are started in order, so a long log makes steady progress
+            for i, item in pending:
+                results[i] = await self._run_one(item, worker)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(drain_queue() for _ in range(self.concurrency.maximum)))
+        self._seconds += time.perf_counter() - start
+        return results
+
+    def stats(self):
+        done = self._counts["succeeded"] + self._counts["failed"]
+        return dict(
+            self._counts,
+            queries=done,
+            seconds=self._seconds,
+            queries_per_second=done / self._seconds if self._seconds else 0.0,
+            concurrency_limit=self.concurrency.limit,
+            peak_concurrency=self.concurrency.peak,
+            concurrency_decreases=self.concurrency.decreases,
+            rate_wait_seconds=self.requests.waited + self.tokens.waited,
+        )
+
+
+def format_scheduler_stats(scheduler):
+    """One-line summary of `scheduler.stats()` for the CLI."""
+    stats = scheduler.stats()
+    return (
+        f"{stats['succeeded']}/{stats['queries']} queries answered in {stats['seconds']:.1f}s "
+        f"({stats['queries_per_second']:.1f}/s), {stats['rate_limited']} rate limited, "
+        f"{stats['retries']} retries, concurrency {stats['concurrency_limit']} "
+        f"(peak {stats['peak_concurrency']})"
+    )
@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from shared.stand_ins import stub_tools  # noqa: E402
+
+from intent_router import IntentRouter  # noqa: E402
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(stub_tools(latency=0))
+
+
+@pytest.mark.parametrize(
+    "query, tool, args",
+    [
+        ("What time is it in Tokyo?", "get_current_time", {"timezone": "Asia/Tokyo"}),
+        ("current time in PST", "get_current_time", {"timezone": "US/Pacific"}),
+        ("what time is it", "get_current_time", {"timezone": "local"}),
+        ("weather in Paris", "get_weather", {"location": "Paris"}),
+        ("What's the weather in London, UK?", "get_weather", {"location": "London, UK"}),
+        ("How's the weather in New York right now?", "get_weather", {"location": "New York"}),
+    ],
+)
+def test_routes_single_lookups(router, query, tool, args):
+    intent = router.match(query)
+    assert intent is not None
+    assert (intent.tool, intent.args) == (tool, args)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "nice weather today",
+        "reading weather",
+        "christmas time",
+        "Tokyo time",
+        "what is the weather",
+        "how is the weather",
+        "what's the weather in my area",
+        "what time is it here",
+        "What's the weather in London and what time is it there?",
+        "Will it be warmer in Madrid tomorrow?",
+        "What time is it in Narnia?",
+        "time in Paris, Texas",
+        "what time is it in Portland, Maine",
+        "what time is it in Paris, France",
+    ],
+)
+def test_leaves_the_rest_to_the_agent(router, query):
+    assert router.match(query) is None
+
+
+def test_answer_fills_the_template(router):
+    assert router.answer("weather in Paris") == "Weather in Paris: 68°F, clear sky"
+    assert router.answer("nice weather today") is None
+    assert router.stats()["fast_path"] == 1
@@ -0,0 +1,88 @@
+import asyncio
+import inspect
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from shared.stand_ins import ScriptedToolCallingModel, stub_tools  # noqa: E402
+
+from parallel_executor import ParallelAgentExecutor  # noqa: E402
+
+CALLS = [
+    ("get_weather", {"location": "London"}),
+    ("get_current_time", {"timezone": "Europe/London"}),
+    ("get_weather", {"location": "Paris"}),
+]
+
+
+def build(latencies=None, tool_timeouts=None):
+    tools = stub_tools(0.2, latencies)
+    prompt = ChatPromptTemplate.from_messages(
+        [("human", "{input}"), MessagesPlaceholder(variable_name="agent_scratchpad")]
+    )
+    agent = create_tool_calling_agent(ScriptedToolCallingModel(tool_calls=CALLS), tools, prompt)
+    return ParallelAgentExecutor(agent=agent, tools=tools, max_iterations=3, tool_timeouts=tool_timeouts or {})
+
+
+@pytest.mark.parametrize(
+    "name, parameters",
+    [
+        ("_perform_agent_action", ["self", "name_to_tool_map", "color_mapping", "agent_action", "run_manager"]),
+        (
+            "_iter_next_step",
+            ["self", "name_to_tool_map", "color_mapping", "inputs", "intermediate_steps", "run_manager"],
+        ),
+        ("_aperform_agent_action", ["self", "name_to_tool_map", "color_mapping", "agent_action", "run_manager"]),
+    ],
+)
+def test_overridden_agent_executor_methods_are_unchanged(name, parameters):
+    # ParallelAgentExecutor overrides these private methods; a langchain
+    # upgrade that changes them must be checked before it is pinned
+    assert list(inspect.signature(getattr(AgentExecutor, name)).parameters) == parameters
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_runs_tools_concurrently_in_order(use_async):
+    with build() as executor:
+        start = time.perf_counter()
+        if use_async:
+            output = asyncio.run(executor.ainvoke({"input": "question"}))["output"]
+        else:
+            output = executor.invoke({"input": "question"})["output"]
+        seconds = time.perf_counter() - start
+        assert not executor._pending
+
+    assert output.split(" | ") == [
+        "Weather in London: 68°F, clear sky",
+        "Time in Europe/London: 12:00:00",
+        "Weather in Paris: 68°F, clear sky",
+    ]
+    assert seconds < 0.5
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_slow_tool_times_out(use_async):
+    with build(latencies={"get_current_time": 2.0}, tool_timeouts={"get_current_time": 0.3}) as executor:
+        if use_async:
+            output = asyncio.run(executor.ainvoke({"input": "question"}))["output"]
+        else:
+            output = executor.invoke({"input": "question"})["output"]
+
+    assert "Tool get_current_time timed out after 0.3s" in output
+    assert output.count("Weather in") == 2
+
+
+def test_close_shuts_down_the_pool():
+    executor = build()
+    executor.invoke({"input": "question"})
+    pool = executor._pool
+    executor.close()
+    assert executor._pool is None
+    assert pool._shutdown
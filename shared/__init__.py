@@ -0,0 +1 @@
+"""Helpers shared by the agent examples (ToolCallingAgent, ReActAgent)."""
@@ -0,0 +1,142 @@
+"""Many concurrent conversations on one event loop, async vs sync tools.
+
+Both agents run `--sessions` conversations at once with `ainvoke`. A scripted
+model asks for the weather in a different city per conversation (so every
+lookup reaches the stub OpenWeatherMap server, which answers after
+`--latency` seconds) plus the time. With the native async tools the lookups
+share one aiohttp session; with sync-only tools LangChain runs each call in
+the loop's small default thread pool instead:
+
+    python shared/benchmarks/async_agents_benchmark.py --sessions 200 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+from langchain_core.tools import StructuredTool
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "ToolCallingAgent"))
+
+from shared.benchmarks.weather_benchmark import stub_weather_server  # noqa: E402
+from shared.stand_ins import ScriptedToolCallingModel  # noqa: E402
+from shared.weather import weather_client  # noqa: E402
+
+TOOL_CALLS = [
+    ("get_weather", {"location": "{input}"}),
+    ("get_current_time", {"timezone": "Europe/London"}),
+]
+
+
+def load_agent_module(name, path):
+    """Import an agent's main.py under its own name (both are called main)."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def sync_only(tools):
+    """The same tools without their coroutines, as they were before."""
+    return [
+        StructuredTool(
+            name=tool.name, description=tool.description, args_schema=tool.args_schema, func=tool.func
+        )
+        for tool in tools
+    ]
+
+
+async def converse(ask, sessions):
+    latencies = []
+
+    async def session(i):
+        start = time.perf_counter()
+        answer = await ask(f"City {i}", f"session-{i}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        return answer
+
+    start = time.perf_counter()
+    answers = await asyncio.gather(*(session(i) for i in range(sessions)))
+    seconds = time.perf_counter() - start
+    await weather_client.aclose()
+
+    latencies.sort()
+    return {
+        "seconds": seconds,
+        "sessions_per_second": sessions / seconds,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+        "errors": sum("Error" in answer for answer in answers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub weather API latency in seconds")
+    parser.add_argument("--model-latency", type=float, default=0.1)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    tool_calling = load_agent_module("tool_calling_main", ROOT / "ToolCallingAgent" / "main.py")
+    react = load_agent_module("react_main", ROOT / "ReActAgent" / "main.py")
+    model = ScriptedToolCallingModel(tool_calls=TOOL_CALLS, latency=args.model_latency)
+
+    results = {}
+    with stub_weather_server(args.latency) as (url, counts):
+        weather_client.base_url = url
+        weather_client._api_key = "stub"
+
+        for mode in ("async tools", "sync tools"):
+            tools = [tool_calling.get_weather, tool_calling.get_current_time]
+            agent = tool_calling.ToolCallingAgent(
+                "stub",
+                llm=model,
+                tools=tools if mode == "async tools" else sync_only(tools),
+                verbose=False,
+            )
+
+            async def ask(question, thread_id):
+                return await agent.aprocess_query(question)
+
+            weather_client.clear()
+            results[f"ToolCallingAgent, {mode}"] = asyncio.run(converse(ask, args.sessions))
+
+            tools = [react.get_weather, react.get_current_time]
+            graph = react.create_simple_react_agent(
+                llm=model,
+                tools=tools if mode == "async tools" else sync_only(tools),
+                debug=False,
+            )
+
+            async def ask(question, thread_id):
+                return await react.aask(graph, question, thread_id)
+
+            weather_client.clear()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[f"ReActAgent, {mode}"] = asyncio.run(converse(ask, args.sessions))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"📊 {args.sessions} concurrent conversations, weather API {args.latency * 1000:.0f} ms, "
+        f"model {args.model_latency * 1000:.0f} ms per call"
+    )
+    columns = list(next(iter(results.values())))
+    print(f"{'':<30}" + "".join(f"{column:>22}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<30}" + "".join(f"{result[column]:22.2f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
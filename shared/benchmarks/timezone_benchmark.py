@@ -0,0 +1,109 @@
+"""Compare the old `get_current_time` timezone lookup with TimezoneResolver.
+
+Runs a set of timezone arguments like the ones users and models send (IANA
+names, cities, abbreviations, offsets, typos) through both lookups, and
+reports how many resolve on the first try and how long a lookup takes:
+
+    python shared/benchmarks/timezone_benchmark.py --repeat 2000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytz
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from shared.timezones import TimezoneResolver  # noqa: E402
+
+INPUTS = [
+    "UTC", "Europe/London", "Asia/Tokyo", "America/New_York", "US/Eastern",
+    "EST", "PST", "JST", "CET", "IST", "AEST", "PDT",
+    "Tokyo", "London", "New York", "Paris", "Sydney", "Mumbai", "San Francisco",
+    "Beijing", "Berlin", "Dubai", "Singapore", "São Paulo", "Los Angeles",
+    "Paris, France", "London, UK", "Tokyo, Japan", "Japan", "India", "UK",
+    "UTC+5:30", "GMT-3", "+09:00",
+    "Asia/Tokio", "Londn", "new yrok", "Sidney", "Pacific Time", "Eastern time",
+    "america/new_york", "Narnia",
+]
+
+# `get_current_time` before the resolver
+LEGACY_MAP = {
+    "EST": "US/Eastern",
+    "PST": "US/Pacific",
+    "CST": "US/Central",
+    "MST": "US/Mountain",
+    "GMT": "GMT",
+    "BST": "Europe/London",
+    "CET": "Europe/Paris",
+    "JST": "Asia/Tokyo",
+}
+
+
+def legacy_lookup(name):
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError:
+        if name.upper() in LEGACY_MAP:
+            return pytz.timezone(LEGACY_MAP[name.upper()])
+        return None
+
+
+def measure(lookup, repeat):
+    resolved = sum(lookup(name) is not None for name in INPUTS)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name in INPUTS:
+            lookup(name)
+    seconds = time.perf_counter() - start
+    return {
+        "resolved": resolved,
+        "resolved_rate": resolved / len(INPUTS),
+        "lookup_us": seconds / (repeat * len(INPUTS)) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--show", action="store_true", help="Print what each input resolves to")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    resolver = TimezoneResolver()
+    start = time.perf_counter()
+    resolver.index
+    index_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for name in INPUTS:
+        resolver.timezone(name)
+    first_us = (time.perf_counter() - start) / len(INPUTS) * 1e6
+
+    results = {
+        "legacy": measure(legacy_lookup, args.repeat),
+        "resolver": dict(measure(resolver.timezone, args.repeat), first_lookup_us=first_us, index_ms=index_ms),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    if args.show:
+        for name in INPUTS:
+            legacy = legacy_lookup(name)
+            print(f"{name:<20} {str(legacy and legacy.zone):<22} {resolver.resolve(name)}")
+        print()
+
+    print(f"📊 {len(INPUTS)} timezone arguments, {args.repeat} rounds")
+    for name, result in results.items():
+        print(f"\n{name}")
+        for metric, value in result.items():
+            print(f"  {metric:<20} {value:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Cost of tracing an agent run, off and on.
+
+Runs ToolCallingAgent and the ReAct agent offline (a scripted model and stub
+tools that answer at once, so only the framework's own work is timed) with
+tracing never configured, switched on with the in-memory exporter, and
+switched off again:
+
+    python shared/benchmarks/tracing_overhead_benchmark.py --queries 200
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "ToolCallingAgent"))
+
+from shared.stand_ins import ScriptedToolCallingModel, stub_tools  # noqa: E402
+from shared.tracing import configure_tracing, traced_config  # noqa: E402
+
+TOOL_CALLS = [
+    ("get_weather", {"location": "London"}),
+    ("get_current_time", {"timezone": "Europe/London"}),
+]
+
+
+def load_agent_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def timed(ask, queries):
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        ask(f"question {i}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    tool_calling = load_agent_module("tool_calling_main", ROOT / "ToolCallingAgent" / "main.py")
+    react = load_agent_module("react_main", ROOT / "ReActAgent" / "main.py")
+    model = ScriptedToolCallingModel(tool_calls=TOOL_CALLS)
+
+    agent = tool_calling.ToolCallingAgent("stub", llm=model, tools=stub_tools(0.0), verbose=False)
+    graph = react.create_simple_react_agent(llm=model, tools=stub_tools(0.0), debug=False)
+    agents = {
+        "ToolCallingAgent": lambda query: agent.agent_executor.invoke({"input": query}, config=traced_config()),
+        "ReActAgent": lambda query: graph.invoke(
+            {"messages": [react.HumanMessage(content=query)]},
+            config=traced_config({"configurable": {"thread_id": query}}),
+        ),
+    }
+
+    results = {}
+    for name, ask in agents.items():
+        # Warm up imports and caches before timing
+        with contextlib.redirect_stdout(io.StringIO()):
+            timed(ask, 5)
+            off = timed(ask, args.queries)
+            provider = configure_tracing("memory")
+            on = timed(ask, args.queries)
+            spans = len(provider.memory_exporter.get_finished_spans())
+            configure_tracing(None)
+            off_again = timed(ask, args.queries)
+        results[name] = {
+            "untraced_ms": off,
+            "traced_ms": on,
+            "switched_off_ms": off_again,
+            "spans_per_query": spans / args.queries,
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 median per query over {args.queries} queries, model and tools answering at once")
+    columns = list(next(iter(results.values())))
+    print(f"{'':<18}" + "".join(f"{column:>18}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<18}" + "".join(f"{result[column]:18.2f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Compare plain `requests.get` weather lookups with the shared WeatherClient.
+
+A stub OpenWeatherMap server with a fixed response latency runs locally, and
+a pool of threads looks up cities drawn from a skewed (Zipf-like)
+distribution, as agents answering many users would. Both clients see the
+same lookups; the report shows the requests that reached the server, the
+cache hit rate and the lookup latency:
+
+    python shared/benchmarks/weather_benchmark.py --lookups 2000 --threads 32 --latency 0.1
+"""
+
+import argparse
+import contextlib
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from shared.weather import WeatherClient  # noqa: E402
+
+CITIES = [f"City {i}" for i in range(200)]
+
+
+@contextlib.contextmanager
+def stub_weather_server(latency=0.1):
+    """Serve OpenWeatherMap-shaped responses on a free local port.
+
+    Yields `(url, counts)`; `counts["requests"]` is the number of requests
+    received and `counts["connections"]` the TCP connections opened.
+    """
+    counts = {"requests": 0, "connections": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with lock:
+                counts["connections"] += 1
+
+        def do_GET(self):
+            with lock:
+                counts["requests"] += 1
+            time.sleep(latency)
+            city = parse_qs(urlparse(self.path).query).get("q", ["?"])[0]
+            body = json.dumps(
+                {
+                    "name": city,
+                    "sys": {"country": "XX"},
+                    "main": {"temp": 68.0, "feels_like": 67.0, "humidity": 40},
+                    "weather": [{"description": "clear sky"}],
+                    "wind": {"speed": 5.0},
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/data/2.5/weather", counts
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def skewed_lookups(lookups, seed=0):
+    """City names where a few popular cities make up most lookups."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(CITIES))]
+    return rng.choices(CITIES, weights=weights, k=lookups)
+
+
+def measure(lookup, cities, threads):
+    latencies = []
+
+    def timed(city):
+        start = time.perf_counter()
+        lookup(city)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(timed, cities))
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "lookups_per_second": len(cities) / seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub server latency in seconds")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    cities = skewed_lookups(args.lookups)
+    results = {}
+
+    with stub_weather_server(args.latency) as (url, counts):
+
+        def plain(city):
+            response = requests.get(url, params={"q": city, "appid": "stub", "units": "imperial"})
+            response.raise_for_status()
+            return response.json()
+
+        results["requests.get"] = measure(plain, cities, args.threads)
+        results["requests.get"].update(counts)
+
+        counts.update(requests=0, connections=0)
+        client = WeatherClient(api_key="stub", base_url=url)
+        results["WeatherClient"] = measure(client.current, cities, args.threads)
+        results["WeatherClient"].update(counts)
+        results["WeatherClient"]["hit_rate"] = client.stats()["hit_rate"]
+        client.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 {args.lookups} lookups of {len(set(cities))} cities, {args.threads} threads")
+    for name, result in results.items():
+        print(f"\n{name}")
+        for metric, value in result.items():
+            print(f"  {metric:<20} {value:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
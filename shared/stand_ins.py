@@ -0,0 +1,217 @@
+"""Local stand-ins for the agents' chat model and tools.
+
+Nothing here touches the network, so the agent can be benchmarked offline:
+
+    model = ScriptedToolCallingModel(tool_calls=[("get_weather", {"location": "London"})])
+    agent = ToolCallingAgent("stub", llm=model, tools=stub_tools(latency=0.5))
+
+`RateLimitedChatModel` also enforces requests/tokens-per-minute limits the
+way OpenAI does, answering over-limit calls with a 429.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, List, Tuple
+
+import httpx
+import openai
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import StructuredTool
+from pydantic import PrivateAttr
+
+
+class ScriptedToolCallingModel(BaseChatModel):
+    """Chat model that asks for a fixed set of tools, then answers.
+
+    Given a new question it requests every call in `tool_calls` at once, as
+    a model does for "weather in London and what time it is"; once the tool
+    results are in it answers with them. `"{input}"` in a string argument is
+    replaced by the question. Each call takes `latency` seconds; streamed,
+    the reply arrives as one chunk after that.
+    """
+
+    tool_calls: List[Tuple[str, dict]] = []
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return "scripted-tool-calling"
+
+    def bind_tools(self, tools, **kwargs: Any):
+        return self
+
+    def _respond(self, messages):
+        results = []
+        for message in reversed(messages):
+            if not isinstance(message, ToolMessage):
+                break
+            results.append(message.content)
+        if results:
+            return AIMessage(content=" | ".join(reversed(results)))
+
+        question = str(messages[-1].content)
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": name,
+                    "args": {
+                        key: value.replace("{input}", question) if isinstance(value, str) else value
+                        for key, value in args.items()
+                    },
+                    "id": f"call_{i}",
+                    "type": "tool_call",
+                }
+                for i, (name, args) in enumerate(self.tool_calls)
+            ],
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    def _chunk(self, messages):
+        message = self._respond(messages)
+        return ChatGenerationChunk(
+            message=AIMessageChunk(
+                content=message.content,
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                    for i, call in enumerate(message.tool_calls)
+                ],
+            )
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        time.sleep(self.latency)
+        chunk = self._chunk(messages)
+        if run_manager:
+            run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+        yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        await asyncio.sleep(self.latency)
+        chunk = self._chunk(messages)
+        if run_manager:
+            await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+        yield chunk
+
+
+class RateLimitedChatModel(ScriptedToolCallingModel):
+    """`ScriptedToolCallingModel` behind OpenAI-style rate limits.
+
+    Calls are counted over a sliding window of `period` seconds (60 for
+    "per minute"; shorten it to keep tests quick). A call that would go over
+    `rpm` requests or `tpm` tokens raises `openai.RateLimitError` (status
+    429) with a Retry-After header, like the real API. Tokens are counted
+    as characters / 4 of the prompt plus the reply, and reported in the
+    reply's `usage_metadata`.
+    """
+
+    rpm: int = 500
+    tpm: int = 30_000
+    period: float = 60.0
+    # Every call goes through the limits in _generate/_agenerate
+    disable_streaming: bool = True
+
+    _window: Any = PrivateAttr(default_factory=deque)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _counts: Any = PrivateAttr(default_factory=lambda: {"calls": 0, "rate_limited": 0})
+
+    @property
+    def _llm_type(self):
+        return "rate-limited-scripted-tool-calling"
+
+    @property
+    def counts(self):
+        """Calls answered and calls rejected with a 429."""
+        return dict(self._counts)
+
+    def _admit(self, messages):
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+        now = time.monotonic()
+        with self._lock:
+            while self._window and self._window[0][0] <= now - self.period:
+                self._window.popleft()
+            used = sum(tokens for _, tokens in self._window)
+            if len(self._window) + 1 > self.rpm or used + prompt_tokens > self.tpm:
+                self._counts["rate_limited"] += 1
+                wait = self._window[0][0] + self.period - now if self._window else self.period
+                raise openai.RateLimitError(
+                    "Rate limit reached (stand-in)",
+                    response=httpx.Response(
+                        429,
+                        headers={"retry-after": f"{max(wait, 0.0):.3f}"},
+                        request=httpx.Request("POST", "https://stand-in/v1/chat/completions"),
+                    ),
+                    body=None,
+                )
+            self._counts["calls"] += 1
+            entry = [now, prompt_tokens]
+            self._window.append(entry)
+        return entry
+
+    def _reply(self, messages, entry):
+        message = self._respond(messages)
+        output_tokens = len(str(message.content)) // 4 + 10 * len(message.tool_calls)
+        with self._lock:
+            entry[1] += output_tokens
+        message.usage_metadata = {
+            "input_tokens": entry[1] - output_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": entry[1],
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        entry = self._admit(messages)
+        time.sleep(self.latency)
+        return self._reply(messages, entry)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        entry = self._admit(messages)
+        await asyncio.sleep(self.latency)
+        return self._reply(messages, entry)
+
+
+def stub_tools(latency=0.5, latencies=None):
+    """`get_weather` and `get_current_time` that sleep instead of calling out.
+
+    `latencies` overrides `latency` per tool name.
+    """
+    latencies = latencies or {}
+
+    def weather(location: str) -> str:
+        time.sleep(latencies.get("get_weather", latency))
+        return f"Weather in {location}: 68°F, clear sky"
+
+    async def aweather(location: str) -> str:
+        await asyncio.sleep(latencies.get("get_weather", latency))
+        return f"Weather in {location}: 68°F, clear sky"
+
+    def current_time(timezone: str = "local") -> str:
+        time.sleep(latencies.get("get_current_time", latency))
+        return f"Time in {timezone}: 12:00:00"
+
+    async def acurrent_time(timezone: str = "local") -> str:
+        await asyncio.sleep(latencies.get("get_current_time", latency))
+        return f"Time in {timezone}: 12:00:00"
+
+    return [
+        StructuredTool.from_function(
+            weather, coroutine=aweather, name="get_weather", description="Current weather for a location"
+        ),
+        StructuredTool.from_function(
+            current_time, coroutine=acurrent_time, name="get_current_time", description="Current time in a timezone"
+        ),
+    ]
@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from shared.timezones import TimezoneResolver  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    return TimezoneResolver()
+
+
+@pytest.mark.parametrize(
+    "name, zone",
+    [
+        ("Tokyo", "Asia/Tokyo"),
+        ("america/new_york", "America/New_York"),
+        ("PST", "US/Pacific"),
+        ("Japan", "Asia/Tokyo"),
+        ("GMT-3", "UTC-03:00"),
+        ("Paris, France", "Europe/Paris"),
+        ("London, UK", "Europe/London"),
+        ("Tokyo (Japan)", "Asia/Tokyo"),
+        ("New York, USA", "America/New_York"),
+        ("Paris (Europe)", "Europe/Paris"),
+        ("Pacific Time", "US/Pacific"),
+        ("Asia/Tokio", "Asia/Tokyo"),
+        ("Londn", "Europe/London"),
+        ("Sidney", "Australia/Sydney"),
+        ("Kiev", "Europe/Kiev"),
+        ("Calcutta", "Asia/Kolkata"),
+        ("Saigon", "Asia/Saigon"),
+    ],
+)
+def test_resolves(resolver, name, zone):
+    assert resolver.resolve(name) == zone
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["Paris, Texas", "Portland, Maine", "birmingham, alabama", "Nice", "Narnia", "it", "me", "xyz"],
+)
+def test_wrong_places_are_not_guessed(resolver, name):
+    assert resolver.resolve(name) is None
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["Paris, Texas", "Portland, Maine", "birmingham, alabama", "Paris, France", "Tokyo timezone", "Londn", "Nice"],
+)
+def test_exact_mode_takes_only_exact_names(resolver, name):
+    assert resolver.resolve(name, fuzzy=False) is None
+
+
+def test_exact_mode_still_takes_names_and_offsets(resolver):
+    assert resolver.resolve("new york", fuzzy=False) == "America/New_York"
+    assert resolver.resolve("UTC+5:30", fuzzy=False) == "UTC+05:30"
+    assert resolver.resolve("kiev", fuzzy=False) == "Europe/Kiev"
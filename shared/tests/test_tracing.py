@@ -0,0 +1,115 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from langchain.agents import create_tool_calling_agent
+from langchain_core.callbacks import CallbackManager, StdOutCallbackHandler
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "ToolCallingAgent"))
+
+from shared import tracing  # noqa: E402
+from shared.stand_ins import ScriptedToolCallingModel, stub_tools  # noqa: E402
+from shared.tracing import configure_tracing, traced_config  # noqa: E402
+
+from parallel_executor import ParallelAgentExecutor  # noqa: E402
+
+CALLS = [
+    ("get_weather", {"location": "Paris"}),
+    ("get_current_time", {"timezone": "Asia/Tokyo"}),
+]
+
+
+@pytest.fixture
+def provider():
+    provider = configure_tracing("memory")
+    yield provider
+    configure_tracing(None)
+
+
+def build(latencies=None, tool_timeouts=None):
+    tools = stub_tools(0.01, latencies)
+    prompt = ChatPromptTemplate.from_messages(
+        [("human", "{input}"), MessagesPlaceholder(variable_name="agent_scratchpad")]
+    )
+    agent = create_tool_calling_agent(ScriptedToolCallingModel(tool_calls=CALLS), tools, prompt)
+    return ParallelAgentExecutor(agent=agent, tools=tools, max_iterations=3, tool_timeouts=tool_timeouts or {})
+
+
+def run(executor, use_async):
+    if use_async:
+        return asyncio.run(executor.ainvoke({"input": "question"}, config=traced_config()))["output"]
+    return executor.invoke({"input": "question"}, config=traced_config())["output"]
+
+
+def label(span):
+    if span.name == "agent.iteration":
+        return f"agent.iteration {span.attributes['agent.iteration']}"
+    return span.name
+
+
+def tree(provider):
+    """Sorted `(span, parent)` labels of every finished span."""
+    spans = provider.memory_exporter.get_finished_spans()
+    labels = {span.context.span_id: label(span) for span in spans}
+    return sorted((label(span), labels[span.parent.span_id] if span.parent else None) for span in spans)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_agent_run_spans(provider, use_async):
+    with build() as executor:
+        run(executor, use_async)
+
+    # The tools run in the first turn, beside the model call that asked for them
+    assert tree(provider) == sorted(
+        [
+            ("invoke_agent ParallelAgentExecutor", None),
+            ("agent.iteration 1", "invoke_agent ParallelAgentExecutor"),
+            ("chat scripted-tool-calling", "agent.iteration 1"),
+            ("execute_tool get_weather", "agent.iteration 1"),
+            ("execute_tool get_current_time", "agent.iteration 1"),
+            ("agent.iteration 2", "invoke_agent ParallelAgentExecutor"),
+            ("chat scripted-tool-calling", "agent.iteration 2"),
+        ]
+    )
+    assert len({span.context.trace_id for span in provider.memory_exporter.get_finished_spans()}) == 1
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_timed_out_tool_span_ends_with_the_run(provider, use_async):
+    with build(latencies={"get_current_time": 1.0}, tool_timeouts={"get_current_time": 0.2}) as executor:
+        output = run(executor, use_async)
+
+    assert "Tool get_current_time timed out after 0.2s" in output
+    handler = tracing._handler
+    assert not (handler._runs or handler._roots or handler._llm_starts or handler._tool_tokens)
+    unfinished = [
+        span.name
+        for span in provider.memory_exporter.get_finished_spans()
+        if span.attributes.get("agent.unfinished")
+    ]
+    assert unfinished == ["execute_tool get_current_time"]
+
+
+def test_traced_config_is_unchanged_without_tracing():
+    config = {"callbacks": [StdOutCallbackHandler()]}
+    assert traced_config(config) is config
+    assert traced_config() is None
+
+
+def test_traced_config_adds_the_handler(provider):
+    handler = tracing._handler
+    assert traced_config() == {"callbacks": [handler]}
+
+    other = StdOutCallbackHandler()
+    callbacks = [other]
+    config = traced_config({"callbacks": callbacks, "tags": ["x"]})
+    assert config == {"callbacks": [other, handler], "tags": ["x"]}
+    assert callbacks == [other]
+
+    manager = CallbackManager(handlers=[other])
+    merged = traced_config({"callbacks": manager})["callbacks"]
+    assert merged.handlers == [other, handler]
+    assert manager.handlers == [other]
@@ -0,0 +1,403 @@
+import difflib
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+
+import pytz
+
+# Abbreviations people (and models) type instead of IANA names. Where one is
+# ambiguous (IST, CST) the most common reading wins.
+TIMEZONE_ABBREVIATIONS = {
+    "utc": "UTC",
+    "gmt": "GMT",
+    "z": "UTC",
+    "zulu": "UTC",
+    "est": "US/Eastern",
+    "edt": "US/Eastern",
+    "et": "US/Eastern",
+    "cst": "US/Central",
+    "cdt": "US/Central",
+    "ct": "US/Central",
+    "mst": "US/Mountain",
+    "mdt": "US/Mountain",
+    "mt": "US/Mountain",
+    "pst": "US/Pacific",
+    "pdt": "US/Pacific",
+    "pt": "US/Pacific",
+    "eastern": "US/Eastern",
+    "central": "US/Central",
+    "mountain": "US/Mountain",
+    "pacific": "US/Pacific",
+    "akst": "US/Alaska",
+    "akdt": "US/Alaska",
+    "hst": "US/Hawaii",
+    "ast": "America/Halifax",
+    "nst": "America/St_Johns",
+    "bst": "Europe/London",
+    "wet": "Europe/Lisbon",
+    "west": "Europe/Lisbon",
+    "cet": "Europe/Paris",
+    "cest": "Europe/Paris",
+    "eet": "Europe/Athens",
+    "eest": "Europe/Athens",
+    "msk": "Europe/Moscow",
+    "ist": "Asia/Kolkata",
+    "pkt": "Asia/Karachi",
+    "gst": "Asia/Dubai",
+    "ict": "Asia/Bangkok",
+    "wib": "Asia/Jakarta",
+    "sgt": "Asia/Singapore",
+    "hkt": "Asia/Hong_Kong",
+    "pht": "Asia/Manila",
+    "jst": "Asia/Tokyo",
+    "kst": "Asia/Seoul",
+    "awst": "Australia/Perth",
+    "acst": "Australia/Adelaide",
+    "acdt": "Australia/Adelaide",
+    "aest": "Australia/Sydney",
+    "aedt": "Australia/Sydney",
+    "nzst": "Pacific/Auckland",
+    "nzdt": "Pacific/Auckland",
+    "sast": "Africa/Johannesburg",
+    "wat": "Africa/Lagos",
+    "cat": "Africa/Maputo",
+    "eat": "Africa/Nairobi",
+    "brt": "America/Sao_Paulo",
+    "art": "America/Argentina/Buenos_Aires",
+}
+
+# Major cities that aren't the city of an IANA zone, and common nicknames
+CITY_TIMEZONES = {
+    "nyc": "America/New_York",
+    "washington": "America/New_York",
+    "washington dc": "America/New_York",
+    "dc": "America/New_York",
+    "boston": "America/New_York",
+    "philadelphia": "America/New_York",
+    "atlanta": "America/New_York",
+    "miami": "America/New_York",
+    "orlando": "America/New_York",
+    "pittsburgh": "America/New_York",
+    "charlotte": "America/New_York",
+    "dallas": "America/Chicago",
+    "houston": "America/Chicago",
+    "austin": "America/Chicago",
+    "san antonio": "America/Chicago",
+    "minneapolis": "America/Chicago",
+    "new orleans": "America/Chicago",
+    "nashville": "America/Chicago",
+    "st louis": "America/Chicago",
+    "kansas city": "America/Chicago",
+    "salt lake city": "America/Denver",
+    "albuquerque": "America/Denver",
+    "las vegas": "America/Los_Angeles",
+    "san francisco": "America/Los_Angeles",
+    "sf": "America/Los_Angeles",
+    "la": "America/Los_Angeles",
+    "san diego": "America/Los_Angeles",
+    "san jose": "America/Los_Angeles",
+    "seattle": "America/Los_Angeles",
+    "portland": "America/Los_Angeles",
+    "sacramento": "America/Los_Angeles",
+    "silicon valley": "America/Los_Angeles",
+    "honolulu": "Pacific/Honolulu",
+    "montreal": "America/Toronto",
+    "ottawa": "America/Toronto",
+    "calgary": "America/Edmonton",
+    "rio": "America/Sao_Paulo",
+    "rio de janeiro": "America/Sao_Paulo",
+    "brasilia": "America/Sao_Paulo",
+    "manchester": "Europe/London",
+    "birmingham": "Europe/London",
+    "edinburgh": "Europe/London",
+    "glasgow": "Europe/London",
+    "liverpool": "Europe/London",
+    "cardiff": "Europe/London",
+    "barcelona": "Europe/Madrid",
+    "munich": "Europe/Berlin",
+    "frankfurt": "Europe/Berlin",
+    "hamburg": "Europe/Berlin",
+    "cologne": "Europe/Berlin",
+    "milan": "Europe/Rome",
+    "naples": "Europe/Rome",
+    "florence": "Europe/Rome",
+    "venice": "Europe/Rome",
+    "geneva": "Europe/Zurich",
+    "basel": "Europe/Zurich",
+    "rotterdam": "Europe/Amsterdam",
+    "the hague": "Europe/Amsterdam",
+    "antwerp": "Europe/Brussels",
+    "porto": "Europe/Lisbon",
+    "krakow": "Europe/Warsaw",
+    "st petersburg": "Europe/Moscow",
+    "saint petersburg": "Europe/Moscow",
+    "abu dhabi": "Asia/Dubai",
+    "doha": "Asia/Qatar",
+    "tel aviv": "Asia/Jerusalem",
+    "mecca": "Asia/Riyadh",
+    "mumbai": "Asia/Kolkata",
+    "bombay": "Asia/Kolkata",
+    "delhi": "Asia/Kolkata",
+    "new delhi": "Asia/Kolkata",
+    "bangalore": "Asia/Kolkata",
+    "bengaluru": "Asia/Kolkata",
+    "chennai": "Asia/Kolkata",
+    "hyderabad": "Asia/Kolkata",
+    "pune": "Asia/Kolkata",
+    "calcutta": "Asia/Kolkata",
+    "lahore": "Asia/Karachi",
+    "islamabad": "Asia/Karachi",
+    "beijing": "Asia/Shanghai",
+    "shenzhen": "Asia/Shanghai",
+    "guangzhou": "Asia/Shanghai",
+    "chengdu": "Asia/Shanghai",
+    "hanoi": "Asia/Bangkok",
+    "osaka": "Asia/Tokyo",
+    "kyoto": "Asia/Tokyo",
+    "yokohama": "Asia/Tokyo",
+    "busan": "Asia/Seoul",
+    "canberra": "Australia/Sydney",
+    "gold coast": "Australia/Brisbane",
+    "wellington": "Pacific/Auckland",
+    "christchurch": "Pacific/Auckland",
+    "cape town": "Africa/Johannesburg",
+    "durban": "Africa/Johannesburg",
+    "abuja": "Africa/Lagos",
+}
+
+# Countries with several zones; the one most people mean
+COUNTRY_TIMEZONES = {
+    "us": "America/New_York",
+    "usa": "America/New_York",
+    "united states": "America/New_York",
+    "america": "America/New_York",
+    "uk": "Europe/London",
+    "united kingdom": "Europe/London",
+    "britain": "Europe/London",
+    "great britain": "Europe/London",
+    "england": "Europe/London",
+    "scotland": "Europe/London",
+    "wales": "Europe/London",
+    "china": "Asia/Shanghai",
+    "canada": "America/Toronto",
+    "australia": "Australia/Sydney",
+    "brazil": "America/Sao_Paulo",
+    "russia": "Europe/Moscow",
+    "mexico": "America/Mexico_City",
+    "spain": "Europe/Madrid",
+    "germany": "Europe/Berlin",
+    "indonesia": "Asia/Jakarta",
+    "argentina": "America/Argentina/Buenos_Aires",
+    "new zealand": "Pacific/Auckland",
+}
+
+OFFSET = re.compile(r"(?:utc|gmt)?\s*([+-])\s*(\d{1,2})(?::?(\d{2}))?")
+# Fuzzy matches must be this similar (difflib ratio) to be used, and at most
+# this many typos away (one for names of up to five letters: "nice" is not "venice")
+FUZZY_CUTOFF = 0.8
+MAX_FUZZY_EDITS = 2
+# Shorter inputs ("it", "me") are never fuzzy-matched
+MIN_FUZZY_LENGTH = 4
+# Regions whose legacy zones ("Europe/Kiev", "Asia/Calcutta") are also indexed by city
+CITY_REGIONS = {
+    "Africa", "America", "Antarctica", "Arctic", "Asia", "Atlantic", "Australia", "Europe", "Indian", "Pacific",
+}
+SUGGEST_CUTOFF = 0.6
+RESOLVE_CACHE_SIZE = 4096
+
+
+def _normalize(name):
+    """'  São_Paulo ' -> 'sao paulo'; 'America/New_York' -> 'america/new york'."""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    name = name.lower().replace("_", " ").replace(".", "")
+    return " ".join(name.split())
+
+
+def _offset_zone(name):
+    """'UTC+5:30' or '-03' -> a fixed-offset zone name like 'UTC+05:30'."""
+    found = OFFSET.fullmatch(name)
+    if not found:
+        return None
+    sign, hours, minutes = found.group(1), int(found.group(2)), int(found.group(3) or 0)
+    if hours > 14 or minutes >= 60:
+        return None
+    return f"UTC{sign}{hours:02d}:{minutes:02d}"
+
+
+def _edits(a, b):
+    """Levenshtein distance between `a` and `b`."""
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+class TimezoneResolver:
+    """Resolves what users and models type to an IANA timezone.
+
+    `get_current_time` used to try `pytz.timezone(name)` and a map of eight
+    abbreviations, so "Tokyo", "New York" or "Asia/Tokio" came back as
+    "Unknown timezone" and cost the agent another model turn. The resolver
+    indexes every IANA zone (full name and city), common abbreviations,
+    major cities and countries, and also accepts UTC offsets ("UTC+5:30").
+    A qualifier ("Paris, France") must name the zone's country or region,
+    so "Paris, Texas" is not Europe/Paris. Inputs that match none of these
+    are matched against the index allowing a typo or two.
+
+    The index is built once, on first use; results and tz objects are
+    cached, so repeated lookups take a dictionary access.
+    """
+
+    def __init__(self, fuzzy_cutoff=FUZZY_CUTOFF, cache_size=RESOLVE_CACHE_SIZE):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._index = None
+        self._keys = None
+        self._countries = None
+        self._zone_countries = None
+        self._lock = threading.Lock()
+        self._resolve = lru_cache(maxsize=cache_size)(self._lookup)
+        self._tzinfo = lru_cache(maxsize=None)(self._load_tzinfo)
+
+    @property
+    def index(self):
+        """Normalized name -> IANA zone."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._zone_countries, self._countries = self._build_countries()
+                    index = self._build_index()
+                    self._keys = list(index)
+                    self._index = index
+        return self._index
+
+    @staticmethod
+    def _build_index():
+        index = {}
+        for zone in pytz.common_timezones:
+            key = _normalize(zone)
+            index.setdefault(key, zone)
+            index.setdefault(key.rsplit("/", 1)[-1], zone)
+        # Countries with one zone: "japan" is Asia/Tokyo, not the legacy alias
+        for code, zones in pytz.country_timezones.items():
+            if len(zones) == 1:
+                index[_normalize(pytz.country_names[code])] = zones[0]
+        # Other zones by full name, and legacy city names ("Kiev") by city too;
+        # not "Etc/GMT-3" as "gmt-3": its sign is inverted
+        for zone in pytz.all_timezones:
+            key = _normalize(zone)
+            index.setdefault(key, zone)
+            if zone.split("/", 1)[0] in CITY_REGIONS:
+                index.setdefault(key.rsplit("/", 1)[-1], zone)
+        for names in (CITY_TIMEZONES, COUNTRY_TIMEZONES, TIMEZONE_ABBREVIATIONS):
+            index.update(names)
+        return index
+
+    @staticmethod
+    def _build_countries():
+        """(zone -> its country codes, country name or code -> country codes)"""
+        zone_countries = {}
+        for code, zones in pytz.country_timezones.items():
+            for zone in zones:
+                zone_countries.setdefault(zone, set()).add(code)
+        countries = {}
+        for code, name in pytz.country_names.items():
+            countries.setdefault(_normalize(name), set()).add(code)
+            countries.setdefault(code.lower(), set()).add(code)
+        for name, zone in COUNTRY_TIMEZONES.items():
+            countries.setdefault(name, set()).update(zone_countries.get(zone, ()))
+        return zone_countries, countries
+
+    def _in_place(self, zone, qualifier):
+        """Whether `qualifier` names the country ("France", "UK") or region
+        ("Europe") of `zone`."""
+        if qualifier == _normalize(zone.split("/")[0]):
+            return True
+        return bool(self._countries.get(qualifier, set()) & self._zone_countries.get(zone, set()))
+
+    def _close_match(self, key):
+        if len(key) < MIN_FUZZY_LENGTH:
+            return None
+        limit = 1 if len(key) <= 5 else MAX_FUZZY_EDITS
+        for close in difflib.get_close_matches(key, self._keys, n=5, cutoff=self.fuzzy_cutoff):
+            if _edits(key, close) <= limit:
+                return self._index[close]
+        return None
+
+    def _lookup(self, key, fuzzy):
+        offset = _offset_zone(key)
+        if offset:
+            return offset
+        index = self.index
+        if key in index:
+            return index[key]
+        if not fuzzy:
+            return None
+        # "Paris, France" or "Tokyo (Japan)": the place, if it is in that country
+        qualified = re.fullmatch(r"([^,(]+?)\s*[,(]\s*([^,()]+?)\s*\)?", key)
+        if qualified:
+            place, qualifier = qualified.groups()
+            zone = self._lookup(place, fuzzy)
+            return zone if zone is not None and self._in_place(zone, qualifier) else None
+        # "Europe/Paris time" or "Tokyo timezone"
+        trimmed = re.sub(r"\s+(?:time ?zone|time|standard time|daylight time)$", "", key)
+        if trimmed != key and trimmed in index:
+            return index[trimmed]
+        return self._close_match(key)
+
+    def resolve(self, name, fuzzy=True):
+        """The IANA zone (or 'UTC+hh:mm') for `name`, or None.
+
+        Pass `fuzzy=False` to accept only exact names and offsets (no
+        qualifiers, suffixes or typos), e.g. when a wrong guess would be
+        worse than asking the model.
+        """
+        key = _normalize(name)
+        if not key:
+            return None
+        return self._resolve(key, fuzzy)
+
+    @staticmethod
+    def _load_tzinfo(zone):
+        if zone.startswith("UTC") and len(zone) > 3:
+            sign = -1 if zone[3] == "-" else 1
+            hours, minutes = zone[4:].split(":")
+            return pytz.FixedOffset(sign * (int(hours) * 60 + int(minutes)))
+        return pytz.timezone(zone)
+
+    def timezone(self, name, fuzzy=True):
+        """`(zone name, tzinfo)` for `name`, or None if it can't be resolved."""
+        zone = self.resolve(name, fuzzy)
+        if zone is None:
+            return None
+        return zone, self._tzinfo(zone)
+
+    def suggest(self, name, n=3):
+        """Up to `n` zones with names close to `name`, for error messages."""
+        self.index
+        close = difflib.get_close_matches(_normalize(name), self._keys, n=n * 3, cutoff=SUGGEST_CUTOFF)
+        suggestions = []
+        for key in close:
+            zone = self._index[key]
+            if zone not in suggestions:
+                suggestions.append(zone)
+        return suggestions[:n]
+
+    def cache_info(self):
+        return self._resolve.cache_info()
+
+
+timezone_resolver = TimezoneResolver()
+
+
+def unknown_timezone_message(name, resolver=timezone_resolver):
+    """What `get_current_time` tells the model when `name` can't be resolved."""
+    suggestions = resolver.suggest(name)
+    hint = f" Did you mean {', '.join(suggestions)}?" if suggestions else ""
+    return (
+        f"Unknown timezone: {name}.{hint} Please use a city or standard timezone names "
+        f"like 'UTC', 'US/Eastern', 'Europe/London', etc."
+    )
@@ -0,0 +1,328 @@
+"""OpenTelemetry tracing for the agents.
+
+    provider = configure_tracing("console")   # or "otlp", "memory"
+    agent.agent_executor.invoke(inputs, config=traced_config())
+
+Each agent run becomes a trace: an `invoke_agent` span, one `agent.iteration`
+span per model turn, and under it a `chat` span for the model call (token
+counts, time to first token) and an `execute_tool` span per tool call (with
+`weather.cache` = hit/miss/coalesced for weather lookups).
+
+Until `configure_tracing` is called, `traced_config()` returns the config
+unchanged and `annotate()` returns at once, so untraced runs pay nothing.
+"""
+
+import threading
+import time
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
+
+# Exporters offered on the command line; "memory" only serves tests
+CLI_EXPORTERS = ("console", "otlp")
+EXPORTERS = (*CLI_EXPORTERS, "memory")
+SERVICE_NAME = "genai-cookbook-agents"
+# Longest tool input/output kept on a span
+MAX_ATTRIBUTE_LENGTH = 512
+
+_handler = None
+
+
+def configure_tracing(exporter="console", endpoint=None, service_name=SERVICE_NAME):
+    """Start tracing agent runs; returns the `TracerProvider`.
+
+    * `"console"`: print finished spans as JSON
+    * `"otlp"`: send them over OTLP/gRPC to `endpoint` (default: the
+      `OTEL_EXPORTER_OTLP_ENDPOINT` environment variable, else
+      localhost:4317), in batches
+    * `"memory"`: keep them in `provider.memory_exporter` for tests; call
+      `get_finished_spans()` on it
+
+    `None` (or `"none"`) turns tracing off again.
+    """
+    global _handler
+    if _handler is not None:
+        _handler.provider.shutdown()
+        _handler = None
+    if exporter in (None, "none"):
+        return None
+    if exporter not in EXPORTERS:
+        raise ValueError(f"Unknown exporter {exporter!r}; use one of {', '.join(EXPORTERS)}")
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    if exporter == "console":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    elif exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+    else:
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+        provider.memory_exporter = InMemorySpanExporter()
+        provider.add_span_processor(SimpleSpanProcessor(provider.memory_exporter))
+
+    _handler = TracingCallbackHandler(provider)
+    return provider
+
+
+def tracing_enabled():
+    return _handler is not None
+
+
+def get_tracer_provider():
+    """The provider set up by `configure_tracing`, if tracing is on."""
+    return _handler.provider if _handler is not None else None
+
+
+def traced_config(config=None):
+    """`config` plus the tracing callback, if tracing is on; pass it to
+    `invoke`/`ainvoke`/`astream` so every model and tool call is traced."""
+    if _handler is None:
+        return config
+    config = dict(config or {})
+    callbacks = config.get("callbacks")
+    if callbacks is None:
+        config["callbacks"] = [_handler]
+    elif isinstance(callbacks, list):
+        config["callbacks"] = callbacks + [_handler]
+    else:
+        # A callback manager: it passes the handler on to child runs
+        callbacks = callbacks.copy()
+        callbacks.add_handler(_handler)
+        config["callbacks"] = callbacks
+    return config
+
+
+def annotate(key, value):
+    """Set an attribute on the span of the tool call in progress, if traced."""
+    if _handler is None:
+        return
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attribute(key, value)
+
+
+def _truncate(value):
+    value = str(value)
+    return value if len(value) <= MAX_ATTRIBUTE_LENGTH else value[:MAX_ATTRIBUTE_LENGTH] + "…"
+
+
+def _usage(response):
+    """`(input_tokens, output_tokens)` reported for a model call, if any."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage.get("prompt_tokens") is not None:
+        return usage["prompt_tokens"], usage.get("completion_tokens", 0)
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("input_tokens", 0), metadata.get("output_tokens", 0)
+    return None
+
+
+class _Run:
+    """Spans still open in one agent run."""
+
+    def __init__(self, span):
+        self.span = span
+        self.iteration = None
+        self.iterations = 0
+        self.children = {}
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Turns LangChain callbacks into OpenTelemetry spans.
+
+    The outermost chain of a run (`AgentExecutor`, the LangGraph graph) is
+    the `invoke_agent` span. Every model call starts a new iteration, which
+    lasts until the next model call or the end of the run, so a turn's tool
+    calls sit beside its model call. Chains in between are not traced.
+
+    Runs inline, so a tool span is the current OpenTelemetry span while the
+    tool runs and the tool can annotate it.
+    """
+
+    run_inline = True
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.tracer = provider.get_tracer(__name__)
+        self._lock = threading.Lock()
+        self._runs = {}
+        # run_id of every open chain/model/tool -> run_id of its agent run
+        self._roots = {}
+        self._llm_starts = {}
+        self._tool_tokens = {}
+
+    def _root(self, run_id, parent_run_id):
+        root = self._roots.get(parent_run_id, parent_run_id) if parent_run_id else None
+        self._roots[run_id] = root or run_id
+        return self._runs.get(root) if root else None
+
+    def _start(self, name, parent, **attributes):
+        return self.tracer.start_span(
+            name, context=trace.set_span_in_context(parent) if parent else None, attributes=attributes
+        )
+
+    @staticmethod
+    def _end(span, error=None):
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(Status(StatusCode.ERROR, str(error)))
+        span.end()
+
+    # Agent runs
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs: Any):
+        with self._lock:
+            self._root(run_id, parent_run_id)
+            if parent_run_id is not None:
+                return
+            name = kwargs.get("name") or (serialized or {}).get("name") or "agent"
+            span = self._start(
+                f"invoke_agent {name}", None, **{"gen_ai.operation.name": "invoke_agent", "gen_ai.agent.name": name}
+            )
+            self._runs[run_id] = _Run(span)
+
+    def _finish_chain(self, run_id, error=None):
+        with self._lock:
+            self._roots.pop(run_id, None)
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            # A tool cancelled by its timeout never reports back. Its context
+            # went with the cancelled task, so the token is only dropped.
+            for child_id in run.children:
+                self._roots.pop(child_id, None)
+                self._llm_starts.pop(child_id, None)
+                self._tool_tokens.pop(child_id, None)
+        # Anything still open (e.g. a tool that timed out) ends with the run
+        for span in run.children.values():
+            span.set_attribute("agent.unfinished", True)
+            span.end()
+        if run.iteration is not None:
+            run.iteration.end()
+        run.span.set_attribute("agent.iterations", run.iterations)
+        self._end(run.span, error)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs: Any):
+        self._finish_chain(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs: Any):
+        self._finish_chain(run_id, error)
+
+    # Model calls
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs: Any):
+        params = kwargs.get("invocation_params") or {}
+        model = (
+            (metadata or {}).get("ls_model_name")
+            or params.get("model_name")
+            or params.get("model")
+            or params.get("_type", "unknown")
+        )
+        with self._lock:
+            run = self._root(run_id, parent_run_id)
+            parent = None
+            if run is not None:
+                if run.iteration is not None:
+                    run.iteration.end()
+                run.iterations += 1
+                run.iteration = self._start("agent.iteration", run.span, **{"agent.iteration": run.iterations})
+                parent = run.iteration
+            span = self._start(
+                f"chat {model}",
+                parent,
+                **{
+                    "gen_ai.operation.name": "chat",
+                    "gen_ai.request.model": model,
+                    "gen_ai.request.message_count": sum(len(batch) for batch in messages),
+                },
+            )
+            if run is not None:
+                run.children[run_id] = span
+            # [span, start time, agent run, first token seen]
+            self._llm_starts[run_id] = [span, time.perf_counter(), run, False]
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs: Any):
+        # Only called when the model streams
+        with self._lock:
+            entry = self._llm_starts.get(run_id)
+            if entry is None or entry[3]:
+                return
+            entry[3] = True
+        entry[0].set_attribute("gen_ai.response.time_to_first_token_ms", (time.perf_counter() - entry[1]) * 1000)
+
+    def _finish_llm(self, run_id, response=None, error=None):
+        with self._lock:
+            self._roots.pop(run_id, None)
+            entry = self._llm_starts.pop(run_id, None)
+            if entry is None:
+                return
+            span, _, run, _ = entry
+            if run is not None:
+                run.children.pop(run_id, None)
+        if response is not None:
+            usage = _usage(response)
+            if usage:
+                span.set_attribute("gen_ai.usage.input_tokens", usage[0])
+                span.set_attribute("gen_ai.usage.output_tokens", usage[1])
+            generation = response.generations[0][0] if response.generations and response.generations[0] else None
+            tool_calls = getattr(getattr(generation, "message", None), "tool_calls", None) or []
+            span.set_attribute("gen_ai.response.tool_calls", len(tool_calls))
+        self._end(span, error)
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any):
+        self._finish_llm(run_id, response=response)
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any):
+        self._finish_llm(run_id, error=error)
+
+    # Tool calls
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs: Any):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        with self._lock:
+            run = self._root(run_id, parent_run_id)
+            parent = (run.iteration or run.span) if run is not None else None
+            span = self._start(
+                f"execute_tool {name}",
+                parent,
+                **{
+                    "gen_ai.operation.name": "execute_tool",
+                    "gen_ai.tool.name": name,
+                    "tool.input": _truncate(input_str),
+                },
+            )
+            if run is not None:
+                run.children[run_id] = span
+            # The tool runs in this context (or a copy of it): make its span current
+            self._tool_tokens[run_id] = (span, run, otel_context.attach(trace.set_span_in_context(span)))
+
+    def _finish_tool(self, run_id, output=None, error=None):
+        with self._lock:
+            entry = self._tool_tokens.pop(run_id, None)
+            if entry is None:
+                return
+            span, run, token = entry
+            self._roots.pop(run_id, None)
+            if run is not None:
+                run.children.pop(run_id, None)
+        otel_context.detach(token)
+        if output is not None:
+            span.set_attribute("tool.output", _truncate(getattr(output, "content", output)))
+        self._end(span, error)
+
+    def on_tool_end(self, output, *, run_id, **kwargs: Any):
+        self._finish_tool(run_id, output=output)
+
+    def on_tool_error(self, error, *, run_id, **kwargs: Any):
+        self._finish_tool(run_id, error=error)
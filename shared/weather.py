@@ -0,0 +1,262 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from shared.tracing import annotate
+
+OPENWEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+# Current conditions change slowly; OpenWeatherMap itself updates about every 10 minutes
+WEATHER_CACHE_TTL = 10 * 60
+WEATHER_CACHE_SIZE = 1024
+WEATHER_TIMEOUT = 10
+WEATHER_POOL_SIZE = 16
+# Connections of the aiohttp session, shared by every conversation on the loop
+ASYNC_WEATHER_POOL_SIZE = 100
+
+
+class _Call:
+    """An in-flight lookup that identical concurrent lookups wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WeatherClient:
+    """OpenWeatherMap client shared by the agents' `get_weather` tools.
+
+    * One `requests.Session` with a pool of keep-alive connections, instead
+      of a new connection for every call
+    * A per-location cache: results are reused for `ttl` seconds and at most
+      `max_entries` locations are kept, least recently used first out
+    * Single-flight: concurrent lookups of the same location share one
+      request; only the first caller goes to the API
+
+    `acurrent()` is the native async version for agents run with `ainvoke`:
+    it shares the cache, and uses one aiohttp session (a pool of
+    `async_pool_size` connections) per event loop instead of a thread per call.
+
+    Locations are matched case- and whitespace-insensitively. Errors are not
+    cached. `stats()` reports the hit rate; point `base_url` at a local stub
+    server to test without the real API.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        base_url=OPENWEATHER_URL,
+        units="imperial",
+        ttl=WEATHER_CACHE_TTL,
+        max_entries=WEATHER_CACHE_SIZE,
+        timeout=WEATHER_TIMEOUT,
+        pool_size=WEATHER_POOL_SIZE,
+        async_pool_size=ASYNC_WEATHER_POOL_SIZE,
+    ):
+        self._api_key = api_key
+        self.base_url = base_url
+        self.units = units
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.async_pool_size = async_pool_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._counts = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+        # aiohttp session and in-flight lookups, bound to one event loop
+        self._async_loop = None
+        self._async_session = None
+        self._async_in_flight = {}
+
+    @property
+    def api_key(self):
+        """The API key given to the client, else `WEATHER_API_KEY`."""
+        return self._api_key or os.getenv("WEATHER_API_KEY")
+
+    def _key(self, location):
+        return " ".join(location.lower().split()), self.units
+
+    def current(self, location):
+        """Return OpenWeatherMap's current-weather JSON for a location.
+
+        Raises `requests.RequestException` if the API call fails.
+        """
+        key = self._key(location)
+        with self._lock:
+            cached = self._cached_locked(key)
+            if cached is not None:
+                annotate("weather.cache", "hit")
+                return cached
+
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self._counts["misses"] += 1
+            else:
+                self._counts["coalesced"] += 1
+
+        annotate("weather.cache", "miss" if leader else "coalesced")
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._fetch(location)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                self._finish_locked(key, call.result, call.error)
+            call.done.set()
+        return call.result
+
+    def _cached_locked(self, key):
+        """Return a fresh cached result, counting the hit; else None."""
+        entry = self._cache.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        self._cache.move_to_end(key)
+        self._counts["hits"] += 1
+        return entry[1]
+
+    def _finish_locked(self, key, result, error):
+        """Cache a successful lookup, or count a failed one."""
+        if error is not None:
+            self._counts["errors"] += 1
+            return
+        self._cache[key] = (time.monotonic() + self.ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _fetch(self, location):
+        response = self.session.get(
+            self.base_url,
+            params={"q": location, "appid": self.api_key, "units": self.units},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _async_state(self):
+        """The aiohttp session and in-flight lookups of the running loop."""
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            # A new loop (e.g. another asyncio.run) can't reuse the old session
+            self._async_loop = loop
+            self._async_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.async_pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._async_in_flight = {}
+        return self._async_session, self._async_in_flight
+
+    async def acurrent(self, location):
+        """Async `current()`: same cache, aiohttp instead of requests.
+
+        Raises `aiohttp.ClientError` or `asyncio.TimeoutError` if the API
+        call fails.
+        """
+        key = self._key(location)
+        with self._lock:
+            cached = self._cached_locked(key)
+        if cached is not None:
+            annotate("weather.cache", "hit")
+            return cached
+
+        session, in_flight = self._async_state()
+        future = in_flight.get(key)
+        if future is not None:
+            with self._lock:
+                self._counts["coalesced"] += 1
+            annotate("weather.cache", "coalesced")
+            # A waiter that is cancelled must not cancel the shared lookup
+            return await asyncio.shield(future)
+
+        with self._lock:
+            self._counts["misses"] += 1
+        annotate("weather.cache", "miss")
+        future = in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            async with session.get(
+                self.base_url,
+                params={"q": location, "appid": self.api_key, "units": self.units},
+            ) as response:
+                response.raise_for_status()
+                result = await response.json(content_type=None)
+        except BaseException as e:
+            with self._lock:
+                self._finish_locked(key, None, e)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Only waiters need to see it; don't warn if there are none
+                future.exception()
+            raise
+        finally:
+            in_flight.pop(key, None)
+
+        with self._lock:
+            self._finish_locked(key, result, None)
+        future.set_result(result)
+        return result
+
+    def stats(self):
+        """Cache and request counters.
+
+        `hit_rate` counts lookups served without a request of their own, i.e.
+        cache hits plus lookups coalesced onto an in-flight request.
+        """
+        with self._lock:
+            stats = dict(self._counts, entries=len(self._cache))
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["lookups"] = lookups
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Forget all cached locations."""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        self.session.close()
+
+    async def aclose(self):
+        """Close the aiohttp session of the running loop."""
+        if self._async_session is not None and self._async_loop is asyncio.get_running_loop():
+            await self._async_session.close()
+            self._async_loop = self._async_session = None
+
+
+weather_client = WeatherClient()
+
+
+def format_weather_stats(client=weather_client):
+    """One-line summary of a client's `stats()` for the agents' CLIs."""
+    stats = client.stats()
+    return (
+        f"{stats['lookups']} lookups, {stats['hit_rate']:.0%} served without a request "
+        f"({stats['hits']} cached, {stats['coalesced']} coalesced), "
+        f"{stats['misses']} requests, {stats['errors']} errors, {stats['entries']} locations cached"
+    )